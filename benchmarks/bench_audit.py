@@ -0,0 +1,57 @@
+"""Time a full calendar audit serially and on a process pool.
+
+A synthetic calendar (see ``synthetic.py``) with a sprinkling of
+overlapping bookings is saved as a compact JSON file, read back as raw rows
+and audited with one worker and with one per CPU.  Run with
+``python benchmarks/bench_audit.py [appointments] [workers]`` (defaults to
+500000 appointments and ``os.cpu_count()`` workers).
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import sys
+import tempfile
+from dataclasses import replace
+from datetime import timedelta
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from gestor_citas_avanzado.audit import audit  # noqa: E402
+from gestor_citas_avanzado.models import new_identifier  # noqa: E402
+from gestor_citas_avanzado.storage import AppointmentStorage  # noqa: E402
+from synthetic import generate_calendar  # noqa: E402
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    rng = random.Random(0)
+    calendar = generate_calendar(size)
+    # Roughly one booking in a thousand gets an overlapping twin, as after merging two calendars.
+    calendar += [
+        replace(item, identifier=new_identifier(), start_time=item.start_time + timedelta(minutes=10))
+        for item in rng.sample(calendar, size // 1000)
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        storage = AppointmentStorage(Path(directory) / "appointments.json", compact=True)
+        storage.save(calendar)
+        began = perf_counter()
+        rows = storage.records()
+        print(f"read {len(rows)} rows in {perf_counter() - began:.2f} s")
+        for count in sorted({1, workers}):
+            began = perf_counter()
+            report = audit(rows, workers=count)
+            elapsed = perf_counter() - began
+            print(
+                f"audit with {count} worker(s): {len(report.conflicts)} conflicts, "
+                f"{len(report.invalid)} invalid in {elapsed:.2f} s ({len(rows) / elapsed:,.0f} rows/s)"
+            )
+
+
+if __name__ == "__main__":
+    main()
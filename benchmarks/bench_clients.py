@@ -0,0 +1,83 @@
+"""Compare the embedded-client file format with the client registry.
+
+Reports file size, load time and the cost of fetching one client's
+appointments by scanning versus through the registry index.  Run with
+``python benchmarks/bench_clients.py [appointments] [clients]`` (defaults
+to 200000 appointments booked by 5000 clients).
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from gestor_citas_avanzado import serialization  # noqa: E402
+from gestor_citas_avanzado.models import Appointment, Client  # noqa: E402
+from gestor_citas_avanzado.service import Scheduler  # noqa: E402
+from gestor_citas_avanzado.storage import AppointmentStorage  # noqa: E402
+
+
+def make_appointments(size: int, clients: int) -> list:
+    people = [
+        Client(name=f"Cliente {number}", email=f"cliente{number}@example.com", phone=f"600 {number:06d}")
+        for number in range(clients)
+    ]
+    start = datetime(2015, 1, 1, 9, 0)
+    return [
+        Appointment(
+            client=people[position % clients],
+            service="Consulta",
+            start_time=start + timedelta(minutes=30 * position),
+            duration_minutes=30,
+        )
+        for position in range(size)
+    ]
+
+
+def legacy_row(appointment: Appointment) -> dict:
+    """Return the row layout written before the client registry existed."""
+
+    row = appointment.to_dict()
+    row["client"] = {key: value for key, value in row["client"].items() if key != "identifier"}
+    return row
+
+
+def timed(action) -> float:
+    began = time.perf_counter()
+    action()
+    return time.perf_counter() - began
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    appointments = make_appointments(size, clients)
+    target = appointments[len(appointments) // 2].client
+
+    with tempfile.TemporaryDirectory() as directory:
+        embedded = Path(directory) / "embedded.json"
+        embedded.write_bytes(serialization.dumps([legacy_row(item) for item in appointments]))
+        registry = Path(directory) / "registry.json"
+        AppointmentStorage(registry, compact=True).save(appointments)
+
+        print(f"appointments: {size}, clients: {clients}")
+        for label, path in (("embedded", embedded), ("registry", registry)):
+            storage = AppointmentStorage(path)
+            elapsed = timed(storage.load)
+            print(f"{label:8s} file {path.stat().st_size / 2**20:7.1f} MiB | load {elapsed:6.2f} s")
+
+        scheduler = Scheduler(AppointmentStorage(registry), cache=True)
+        loaded = scheduler.list_appointments()
+        scan = timed(lambda: [item for item in loaded if item.client.identifier == target.identifier])
+        scheduler.appointments_for_client(target.identifier)
+        lookup = timed(lambda: scheduler.appointments_for_client(target.identifier))
+        print(f"per-client lookup: scan {scan * 1e3:7.2f} ms | registry {lookup * 1e3:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Compare read-only queries on a JSON database with and without its columnar snapshot.
+
+A synthetic calendar (see ``synthetic.py``) is saved as a compact JSON file
+and as the same file plus ``<database>.columns``.  Each query runs on a
+fresh scheduler, as it would in a new ``gestor-citas`` process: a week
+window, the upcoming appointments of one room and the list of resources.
+Run with ``python benchmarks/bench_columnar.py [appointments]`` (defaults
+to 200000 appointments).
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from gestor_citas_avanzado.service import Scheduler  # noqa: E402
+from gestor_citas_avanzado.storage import AppointmentStorage  # noqa: E402
+from synthetic import generate_calendar  # noqa: E402
+
+
+def timed(action) -> float:
+    began = perf_counter()
+    action()
+    return perf_counter() - began
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    appointments = generate_calendar(size)
+    middle = appointments[len(appointments) // 2].start_time
+    week = (middle, middle + timedelta(days=7))
+    soon = appointments[-len(appointments) // 50].start_time
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "appointments.json"
+        AppointmentStorage(path, compact=True, epoch_timestamps=True, columnar=True).save(appointments)
+        print(f"appointments: {size}, JSON {path.stat().st_size >> 20} MiB, "
+              f"columns {(path.with_name(path.name + '.columns')).stat().st_size >> 20} MiB")
+        for label, columnar in (("json", False), ("columnar", True)):
+            def fresh() -> Scheduler:
+                return Scheduler(AppointmentStorage(path, compact=True, columnar=columnar))
+
+            found = fresh().find_between(*week)
+            window = timed(lambda: fresh().find_between(*week))
+            upcoming = timed(lambda: fresh().upcoming(after=soon, resource="consulta 1"))
+            resources = timed(lambda: fresh().resources())
+            listing = timed(lambda: fresh().list_appointments())
+            print(
+                f"{label:8s} week ({len(found)}) {window * 1000:8.2f} ms | upcoming {upcoming * 1000:8.2f} ms"
+                f" | resources {resources * 1000:8.2f} ms | list all {listing:6.3f} s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Compare the linear conflict scan with :class:`IntervalIndex` lookups.
+
+Run with ``python benchmarks/bench_conflict_index.py [appointments]``.
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from gestor_citas_avanzado.index import IntervalIndex  # noqa: E402
+from gestor_citas_avanzado.models import Appointment, Client  # noqa: E402
+
+
+def build_calendar(size: int) -> list:
+    start = datetime(2020, 1, 1, 9, 0)
+    client = Client(name="Benchmark")
+    appointments = []
+    for position in range(size):
+        appointments.append(
+            Appointment(
+                client=client,
+                service="Consultation",
+                start_time=start + timedelta(minutes=30 * position),
+                duration_minutes=30,
+                status="cancelled" if position % 10 == 0 else "scheduled",
+            )
+        )
+    return appointments
+
+
+def linear_conflicts(appointments: list, candidate: Appointment) -> list:
+    return [
+        existing.identifier
+        for existing in appointments
+        if existing.status != "cancelled"
+        and existing.start_time < candidate.end_time
+        and candidate.start_time < existing.end_time
+    ]
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    queries = 200
+    appointments = build_calendar(size)
+    last_start = appointments[-1].start_time
+    rng = random.Random(42)
+    candidates = [
+        Appointment(
+            client=Client(name="Probe"),
+            service="Consultation",
+            start_time=last_start - timedelta(minutes=rng.randrange(30 * size)),
+            duration_minutes=45,
+        )
+        for _ in range(queries)
+    ]
+
+    began = time.perf_counter()
+    index = IntervalIndex(appointments)
+    build = time.perf_counter() - began
+
+    began = time.perf_counter()
+    expected = [linear_conflicts(appointments, candidate) for candidate in candidates]
+    linear = time.perf_counter() - began
+
+    began = time.perf_counter()
+    found = [index.overlapping(candidate.start_time, candidate.end_time) for candidate in candidates]
+    indexed = time.perf_counter() - began
+
+    assert [sorted(item) for item in expected] == [sorted(item) for item in found]
+    print(f"appointments: {size}, queries: {queries}")
+    print(f"index build:      {build * 1000:10.2f} ms")
+    print(f"linear scan:      {linear / queries * 1e6:10.2f} us/query")
+    print(f"interval index:   {indexed / queries * 1e6:10.2f} us/query")
+    print(f"speed-up:         {linear / indexed:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
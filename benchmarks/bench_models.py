@@ -0,0 +1,122 @@
+"""Measure memory and hydration throughput of the appointment models.
+
+Compares the slotted, interned models with the previous plain dataclass
+layout.  Run with ``python benchmarks/bench_models.py [appointments]``
+(defaults to one million).
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from gestor_citas_avanzado.models import Appointment  # noqa: E402
+
+
+@dataclass
+class LegacyClient:
+    name: str
+    email: Optional[str] = None
+    phone: Optional[str] = None
+
+
+@dataclass
+class LegacyAppointment:
+    client: LegacyClient
+    service: str
+    start_time: datetime
+    duration_minutes: int
+    status: str = "scheduled"
+    notes: Optional[str] = None
+    identifier: str = ""
+
+    @property
+    def end_time(self) -> datetime:
+        return self.start_time + timedelta(minutes=self.duration_minutes)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LegacyAppointment":
+        return cls(
+            identifier=data["identifier"],
+            client=LegacyClient(**data["client"]),
+            service=data["service"],
+            start_time=datetime.fromisoformat(data["start_time"]),
+            duration_minutes=int(data["duration_minutes"]),
+            status=data.get("status", "scheduled"),
+            notes=data.get("notes"),
+        )
+
+
+def make_document(size: int) -> str:
+    start = datetime(2015, 1, 1, 9, 0)
+    services = ["Consulta", "Terapia", "Revisión", "Masaje"]
+    records = []
+    for position in range(size):
+        client = position % 5000
+        records.append(
+            {
+                "identifier": "%032x" % position,
+                "client": {"name": f"Cliente {client}", "email": f"cliente{client}@example.com", "phone": None},
+                "service": services[position % 4],
+                "start_time": (start + timedelta(minutes=30 * position)).isoformat(),
+                "duration_minutes": 30,
+                "status": "cancelled" if position % 10 == 0 else "scheduled",
+                "notes": None,
+            }
+        )
+    return json.dumps(records)
+
+
+def measure(label: str, hydrate, document: str) -> list:
+    """Parse ``document`` and hydrate it, reporting time and retained memory."""
+
+    gc.collect()
+    records = json.loads(document)
+    began = time.perf_counter()
+    loaded = hydrate(records)
+    elapsed = time.perf_counter() - began
+    del records, loaded
+    gc.collect()
+
+    tracemalloc.start()
+    loaded = hydrate(json.loads(document))
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    began = time.perf_counter()
+    for item in loaded:
+        item.end_time
+    ends = time.perf_counter() - began
+    print(
+        f"{label:8s} hydrate {len(loaded) / elapsed:10,.0f} rows/s | "
+        f"retained {current / 2**20:8.1f} MiB | end_time {ends * 1e9 / len(loaded):7.1f} ns/row"
+    )
+    return loaded
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    document = make_document(size)
+    print(f"appointments: {size}")
+    legacy = measure("legacy", lambda rows: [LegacyAppointment.from_dict(row) for row in rows], document)
+    del legacy
+
+    def hydrate(rows: list) -> list:
+        clients: dict = {}
+        return [Appointment.from_dict(row, clients) for row in rows]
+
+    measure("slotted", hydrate, document)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Compare a single JSON file with monthly partitions for recent-window queries.
+
+Fills both layouts with years of history, then times what a front desk
+does all day: listing this week, checking a conflict and booking one more
+appointment, each from a fresh process-like storage instance.  Run with
+``python benchmarks/bench_partitioned.py [appointments]`` (defaults to
+200000 appointments, one every 30 minutes from 2015 on).
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from gestor_citas_avanzado.models import Appointment, Client  # noqa: E402
+from gestor_citas_avanzado.service import Scheduler  # noqa: E402
+from gestor_citas_avanzado.storage import AppointmentStorage, PartitionedStorage  # noqa: E402
+
+
+def make_appointments(size: int) -> list:
+    people = [Client(name=f"Cliente {number}") for number in range(500)]
+    start = datetime(2015, 1, 1, 9, 0)
+    return [
+        Appointment(
+            client=people[position % len(people)],
+            service="Consulta",
+            start_time=start + timedelta(minutes=30 * position),
+            duration_minutes=30,
+        )
+        for position in range(size)
+    ]
+
+
+def timed(action) -> float:
+    began = time.perf_counter()
+    action()
+    return time.perf_counter() - began
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    appointments = make_appointments(size)
+    last = appointments[-1].start_time
+    week = (last - timedelta(days=7), last)
+
+    with tempfile.TemporaryDirectory() as directory:
+        single = Path(directory) / "single.json"
+        AppointmentStorage(single, compact=True).save(appointments)
+        partitioned = Path(directory) / "partitioned"
+        PartitionedStorage(partitioned, compact=True).save(appointments)
+        layouts = (
+            ("single", lambda: AppointmentStorage(single, compact=True)),
+            ("monthly", lambda: PartitionedStorage(partitioned, compact=True)),
+        )
+
+        print(f"appointments: {size}, last booking {last:%Y-%m-%d}")
+        for label, storage in layouts:
+            listing = timed(lambda: Scheduler(storage()).find_between(*week))
+            conflict = timed(lambda: Scheduler(storage()).available_slots(week, 30))
+            booking = timed(
+                lambda: Scheduler(storage()).create_appointment(
+                    client=Client(name=label),
+                    service="Consulta",
+                    start_time=last + timedelta(days=1),
+                    duration_minutes=30,
+                )
+            )
+            print(f"{label:8s} week {listing:6.3f} s | slots {conflict:6.3f} s | book {booking:6.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Time auto-scheduling a batch of requests into a busy calendar.
+
+A synthetic calendar (see ``synthetic.py``) fills several rooms; the batch
+asks for sessions with one to three preferred half-day windows each, spread
+over the weeks after the calendar's last booking day.  Run with
+``python benchmarks/bench_planner.py [appointments] [requests] [weeks]``
+(defaults to 20000 appointments, 500 requests over 4 weeks).
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import tempfile
+from datetime import time, timedelta
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from gestor_citas_avanzado.planner import BookingRequest, Constraints  # noqa: E402
+from gestor_citas_avanzado.service import Scheduler  # noqa: E402
+from gestor_citas_avanzado.storage import AppointmentStorage  # noqa: E402
+from synthetic import generate_calendar, make_clients  # noqa: E402
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    weeks = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    rng = random.Random(0)
+    calendar = generate_calendar(size, gap_rate=0.5)
+    # Leave the last weeks of the calendar partly booked so requests compete with existing appointments.
+    first_day = (calendar[-1].start_time - timedelta(weeks=weeks // 2)).replace(hour=0, minute=0)
+    rooms = sorted({appointment.resource for appointment in calendar})
+    requests = []
+    for client in make_clients(count, rng):
+        windows = []
+        for _ in range(rng.randint(1, 3)):
+            start = first_day + timedelta(days=rng.randrange(weeks * 7), hours=rng.choice([9, 14]))
+            windows.append((start, start + timedelta(hours=5)))
+        minutes = rng.choice([30, 45, 60])
+        requests.append(
+            BookingRequest(client=client, service="Consulta", duration_minutes=minutes, windows=tuple(windows))
+        )
+    constraints = Constraints(resources=tuple(rooms), working_hours=((time(9, 0), time(19, 0)),))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "appointments.json"
+        AppointmentStorage(path, compact=True).save(calendar)
+        scheduler = Scheduler(AppointmentStorage(path, compact=True), cache=True)
+        scheduler.list_appointments()
+        for dry_run in (True, False):
+            began = perf_counter()
+            result = scheduler.auto_schedule(requests, constraints, dry_run=dry_run)
+            elapsed = perf_counter() - began
+            label = "dry run" if dry_run else "stored "
+            print(
+                f"{label} {len(requests)} requests over {weeks} weeks, {size} existing: "
+                f"{len(result.placed)} placed, {len(result.unplaced)} unplaced in {elapsed * 1e3:.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Compare booking a year of weekly sessions one by one with one series.
+
+Both variants run against a JSON calendar pre-filled with single
+appointments; the series variant also times a month-long window query and
+a conflict check against 200 existing series.  Run with
+``python benchmarks/bench_series.py [appointments] [occurrences]``
+(defaults to 20000 appointments and 52 weekly occurrences).
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from gestor_citas_avanzado.models import Appointment, Client  # noqa: E402
+from gestor_citas_avanzado.recurrence import Recurrence  # noqa: E402
+from gestor_citas_avanzado.service import Scheduler  # noqa: E402
+from gestor_citas_avanzado.storage import AppointmentStorage  # noqa: E402
+
+START = datetime(2024, 1, 1, 8, 0)
+
+
+def prefill(path: Path, size: int) -> None:
+    client = Client(name="Cliente")
+    AppointmentStorage(path, compact=True).save(
+        Appointment(client=client, service="Consulta", start_time=START + timedelta(hours=position), duration_minutes=30)
+        for position in range(size)
+    )
+
+
+def timed(action) -> float:
+    began = time.perf_counter()
+    action()
+    return time.perf_counter() - began
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    occurrences = int(sys.argv[2]) if len(sys.argv) > 2 else 52
+    client = Client(name="Ana")
+    first = START + timedelta(minutes=30)
+
+    with tempfile.TemporaryDirectory() as directory:
+        singles = Path(directory) / "singles.json"
+        prefill(singles, size)
+
+        def book_each() -> None:
+            for week in range(occurrences):
+                Scheduler(AppointmentStorage(singles, compact=True)).create_appointment(
+                    client=client, service="Terapia", start_time=first + timedelta(weeks=week), duration_minutes=30
+                )
+
+        series_path = Path(directory) / "series.json"
+        prefill(series_path, size)
+        scheduler = Scheduler(AppointmentStorage(series_path, compact=True), cache=True)
+
+        def book_series() -> None:
+            Scheduler(AppointmentStorage(series_path, compact=True)).create_series(
+                client=client,
+                service="Terapia",
+                start_time=first,
+                duration_minutes=30,
+                recurrence=Recurrence("weekly", count=occurrences),
+            )
+
+        print(f"appointments: {size}, occurrences: {occurrences}")
+        print(f"one by one  {timed(book_each):7.3f} s")
+        print(f"as a series {timed(book_series):7.3f} s")
+
+        for offset in range(200):
+            scheduler.create_series(
+                client=Client(name=f"Cliente {offset}"),
+                service="Terapia",
+                start_time=first + timedelta(days=1 + offset % 6, minutes=offset // 6 * 45),
+                duration_minutes=30,
+                recurrence=Recurrence("weekly", count=occurrences),
+                resource=f"sala {offset % 7}",
+            )
+        month = (START + timedelta(days=90), START + timedelta(days=120))
+        print(f"month window with 201 series {timed(lambda: scheduler.find_between(*month)) * 1e3:7.2f} ms")
+        candidate = dict(client=client, service="Terapia", duration_minutes=30, resource="sala 3")
+        check = timed(
+            lambda: scheduler.create_appointment(start_time=START + timedelta(days=400), **candidate)
+        )
+        print(f"single booking checked against 201 series {check * 1e3:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""Benchmark the scheduler and storage hot paths over synthetic calendars.
+
+For every backend and calendar size this times storage ``load``/``save``,
+``Scheduler.create_appointment``, ``find_between`` and ``find_for_client``,
+plus a ``list`` page and a bare import of the CLI in fresh interpreters.
+Each case reports throughput, p50/p95/p99 latency and peak memory (traced
+Python allocations for in-process cases, the child's peak RSS for CLI
+cases).  Calendars come from :func:`synthetic.generate_calendar`, so runs
+with the same ``--seed`` are comparable.
+
+Typical use::
+
+    python benchmarks/bench_suite.py --sizes 1000,10000,100000 --output base.json
+    # ... change the code ...
+    python benchmarks/bench_suite.py --sizes 1000,10000,100000 --compare base.json
+
+With ``--compare`` the run is checked against a saved one: cases whose p50
+latency or peak memory grew by more than ``--threshold`` are reported as
+regressions and the exit status is 1.  ``--current FILE`` compares two
+saved runs without benchmarking.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+SOURCE = Path(__file__).resolve().parents[1] / "src"
+sys.path.insert(0, str(SOURCE))
+
+from gestor_citas_avanzado.models import Client  # noqa: E402
+from gestor_citas_avanzado.service import Scheduler  # noqa: E402
+from gestor_citas_avanzado.storage import (  # noqa: E402
+    AppointmentStorage,
+    JournalStorage,
+    PartitionedStorage,
+    SQLiteStorage,
+)
+from synthetic import FIRST_DAY, generate_calendar  # noqa: E402
+
+BACKENDS = {
+    "json": lambda directory: AppointmentStorage(directory / "appointments.json", compact=True, epoch_timestamps=True),
+    "journal": lambda directory: JournalStorage(directory / "appointments.json", compact=True, epoch_timestamps=True),
+    "partitioned": lambda directory: PartitionedStorage(directory / "appointments", compact=True),
+    "sqlite": lambda directory: SQLiteStorage(directory / "appointments.sqlite3"),
+}
+DATABASES = {
+    "json": "appointments.json",
+    "journal": "appointments.json",
+    "partitioned": "appointments",
+    "sqlite": "appointments.sqlite3",
+}
+MAX_RSS = (
+    "import resource, sys\n"
+    "try:\n"
+    "    {body}\n"
+    "finally:\n"
+    "    sys.stderr.write('maxrss=%d\\n' % resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)\n"
+)
+
+
+@dataclass
+class Result:
+    """Summary of one case run against one backend and calendar size."""
+
+    case: str
+    backend: str
+    size: int
+    samples: int
+    throughput: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    peak_kib: float
+
+    @property
+    def key(self) -> str:
+        return f"{self.case}/{self.backend}/{self.size}"
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of an already sorted list."""
+
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def summarize(case: str, backend: str, size: int, timings: List[float], peak_kib: float) -> Result:
+    ordered = sorted(timings)
+    return Result(
+        case=case,
+        backend=backend,
+        size=size,
+        samples=len(ordered),
+        throughput=len(ordered) / sum(ordered) if sum(ordered) else float("inf"),
+        p50_ms=statistics.median(ordered) * 1e3,
+        p95_ms=percentile(ordered, 0.95) * 1e3,
+        p99_ms=percentile(ordered, 0.99) * 1e3,
+        max_ms=ordered[-1] * 1e3,
+        peak_kib=peak_kib,
+    )
+
+
+def measure(operation: Callable[[], object], budget: float, min_samples: int, max_samples: int) -> List[float]:
+    """Time ``operation`` until ``budget`` seconds are spent (within the sample bounds)."""
+
+    timings: List[float] = []
+    spent = 0.0
+    while len(timings) < max_samples and (len(timings) < min_samples or spent < budget):
+        began = time.perf_counter()
+        operation()
+        elapsed = time.perf_counter() - began
+        timings.append(elapsed)
+        spent += elapsed
+    return timings
+
+
+def traced_peak(operation: Callable[[], object]) -> float:
+    """Return the peak traced allocation of one more call, in KiB."""
+
+    tracemalloc.start()
+    try:
+        operation()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def run_child(code: str, arguments: List[str]) -> float:
+    """Run ``code`` in a fresh interpreter and return its peak RSS in KiB."""
+
+    environment = dict(os.environ, PYTHONPATH=str(SOURCE))
+    completed = subprocess.run(
+        [sys.executable, "-c", MAX_RSS.format(body=code), *arguments],
+        env=environment,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    marker = completed.stderr.rsplit("maxrss=", 1)[1]
+    return float(marker.split()[0])
+
+
+# ----------------------------------------------------------------------
+# Cases
+# ----------------------------------------------------------------------
+def in_process_cases(storage_factory: Callable[[], object], calendar: list, seed: int) -> Iterator[tuple]:
+    """Yield ``(case, operation)`` pairs; mutating cases come last."""
+
+    rng = random.Random(seed)
+    first, last = calendar[0].start_time, calendar[-1].start_time
+    days = max(1, (last - first).days)
+    scheduler = Scheduler(storage_factory(), cache=True)
+    scheduler.list_appointments()
+    names = sorted({appointment.client.name for appointment in calendar})
+
+    def window() -> object:
+        start = first + timedelta(days=rng.randrange(days))
+        return scheduler.find_between(start, start + timedelta(days=1))
+
+    def search() -> object:
+        words = rng.choice(names).split()
+        return scheduler.find_for_client(words[rng.randrange(len(words))].lower())
+
+    free = [last + timedelta(days=30)]
+
+    def create() -> object:
+        free[0] += timedelta(minutes=30)
+        return scheduler.create_appointment(
+            client=Client(name="Benchmark"),
+            service="Consulta",
+            start_time=free[0],
+            duration_minutes=30,
+            resource="benchmark",
+        )
+
+    yield "storage.load", lambda: storage_factory().load()
+    yield "storage.save", lambda: storage_factory().save(calendar)
+    yield "scheduler.find_between", window
+    yield "scheduler.find_for_client", search
+    yield "scheduler.create_appointment", create
+
+
+def run_backend(backend: str, size: int, options: argparse.Namespace) -> List[Result]:
+    calendar = generate_calendar(size, seed=options.seed)
+    results = []
+    with tempfile.TemporaryDirectory() as name:
+        directory = Path(name)
+        opened: List[object] = []
+
+        def factory() -> object:
+            storage = BACKENDS[backend](directory)
+            opened.append(storage)
+            return storage
+
+        factory().save(calendar)
+        for case, operation in in_process_cases(factory, calendar, options.seed):
+            if options.cases and case not in options.cases:
+                continue
+            timings = measure(operation, options.budget, options.min_samples, options.max_samples)
+            peak = traced_peak(operation) if options.memory else 0.0
+            results.append(summarize(case, backend, size, timings, peak))
+            report(results[-1])
+            for storage in opened:
+                getattr(storage, "close", lambda: None)()
+            opened.clear()
+
+        if not options.cases or "cli.list" in options.cases:
+            database = str(directory / DATABASES[backend])
+            arguments = ["--backend", backend, "--database", database, "list", "--limit", "20"]
+            body = "from gestor_citas_avanzado.cli import main; main(sys.argv[1:])"
+            peaks: List[float] = []
+            timings = measure(
+                lambda: peaks.append(run_child(body, arguments)), options.budget, options.min_samples, 20
+            )
+            results.append(summarize("cli.list", backend, size, timings, max(peaks)))
+            report(results[-1])
+    return results
+
+
+def run_startup(options: argparse.Namespace) -> Result:
+    peaks: List[float] = []
+    timings = measure(
+        lambda: peaks.append(run_child("import gestor_citas_avanzado.cli", [])), options.budget, options.min_samples, 30
+    )
+    result = summarize("cli.startup", "-", 0, timings, max(peaks))
+    report(result)
+    return result
+
+
+# ----------------------------------------------------------------------
+# Reporting and comparison
+# ----------------------------------------------------------------------
+HEADER = f"{'case':30s} {'backend':11s} {'size':>8s} {'n':>4s} {'ops/s':>10s} " + " ".join(
+    f"{label:>9s}" for label in ("p50 ms", "p95 ms", "p99 ms", "max ms", "peak KiB")
+)
+
+
+def report(result: Result) -> None:
+    print(
+        f"{result.case:30s} {result.backend:11s} {result.size:8d} {result.samples:4d} {result.throughput:10.1f} "
+        f"{result.p50_ms:9.3f} {result.p95_ms:9.3f} {result.p99_ms:9.3f} {result.max_ms:9.3f} {result.peak_kib:9.0f}",
+        flush=True,
+    )
+
+
+def load_results(path: Path) -> Dict[str, Result]:
+    document = json.loads(path.read_text(encoding="utf-8"))
+    return {result.key: result for result in (Result(**row) for row in document["results"])}
+
+
+def compare(baseline: Dict[str, Result], current: Dict[str, Result], threshold: float) -> int:
+    """Print p50 and memory changes per case and return how many regressed."""
+
+    regressions = 0
+    print(f"\n{'case':52s} {'p50 before':>11s} {'p50 after':>11s} {'change':>8s} {'memory':>8s}")
+    for key in sorted(set(baseline) & set(current)):
+        before, after = baseline[key], current[key]
+        latency = after.p50_ms / before.p50_ms - 1 if before.p50_ms else 0.0
+        memory = after.peak_kib / before.peak_kib - 1 if before.peak_kib else 0.0
+        regressed = latency > threshold or memory > threshold
+        regressions += regressed
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{key:52s} {before.p50_ms:11.3f} {after.p50_ms:11.3f} {latency:+8.1%} {memory:+8.1%}{flag}")
+    for key in sorted(set(baseline) ^ set(current)):
+        print(f"{key:52s} only in {'baseline' if key in baseline else 'current run'}")
+    print(f"\n{regressions} regression(s) above {threshold:.0%}")
+    return regressions
+
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma separated calendar sizes")
+    parser.add_argument("--backends", default="json,sqlite", help=f"Comma separated, from {', '.join(BACKENDS)}")
+    parser.add_argument("--cases", help="Only run these comma separated cases")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic calendars")
+    parser.add_argument("--budget", type=float, default=2.0, help="Seconds spent sampling each case")
+    parser.add_argument("--min-samples", type=int, default=5)
+    parser.add_argument("--max-samples", type=int, default=1000)
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="Skip the traced-memory pass")
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    parser.add_argument("--compare", type=Path, help="Saved results to compare against")
+    parser.add_argument("--current", type=Path, help="Compare this saved run instead of benchmarking")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative growth counted as a regression")
+    options = parser.parse_args(argv)
+    options.cases = set(options.cases.split(",")) if options.cases else set()
+    return options
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    options = parse_arguments(argv)
+    if options.current is not None:
+        if options.compare is None:
+            raise SystemExit("--current needs --compare")
+        return 1 if compare(load_results(options.compare), load_results(options.current), options.threshold) else 0
+
+    print(f"python {platform.python_version()} on {platform.platform()}, calendars from {FIRST_DAY:%Y-%m-%d}")
+    print(HEADER)
+    results: List[Result] = []
+    if not options.cases or "cli.startup" in options.cases:
+        results.append(run_startup(options))
+    for size in (int(value) for value in options.sizes.split(",")):
+        for backend in options.backends.split(","):
+            results.extend(run_backend(backend, size, options))
+
+    if options.output is not None:
+        document = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": options.seed,
+            "results": [asdict(result) for result in results],
+        }
+        options.output.write_text(json.dumps(document, indent=2), encoding="utf-8")
+    if options.compare is not None:
+        current = {result.key: result for result in results}
+        return 1 if compare(load_results(options.compare), current, options.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""Synthetic calendars shaped like a busy practice, for the benchmarks.
+
+:func:`generate_calendar` fills several rooms day after day with bookings
+of realistic lengths on a 15-minute grid, leaving occasional gaps, closing
+on Sundays and at 14:00 on Saturdays.  A few regular clients book most of
+the sessions (bookings follow a Zipf-like distribution over clients), names
+carry accents and phone numbers come in mixed formats, so client searches
+exercise normalisation.  The output only depends on ``seed``.
+"""
+
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import List, Tuple
+
+from gestor_citas_avanzado.models import Appointment, Client
+
+FIRST_NAMES = [
+    "Lucía", "María", "Martín", "Hugo", "Sofía", "Álvaro", "Paula", "Íñigo", "Carmen", "José",
+    "Begoña", "Raúl", "Nuria", "Óscar", "Elena", "Andrés", "Ainhoa", "Jesús", "Noelia", "Rubén",
+]
+SURNAMES = [
+    "García", "Fernández", "González", "Rodríguez", "López", "Martínez", "Sánchez", "Pérez", "Gómez",
+    "Martín", "Jiménez", "Ruiz", "Hernández", "Díaz", "Moreno", "Muñoz", "Álvarez", "Romero", "Alonso",
+    "Gutiérrez",
+]
+SERVICES: List[Tuple[str, int, int]] = [
+    # (service, minutes, relative frequency)
+    ("Revisión", 15, 10),
+    ("Consulta", 30, 40),
+    ("Primera visita", 45, 15),
+    ("Terapia", 50, 20),
+    ("Tratamiento", 60, 10),
+    ("Sesión doble", 90, 5),
+]
+PHONE_FORMATS = ["6{0:02d} {1:03d} {2:03d}", "+34 6{0:02d}{1:03d}{2:03d}", "6{0:02d}-{1:03d}-{2:03d}"]
+FIRST_DAY = datetime(2023, 1, 2)
+
+
+def make_clients(count: int, rng: random.Random) -> List[Client]:
+    """Return ``count`` distinct clients with Spanish names and mixed phone formats."""
+
+    clients = []
+    for number in range(count):
+        first, surname, second = rng.choice(FIRST_NAMES), rng.choice(SURNAMES), rng.choice(SURNAMES)
+        phone = rng.choice(PHONE_FORMATS).format(rng.randrange(100), rng.randrange(1000), number % 1000)
+        clients.append(
+            Client(
+                name=f"{first} {surname} {second}",
+                email=f"cliente{number}@example.com" if rng.random() < 0.7 else None,
+                phone=phone,
+            )
+        )
+    return clients
+
+
+def generate_calendar(
+    size: int,
+    *,
+    seed: int = 0,
+    resources: int = 4,
+    clients: int = 0,
+    cancellation_rate: float = 0.08,
+    gap_rate: float = 0.15,
+    first_day: datetime = FIRST_DAY,
+) -> List[Appointment]:
+    """Return ``size`` non-overlapping appointments ordered by day.
+
+    ``clients`` defaults to one client per 25 appointments.  Each room is
+    open 09:00-19:00 on weekdays and 09:00-14:00 on Saturdays.  The first
+    80% of the calendar is treated as past (completed unless cancelled).
+    """
+
+    rng = random.Random(seed)
+    people = make_clients(clients or max(10, size // 25), rng)
+    popularity = list(accumulate(1 / (rank + 1) ** 0.8 for rank in range(len(people))))
+    services = [(name, minutes) for name, minutes, _ in SERVICES]
+    frequency = list(accumulate(weight for _, _, weight in SERVICES))
+    rooms = [f"consulta {number + 1}" for number in range(resources)]
+    past = int(size * 0.8)
+    quarter = timedelta(minutes=15)
+
+    appointments: List[Appointment] = []
+    day = first_day
+    while len(appointments) < size:
+        weekday = day.weekday()
+        if weekday != 6:
+            closing = day.replace(hour=14 if weekday == 5 else 19)
+            for room in rooms:
+                cursor = day.replace(hour=9)
+                while len(appointments) < size:
+                    if rng.random() < gap_rate:
+                        cursor += quarter * rng.randint(1, 4)
+                    service, minutes = rng.choices(services, cum_weights=frequency)[0]
+                    if cursor + timedelta(minutes=minutes) > closing:
+                        break
+                    if rng.random() < cancellation_rate:
+                        status = "cancelled"
+                    else:
+                        status = "completed" if len(appointments) < past else "scheduled"
+                    appointments.append(
+                        Appointment(
+                            client=rng.choices(people, cum_weights=popularity)[0],
+                            service=service,
+                            start_time=cursor,
+                            duration_minutes=minutes,
+                            status=status,
+                            resource=room,
+                        )
+                    )
+                    cursor += quarter * -(-minutes // 15)
+        day += timedelta(days=1)
+    return appointments
+
+
+__all__ = ["generate_calendar", "make_clients"]
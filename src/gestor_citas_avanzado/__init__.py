@@ -1,6 +1,29 @@
 """Appointment scheduling toolkit."""
 
-from .models import Appointment, Client
-from .service import Scheduler
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .models import Appointment, Client
+    from .service import Scheduler
+
+# Resolved on first access so importing a submodule (e.g. the CLI) does not load the service layer.
+_EXPORTS = {"Appointment": ".models", "Client": ".models", "Scheduler": ".service"}
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted([*globals(), *_EXPORTS])
+
 
 __all__ = ["Appointment", "Client", "Scheduler"]
@@ -0,0 +1,325 @@
+"""Asyncio front end for the appointment scheduler."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from .audit import AuditReport
+from .availability import DEFAULT_WORKING_HOURS
+from .changes import ChangeEvent
+from .models import Appointment, Client
+from .planner import BookingRequest, Constraints
+from .recurrence import Recurrence, Series
+from .service import BulkResult, ScheduleResult, Scheduler
+from .storage import AppointmentStorage
+
+_Job = Tuple[Callable[[Scheduler], Any], "asyncio.Future[Any]"]
+
+
+class AsyncScheduler:
+    """Expose :class:`Scheduler` operations as coroutines.
+
+    Storage I/O never runs on the event loop.  Mutations are queued and
+    applied by a single writer task, which drains whatever has accumulated
+    and applies it inside one :meth:`Scheduler.batch`, so a burst of writes
+    is validated in order and persisted with a single save.  Queries run on
+    a separate pool, each thread against its own cached :class:`Scheduler`
+    (schedulers are not thread-safe), so they do not wait for pending writes
+    and observe every committed batch.
+
+    ``storage_factory`` is called once for the writer and once per reader
+    thread, e.g. ``AsyncScheduler(lambda: AppointmentStorage(path))``.
+    """
+
+    def __init__(
+        self,
+        storage_factory: Callable[[], AppointmentStorage],
+        *,
+        readers: int = 4,
+        coalesce_delay: float = 0.0,
+    ) -> None:
+        self._storage_factory = storage_factory
+        self._writer = Scheduler(storage_factory(), cache=True)
+        self._readers = threading.local()
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scheduler-writer")
+        self._read_executor = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="scheduler-reader")
+        self._coalesce_delay = coalesce_delay
+        self._queue: Optional["asyncio.Queue[Optional[_Job]]"] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    async def __aenter__(self) -> "AsyncScheduler":
+        self._start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Flush queued writes and release the worker threads."""
+
+        if self._task is not None and self._queue is not None:
+            await self._queue.put(None)
+            await self._task
+            self._task = None
+            self._queue = None
+        self._write_executor.shutdown(wait=True)
+        self._read_executor.shutdown(wait=True)
+
+    def subscribe(self, callback: Callable[[ChangeEvent], None]) -> Callable[[], None]:
+        """Register ``callback`` for every committed change; it is called on the writer thread.
+
+        Use :meth:`asyncio.loop.call_soon_threadsafe` inside it to hand
+        events over to the event loop.
+        """
+
+        return self._writer.subscribe(callback)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    async def list_appointments(self, *, resource: Optional[str] = None) -> List[Appointment]:
+        return await self._read(partial(Scheduler.list_appointments, resource=resource))
+
+    async def resources(self) -> List[str]:
+        return await self._read(Scheduler.resources)
+
+    async def get_appointment(self, identifier: str) -> Appointment:
+        return await self._read(Scheduler.get_appointment, identifier)
+
+    async def upcoming(
+        self, *, after: Optional[datetime] = None, resource: Optional[str] = None
+    ) -> List[Appointment]:
+        return await self._read(partial(Scheduler.upcoming, after=after, resource=resource))
+
+    async def find_for_client(self, query: str) -> List[Appointment]:
+        return await self._read(Scheduler.find_for_client, query)
+
+    async def search_clients(self, query: str, limit: Optional[int] = None) -> List[Appointment]:
+        return await self._read(Scheduler.search_clients, query, limit)
+
+    async def list_clients(self) -> List[Client]:
+        return await self._read(Scheduler.list_clients)
+
+    async def get_client(self, client_id: str) -> Client:
+        return await self._read(Scheduler.get_client, client_id)
+
+    async def appointments_for_client(self, client_id: str) -> List[Appointment]:
+        return await self._read(Scheduler.appointments_for_client, client_id)
+
+    async def list_series(self) -> List[Series]:
+        return await self._read(Scheduler.list_series)
+
+    async def get_series(self, series_id: str) -> Series:
+        return await self._read(Scheduler.get_series, series_id)
+
+    async def changes_since(self, sequence: int = 0, *, limit: Optional[int] = None) -> List[ChangeEvent]:
+        return await self._read(partial(Scheduler.changes_since, limit=limit), sequence)
+
+    async def audit(self, *, workers: Optional[int] = None, shard_by: str = "day") -> AuditReport:
+        return await self._read(partial(Scheduler.audit, workers=workers, shard_by=shard_by))
+
+    async def find_between(
+        self, start: datetime, end: datetime, *, resource: Optional[str] = None
+    ) -> List[Appointment]:
+        return await self._read(partial(Scheduler.find_between, resource=resource), start, end)
+
+    async def available_slots(
+        self,
+        day_or_range: Union[date, Tuple[datetime, datetime]],
+        duration_minutes: int,
+        granularity_minutes: int = 15,
+        working_hours: Sequence[Tuple[time, time]] = DEFAULT_WORKING_HOURS,
+        *,
+        resource: Optional[str] = None,
+    ) -> List[datetime]:
+        return await self._read(
+            partial(Scheduler.available_slots, resource=resource),
+            day_or_range,
+            duration_minutes,
+            granularity_minutes,
+            working_hours,
+        )
+
+    # ------------------------------------------------------------------
+    # Mutations
+    # ------------------------------------------------------------------
+    async def create_appointment(
+        self,
+        *,
+        client: Client,
+        service: str,
+        start_time: datetime,
+        duration_minutes: int,
+        notes: Optional[str] = None,
+        resource: Optional[str] = None,
+    ) -> Appointment:
+        return await self._write(
+            partial(
+                Scheduler.create_appointment,
+                client=client,
+                service=service,
+                start_time=start_time,
+                duration_minutes=duration_minutes,
+                notes=notes,
+                resource=resource,
+            )
+        )
+
+    async def create_series(
+        self,
+        *,
+        client: Client,
+        service: str,
+        start_time: datetime,
+        duration_minutes: int,
+        recurrence: Recurrence,
+        notes: Optional[str] = None,
+        resource: Optional[str] = None,
+    ) -> Series:
+        return await self._write(
+            partial(
+                Scheduler.create_series,
+                client=client,
+                service=service,
+                start_time=start_time,
+                duration_minutes=duration_minutes,
+                recurrence=recurrence,
+                notes=notes,
+                resource=resource,
+            )
+        )
+
+    async def cancel_series(self, series_id: str) -> Series:
+        return await self._write(partial(Scheduler.cancel_series, series_id=series_id))
+
+    async def update_appointment(self, identifier: str, **changes: Any) -> Appointment:
+        return await self._write(partial(Scheduler.update_appointment, identifier=identifier, **changes))
+
+    async def cancel_appointment(self, identifier: str) -> Appointment:
+        return await self._write(partial(Scheduler.cancel_appointment, identifier=identifier))
+
+    async def complete_appointment(self, identifier: str) -> Appointment:
+        return await self._write(partial(Scheduler.complete_appointment, identifier=identifier))
+
+    async def update_client(self, client_id: str, **details: Optional[str]) -> Client:
+        return await self._write(partial(Scheduler.update_client, client_id=client_id, **details))
+
+    async def bulk_create(self, appointments: Sequence[Appointment]) -> BulkResult:
+        return await self._write(partial(Scheduler.bulk_create, appointments=list(appointments)))
+
+    async def auto_schedule(
+        self,
+        requests: Sequence[BookingRequest],
+        constraints: Optional[Constraints] = None,
+        *,
+        dry_run: bool = False,
+    ) -> ScheduleResult:
+        return await self._write(
+            partial(Scheduler.auto_schedule, requests=list(requests), constraints=constraints, dry_run=dry_run)
+        )
+
+    async def trim_changes(self, sequence: int) -> int:
+        return await self._write(partial(Scheduler.trim_changes, sequence=sequence))
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    async def _read(self, method: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._read_executor, lambda: method(self._reader(), *args))
+
+    def _reader(self) -> Scheduler:
+        """Return the calling reader thread's scheduler, creating it on first use."""
+
+        scheduler = getattr(self._readers, "scheduler", None)
+        if scheduler is None:
+            scheduler = self._readers.scheduler = Scheduler(self._storage_factory(), cache=True)
+        return scheduler
+
+    async def _write(self, operation: Callable[[Scheduler], Any]) -> Any:
+        self._start()
+        assert self._queue is not None
+        future: "asyncio.Future[Any]" = asyncio.get_running_loop().create_future()
+        await self._queue.put((operation, future))
+        return await future
+
+    def _start(self) -> None:
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run_writer())
+
+    async def _run_writer(self) -> None:
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            job = await self._queue.get()
+            if job is None:
+                break
+            if self._coalesce_delay:
+                await asyncio.sleep(self._coalesce_delay)
+            jobs = [job]
+            while not self._queue.empty():
+                queued = self._queue.get_nowait()
+                if queued is None:
+                    stopping = True
+                    break
+                jobs.append(queued)
+            try:
+                outcomes = await loop.run_in_executor(self._write_executor, self._apply, jobs)
+            except BaseException as exc:  # the shared save failed
+                for _, future in jobs:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for (_, future), (ok, value) in zip(jobs, outcomes):
+                if future.done():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    def _apply(self, jobs: List[_Job]) -> List[Tuple[bool, Any]]:
+        """Run ``jobs`` in one batch; an error raised by a job only fails that job.
+
+        Domain errors (``KeyError``, ``ValueError`` and their subclasses)
+        leave the batch going.  Any other error may have left the batch half
+        applied, so the batch is discarded, the job gets the error and the
+        remaining jobs are applied again in a new batch.  Only an error
+        saving the batch fails every job in it.
+        """
+
+        outcomes: Dict[int, Tuple[bool, Any]] = {}
+        pending = list(range(len(jobs)))
+        while pending:
+            results: List[Tuple[bool, Any]] = []
+            failed: Optional[Tuple[int, Exception]] = None
+            try:
+                with self._writer.batch():
+                    for position in pending:
+                        try:
+                            results.append((True, jobs[position][0](self._writer)))
+                        except (KeyError, ValueError) as exc:
+                            results.append((False, exc))
+                        except Exception as exc:
+                            failed = (position, exc)
+                            raise
+            except Exception:
+                if failed is None:
+                    raise
+                position, error = failed
+                outcomes[position] = (False, error)
+                pending.remove(position)
+                continue
+            outcomes.update(zip(pending, results))
+            break
+        return [outcomes[position] for position in range(len(jobs))]
+
+
+__all__ = ["AsyncScheduler"]
@@ -0,0 +1,292 @@
+"""Check a whole calendar for overlapping bookings and malformed records.
+
+The scheduler validates one candidate at a time as bookings are made; an
+audit re-checks everything at once, e.g. after restoring a backup or merging
+calendars kept at several locations.  Records are validated and reduced to
+exact integer ``(start, end)`` spans in epoch microseconds in chunks, the
+spans are grouped into shards per resource (and, by default, per day), and
+each shard is swept in start order to report every overlapping pair.  Both phases run on a process
+pool for large calendars.
+
+Appointments running past midnight are also added to the shards of the
+following days they cover, flagged as carried over, so each overlapping pair
+is reported exactly once: in the shard of the day the later one starts.
+"""
+
+from __future__ import annotations
+
+import gc
+import heapq
+import multiprocessing
+import os
+import threading
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from .models import Appointment, epoch_microseconds
+from .serialization import decode_timestamp
+
+SHARD_MODES = ("day", "resource")
+# Below this many records the pool costs more to start than it saves.
+PARALLEL_THRESHOLD = 50_000
+_MINUTE = 60_000_000
+_DAY = 1440 * _MINUTE
+
+Conflict = Tuple[str, str, Optional[str]]
+
+
+@dataclass
+class AuditReport:
+    """Outcome of :func:`audit`.
+
+    ``conflicts`` holds ``(first, second, resource)`` for every pair of
+    active appointments overlapping on the same resource, the earlier
+    starting one first.  ``invalid`` holds ``(position, identifier, reason)``
+    for records that could not be checked, by position in the input.
+    """
+
+    checked: int = 0
+    conflicts: List[Conflict] = field(default_factory=list)
+    invalid: List[Tuple[int, str, str]] = field(default_factory=list)
+    duplicates: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not (self.conflicts or self.invalid or self.duplicates)
+
+
+def record_problem(record: Any) -> Tuple[Optional[str], Optional[Tuple[Optional[str], int, int, str]]]:
+    """Validate one stored row or :class:`Appointment`.
+
+    Returns ``(reason, None)`` for a malformed record, otherwise
+    ``(None, span)`` where ``span`` is ``(resource, start, end, status)``
+    in epoch microseconds, so bookings sharing a minute only overlap if
+    their exact times do.
+    """
+
+    if isinstance(record, Appointment):
+        if record.duration_minutes <= 0:
+            return "duration_minutes must be positive", None
+        begin = epoch_microseconds(record.start_time)
+        return None, (record.resource, begin, begin + record.duration_minutes * _MINUTE, record.status)
+    if type(record) is not dict:
+        return "not an object", None
+    get = record.get
+    if not _text(get("identifier")):
+        return "missing identifier", None
+    client = get("client")
+    if type(client) is str:
+        return f"unknown client {client!r}", None
+    if type(client) is not dict or not _text(client.get("name")):
+        return "missing client name", None
+    if not _text(get("service")):
+        return "missing service", None
+    duration = get("duration_minutes")
+    if type(duration) is not int or duration <= 0:
+        return "duration_minutes must be a positive integer", None
+    status = get("status", "scheduled")
+    if not _text(status):
+        return "invalid status", None
+    notes, resource = get("notes"), get("resource")
+    if (notes is not None and type(notes) is not str) or (resource is not None and type(resource) is not str):
+        return "notes and resource must be text", None
+    try:
+        start = decode_timestamp(record["start_time"])
+    except (KeyError, TypeError, ValueError, OverflowError):
+        return "invalid start_time", None
+    begin = epoch_microseconds(start)
+    return None, (resource, begin, begin + duration * _MINUTE, status)
+
+
+def _text(value: Any) -> bool:
+    return type(value) is str and not value.isspace() and value != ""
+
+
+def _identifier(record: Any) -> str:
+    if isinstance(record, Appointment):
+        return record.identifier
+    if type(record) is dict and type(record.get("identifier")) is str:
+        return record["identifier"]
+    return ""
+
+
+_Checked = Tuple[List[Tuple[int, str]], Dict[Hashable, array]]
+
+
+def check_chunk(records: Sequence[Any], offset: int, shard_by: str) -> _Checked:
+    """Validate ``records`` and group the active ones into shards.
+
+    Returns ``(position, reason)`` for each invalid record and, per shard
+    key, a flat ``array`` of ``start, end, position, starts here`` values.
+    Positions count from ``offset``; integers keep the result cheap to send
+    back from a worker process.
+    """
+
+    invalid: List[Tuple[int, str]] = []
+    shards: Dict[Hashable, array] = {}
+    for position, record in enumerate(records, start=offset):
+        reason, span = record_problem(record)
+        if span is None:
+            invalid.append((position, reason or "invalid record"))
+            continue
+        resource, start, end, status = span
+        if status == "cancelled":
+            continue
+        if shard_by == "resource":
+            key: Hashable = resource
+        else:
+            key = (resource, start // _DAY)
+            for day in range(start // _DAY + 1, (end - 1) // _DAY + 1):
+                _shard(shards, (resource, day)).extend((start, end, position, 0))
+        _shard(shards, key).extend((start, end, position, 1))
+    return invalid, shards
+
+
+def _shard(shards: Dict[Hashable, array], key: Hashable) -> array:
+    spans = shards.get(key)
+    if spans is None:
+        spans = shards[key] = array("q")
+    return spans
+
+
+def sweep(spans: Iterable[Tuple[int, int, Any, bool]]) -> List[Tuple[Any, Any]]:
+    """Return every overlapping pair of ``(start, end, key, starts here)`` spans.
+
+    Pairs where neither span starts in the shard were reported with an
+    earlier shard and are skipped.  Spans are visited by start while a heap
+    keeps the ones still running, so the cost is ``O(n log n)`` plus the
+    number of pairs reported.
+    """
+
+    running: List[Tuple[int, Any, bool]] = []
+    pairs: List[Tuple[Any, Any]] = []
+    for start, end, key, native in sorted(spans):
+        while running and running[0][0] <= start:
+            heapq.heappop(running)
+        for _, other, other_native in running:
+            if native or other_native:
+                pairs.append((other, key))
+        heapq.heappush(running, (end, key, native))
+    return pairs
+
+
+def sweep_shards(shards: List[Tuple[Hashable, array]]) -> List[Tuple[int, int, Hashable]]:
+    """Sweep several shards built by :func:`check_chunk`; return ``(position, position, key)`` triples."""
+
+    found: List[Tuple[int, int, Hashable]] = []
+    for key, spans in shards:
+        quads = zip(spans[0::4], spans[1::4], spans[2::4], spans[3::4])
+        found.extend((first, second, key) for first, second in sweep(quads))
+    return found
+
+
+def audit(
+    records: Sequence[Any],
+    *,
+    workers: Optional[int] = None,
+    shard_by: str = "day",
+) -> AuditReport:
+    """Validate ``records`` (stored rows or appointments) and report every conflict.
+
+    ``workers`` defaults to the number of CPUs; inputs smaller than
+    :data:`PARALLEL_THRESHOLD` or ``workers=1`` are checked in this process.
+    Worker processes are forked where the platform allows it so they read
+    ``records`` from the inherited memory instead of receiving a copy.
+    Forking a process that runs other threads (such as ``gestor-citas
+    serve``) can leave a child stuck on a lock held by one of them, so the
+    workers are spawned instead and receive their chunks.
+    """
+
+    global _SHARED
+
+    if shard_by not in SHARD_MODES:
+        raise ValueError(f"unknown shard mode {shard_by!r}")
+    workers = workers or os.cpu_count() or 1
+    report = AuditReport(checked=len(records))
+    identifiers = [_identifier(record) for record in records]
+    seen: Dict[str, int] = {}
+    for identifier in identifiers:
+        if identifier:
+            seen[identifier] = seen.get(identifier, 0) + 1
+    report.duplicates = sorted(identifier for identifier, times in seen.items() if times > 1)
+
+    if workers > 1 and len(records) >= PARALLEL_THRESHOLD:
+        fork = "fork" in multiprocessing.get_all_start_methods() and threading.active_count() == 1
+        context = multiprocessing.get_context("fork" if fork else "spawn")
+        _SHARED = records if fork else ()
+        # Keep the collector in the children off the inherited objects, or it would touch
+        # (and so copy) every page of them.
+        gc.freeze()
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                invalid, found = _run(records, shard_by, workers * 4, pool, shared=fork)
+        finally:
+            gc.unfreeze()
+            _SHARED = ()
+    else:
+        invalid, found = _run(records, shard_by, 1, None, shared=False)
+
+    report.invalid = sorted((position, identifiers[position], reason) for position, reason in invalid)
+    report.conflicts = sorted(
+        (identifiers[first], identifiers[second], key[0] if shard_by == "day" else key)  # type: ignore[index]
+        for first, second, key in found
+        # A duplicated row is reported as a duplicate, not as overlapping itself.
+        if identifiers[first] != identifiers[second]
+    )
+    return report
+
+
+# The records being audited, inherited by forked workers so they are never pickled.
+_SHARED: Sequence[Any] = ()
+
+
+def _check_shared(start: int, stop: int, shard_by: str) -> _Checked:
+    return check_chunk(_SHARED[start:stop], start, shard_by)
+
+
+def _run(
+    records: Sequence[Any], shard_by: str, tasks: int, pool: Optional[Executor], *, shared: bool
+) -> Tuple[List[Tuple[int, str]], List[Tuple[int, int, Hashable]]]:
+    # Several tasks per worker keep the pool busy when chunks or shards are uneven.
+    size = max(1, -(-len(records) // tasks))
+    starts = range(0, len(records), size)
+    if shared:
+        checked = _map(pool, _check_shared, [(start, start + size, shard_by) for start in starts])
+    else:
+        checked = _map(pool, check_chunk, [(records[start : start + size], start, shard_by) for start in starts])
+
+    invalid: List[Tuple[int, str]] = []
+    shards: Dict[Hashable, array] = {}
+    for chunk_invalid, grouped in checked:
+        invalid.extend(chunk_invalid)
+        for key, spans in grouped.items():
+            _shard(shards, key).extend(spans)
+
+    # Largest shards first, dealt round-robin, so the batches end up about the same size.
+    batches: List[List[Tuple[Hashable, array]]] = [[] for _ in range(tasks)]
+    for number, item in enumerate(sorted(shards.items(), key=lambda item: -len(item[1]))):
+        batches[number % tasks].append(item)
+    found: List[Tuple[int, int, Hashable]] = []
+    for pairs in _map(pool, sweep_shards, [(batch,) for batch in batches if batch]):
+        found.extend(pairs)
+    return invalid, found
+
+
+def _map(pool: Optional[Executor], function: Any, arguments: Iterable[Tuple[Any, ...]]) -> List[Any]:
+    if pool is None:
+        return [function(*item) for item in arguments]
+    return [future.result() for future in [pool.submit(function, *item) for item in arguments]]
+
+
+__all__ = [
+    "PARALLEL_THRESHOLD",
+    "SHARD_MODES",
+    "AuditReport",
+    "audit",
+    "check_chunk",
+    "record_problem",
+    "sweep",
+    "sweep_shards",
+]
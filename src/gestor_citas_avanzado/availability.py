@@ -0,0 +1,97 @@
+"""Free slot computation over sorted busy intervals."""
+
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+Interval = Tuple[datetime, datetime]
+
+DEFAULT_WORKING_HOURS: Tuple[Tuple[time, time], ...] = ((time(9, 0), time(17, 0)),)
+
+
+def parse_working_hours(value: str) -> Tuple[Tuple[time, time], ...]:
+    """Parse ``"09:00-13:00,16:00-20:00"`` into ``(start, end)`` pairs."""
+
+    windows = []
+    for chunk in value.split(","):
+        opening, _, closing = chunk.strip().partition("-")
+        start, end = time.fromisoformat(opening.strip()), time.fromisoformat(closing.strip())
+        if end <= start:
+            raise ValueError(f"working hours {chunk.strip()!r} end before they start")
+        windows.append((start, end))
+    return tuple(sorted(windows))
+
+
+def working_windows(
+    start: datetime,
+    end: datetime,
+    working_hours: Sequence[Tuple[time, time]] = DEFAULT_WORKING_HOURS,
+) -> Iterator[Interval]:
+    """Yield the working windows between ``start`` and ``end`` in order."""
+
+    hours = sorted(working_hours)
+    day = start.date()
+    while day <= end.date():
+        for opening, closing in hours:
+            window_start = max(datetime.combine(day, opening, start.tzinfo), start)
+            window_end = min(datetime.combine(day, closing, start.tzinfo), end)
+            if window_start < window_end:
+                yield window_start, window_end
+        day += timedelta(days=1)
+
+
+def free_slots(
+    busy: Iterable[Interval],
+    windows: Iterable[Interval],
+    duration: timedelta,
+    granularity: timedelta,
+) -> List[datetime]:
+    """Return slot starts inside ``windows`` that avoid every ``busy`` interval.
+
+    Both inputs must be sorted by start.  A single merge pass walks them
+    together; slots are aligned to ``granularity`` from each window's start.
+    """
+
+    if duration <= timedelta(0) or granularity <= timedelta(0):
+        raise ValueError("duration and granularity must be positive")
+    busy_iter = iter(busy)
+    pending = next(busy_iter, None)
+    blocked_until = None
+    slots: List[datetime] = []
+    for window_start, window_end in windows:
+        cursor = window_start if blocked_until is None else max(window_start, blocked_until)
+        while cursor < window_end:
+            # Consume every interval that has started by the cursor.
+            while pending is not None and pending[0] <= cursor:
+                if pending[1] > cursor:
+                    cursor = pending[1]
+                if blocked_until is None or pending[1] > blocked_until:
+                    blocked_until = pending[1]
+                pending = next(busy_iter, None)
+            if cursor >= window_end:
+                break
+            gap_end = window_end if pending is None else min(pending[0], window_end)
+            steps = -((window_start - cursor) // granularity)
+            slot = window_start + steps * granularity
+            while slot + duration <= gap_end:
+                slots.append(slot)
+                slot += granularity
+            cursor = gap_end
+    return slots
+
+
+def day_range(value: date) -> Interval:
+    """Return the ``[start, end)`` interval covering the calendar day ``value``."""
+
+    start = datetime.combine(value, time(0, 0))
+    return start, start + timedelta(days=1)
+
+
+__all__ = [
+    "DEFAULT_WORKING_HOURS",
+    "day_range",
+    "free_slots",
+    "parse_working_hours",
+    "working_windows",
+]
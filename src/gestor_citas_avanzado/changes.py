@@ -0,0 +1,268 @@
+"""Record scheduler mutations as a numbered feed of change events.
+
+Every appointment or series the :class:`~gestor_citas_avanzado.service.Scheduler`
+creates or modifies produces a :class:`ChangeEvent` carrying the full new
+record.  Events are numbered by a sequence that only grows, so consumers
+keep the last number they processed and ask for what came after it instead
+of re-reading and diffing the whole database.
+
+:class:`ChangeLog` persists the feed as JSON Lines next to the data.  It
+costs an extra synced write per mutation, so it is off until a backend is
+opened with ``change_log=True``, which creates the file; from then on the
+database records changes whichever process writes to it.  Lines are ordered by sequence, so
+:meth:`ChangeLog.since` bisects on byte offsets and reads only the events
+being asked for, and :meth:`ChangeLog.trim` drops the ones every consumer
+has processed.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Tuple
+
+from . import serialization
+from .serialization import decode_timestamp, encode_timestamp
+
+CHANGE_KINDS = ("created", "updated", "status_changed")
+_TAIL_CHUNK = 1 << 16
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """One mutation of an appointment or a recurring series.
+
+    ``entity`` is ``"appointment"`` or ``"series"`` and ``data`` the record
+    after the change, as written by its ``to_dict``.  ``previous_status``
+    is set when the change moved the record to another status.
+    """
+
+    sequence: int
+    kind: str
+    entity: str
+    identifier: str
+    data: Dict[str, Any]
+    recorded_at: datetime
+    previous_status: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a serialisable representation of the event."""
+
+        return {
+            "sequence": self.sequence,
+            "kind": self.kind,
+            "entity": self.entity,
+            "identifier": self.identifier,
+            "recorded_at": encode_timestamp(self.recorded_at),
+            "previous_status": self.previous_status,
+            "data": self.data,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ChangeEvent":
+        """Rehydrate an event from its dictionary representation."""
+
+        return cls(
+            sequence=int(data["sequence"]),
+            kind=data["kind"],
+            entity=data["entity"],
+            identifier=data["identifier"],
+            data=data["data"],
+            recorded_at=decode_timestamp(data["recorded_at"]),
+            previous_status=data.get("previous_status"),
+        )
+
+
+def change_kind(before: Any, after: Any) -> Optional[str]:
+    """Return the kind of change turning ``before`` into ``after``, or ``None`` if nothing changed."""
+
+    if before is None:
+        return "created"
+    if before == after:
+        return None
+    if before.status != after.status and replace(before, status=after.status) == after:
+        return "status_changed"
+    return "updated"
+
+
+# A pending event before the log numbers it: (kind, entity, record, previous status).
+Change = Tuple[str, str, Any, Optional[str]]
+
+
+def number_changes(changes: Iterable[Change], after: int) -> List[ChangeEvent]:
+    """Turn pending ``changes`` into events numbered from ``after + 1``, stamped with the current UTC time."""
+
+    recorded_at = datetime.now(timezone.utc)
+    return [
+        ChangeEvent(
+            sequence=after + offset,
+            kind=kind,
+            entity=entity,
+            identifier=record.identifier,
+            data=record.to_dict(),
+            recorded_at=recorded_at,
+            previous_status=previous_status,
+        )
+        for offset, (kind, entity, record, previous_status) in enumerate(changes, start=1)
+    ]
+
+
+class ChangeLog:
+    """Append-only JSON Lines file of :class:`ChangeEvent` records.
+
+    Storage backends expose one as their ``changes`` attribute while the
+    database records changes, i.e. while the file exists (see
+    :meth:`enabled`).  Appends and trims are expected to run under the
+    backend's write lock, which keeps the sequence gap-free across
+    processes.  A line torn by an interrupted append is ignored when reading
+    and cut off by the next append.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+
+    def enabled(self, create: bool = False) -> bool:
+        """Return whether the database records changes, turning recording on first when ``create`` is set."""
+
+        if create and not self.path.exists():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.touch()
+        return self.path.exists()
+
+    def append(self, changes: Iterable[Change]) -> List[ChangeEvent]:
+        """Number ``changes`` after the last stored event and write them with a single append."""
+
+        pending = list(changes)
+        if not pending:
+            return []
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a+b") as handle:
+            last, end = self._tail(handle)
+            if end != handle.seek(0, os.SEEK_END):
+                handle.truncate(end)
+            events = number_changes(pending, last)
+            handle.writelines(serialization.dumps(event.to_dict()) + b"\n" for event in events)
+            handle.flush()
+            os.fsync(handle.fileno())
+        return events
+
+    def last_sequence(self) -> int:
+        """Return the sequence of the newest event, ``0`` when there is none."""
+
+        try:
+            with self.path.open("rb") as handle:
+                return self._tail(handle)[0]
+        except FileNotFoundError:
+            return 0
+
+    def since(self, sequence: int = 0, limit: Optional[int] = None) -> List[ChangeEvent]:
+        """Return the events numbered after ``sequence`` in order, at most ``limit`` of them."""
+
+        events: List[ChangeEvent] = []
+        if limit is not None and limit <= 0:
+            return events
+        try:
+            handle = self.path.open("rb")
+        except FileNotFoundError:
+            return events
+        with handle:
+            size = handle.seek(0, os.SEEK_END)
+            handle.seek(self._offset_after(handle, size, sequence))
+            for line in handle:
+                record = _parse(line)
+                if record is None:
+                    break
+                events.append(ChangeEvent.from_dict(record))
+                if limit is not None and len(events) >= limit:
+                    break
+        return events
+
+    def trim(self, sequence: int) -> int:
+        """Drop the events numbered up to ``sequence``; return how many were dropped.
+
+        The newest event is always kept so numbering carries on from it.
+        """
+
+        from .storage import atomic_write
+
+        try:
+            handle = self.path.open("rb")
+        except FileNotFoundError:
+            return 0
+        with handle:
+            last, end = self._tail(handle)
+            if not last:
+                return 0
+            handle.seek(0)
+            data = handle.read(end)
+            newest = data.rfind(b"\n", 0, end - 1) + 1
+            keep = min(self._offset_after(handle, end, sequence), newest)
+        if not keep:
+            return 0
+        atomic_write(self.path, data[keep:])
+        return data.count(b"\n", 0, keep)
+
+    @staticmethod
+    def _offset_after(handle: BinaryIO, size: int, sequence: int) -> int:
+        """Return the offset of the first line numbered after ``sequence``.
+
+        Bisects over byte positions; each probe reads the first whole line
+        starting at or after the position.
+        """
+
+        def line_at(position: int) -> Tuple[int, Optional[Dict[str, Any]]]:
+            if position:
+                handle.seek(position - 1)
+                handle.readline()
+            else:
+                handle.seek(0)
+            start = handle.tell()
+            return start, _parse(handle.readline()) if start < size else None
+
+        low, high = 0, size
+        while low < high:
+            middle = (low + high) // 2
+            _, record = line_at(middle)
+            if record is None or record["sequence"] > sequence:
+                high = middle
+            else:
+                low = middle + 1
+        return line_at(low)[0]
+
+    @staticmethod
+    def _tail(handle: BinaryIO) -> Tuple[int, int]:
+        """Return the last stored sequence and the offset just past its line."""
+
+        size = handle.seek(0, os.SEEK_END)
+        chunk = _TAIL_CHUNK
+        while True:
+            start = max(0, size - chunk)
+            handle.seek(start)
+            pieces = handle.read(size - start).split(b"\n")
+            # The last piece is an unterminated (torn or empty) line; the first one may be cut at
+            # the chunk boundary, in which case a bigger chunk is read if nothing else parses.
+            position = size - len(pieces[-1])
+            for piece in reversed(pieces[1:-1] if start else pieces[:-1]):
+                record = _parse(piece + b"\n")
+                if record is not None:
+                    return record["sequence"], position
+                position -= len(piece) + 1
+            if not start:
+                return 0, 0
+            chunk *= 2
+
+
+def _parse(line: bytes) -> Optional[Dict[str, Any]]:
+    """Decode one log line; ``None`` for a torn or unreadable one."""
+
+    if not line.endswith(b"\n"):
+        return None
+    try:
+        return serialization.loads(line)
+    except ValueError:
+        return None
+
+
+__all__ = ["CHANGE_KINDS", "Change", "ChangeEvent", "ChangeLog", "change_kind", "number_changes"]
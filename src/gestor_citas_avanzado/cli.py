@@ -3,17 +3,37 @@
 from __future__ import annotations
 
 import argparse
-from datetime import datetime
+import os
+import sys
+from datetime import date, datetime, time, timedelta
 from pathlib import Path
-from typing import Iterable, Optional
-
-from .models import Client
-from .service import (
-    AppointmentNotFoundError,
-    Scheduler,
-    SchedulingConflictError,
-)
-from .storage import AppointmentStorage
+from itertools import islice
+from time import perf_counter
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from .availability import DEFAULT_WORKING_HOURS, parse_working_hours
+
+if TYPE_CHECKING:
+    from .changes import ChangeEvent
+    from .models import Appointment, Client
+    from .recurrence import Series
+    from .server import Handler
+    from .service import Scheduler
+
+# The modules behind each subcommand are imported when it runs, so ``--help``
+# or a single ``complete`` only pays for what it uses.  The option choices
+# below mirror constants of those modules (test_startup checks they agree).
+STORAGE_BACKENDS = {
+    "json": "AppointmentStorage",
+    "journal": "JournalStorage",
+    "partitioned": "PartitionedStorage",
+    "sqlite": "SQLiteStorage",
+}
+PARTITION_PERIODS = ("day", "month", "year")
+REPEAT_FREQUENCIES = ("daily", "weekly")
+TRANSFER_FORMATS = ("csv", "jsonl")
+AUDIT_SHARDS = ("day", "resource")
+METRIC_FORMATS = ("json", "prometheus")
 
 
 def parse_datetime(value: str) -> datetime:
@@ -25,20 +45,104 @@ def parse_datetime(value: str) -> datetime:
         raise argparse.ArgumentTypeError(str(exc)) from exc
 
 
-def format_appointments(appointments: Iterable) -> str:
+def parse_date(value: str) -> date:
+    """Parse ISO formatted dates while providing a helpful error message."""
+
+    try:
+        return date.fromisoformat(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from exc
+
+
+def parse_count(value: str) -> int:
+    """Parse a non-negative integer such as ``--limit`` or ``--offset``."""
+
+    try:
+        count = int(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"invalid integer {value!r}") from exc
+    if count < 0:
+        raise argparse.ArgumentTypeError(f"must not be negative: {count}")
+    return count
+
+
+def parse_hours(value: str):
+    """Parse working hours such as ``09:00-13:00,16:00-20:00``."""
+
+    try:
+        return parse_working_hours(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from exc
+
+
+def format_appointment(appointment: Appointment) -> str:
+    """Return the human readable, single-line rendering of an appointment."""
+
+    return "{id} | {start} ({duration}m) | {client} | {service}{resource} | {status}{notes}".format(
+        id=appointment.identifier,
+        start=appointment.start_time.strftime("%Y-%m-%d %H:%M"),
+        duration=appointment.duration_minutes,
+        client=appointment.client.name,
+        service=appointment.service,
+        resource=f" @ {appointment.resource}" if appointment.resource else "",
+        status=appointment.status,
+        notes=f" | {appointment.notes}" if appointment.notes else "",
+    )
+
+
+def format_appointments(appointments: Iterable[Appointment]) -> str:
     """Return a multi-line, human readable rendering of appointments."""
 
+    return "\n".join(format_appointment(appointment) for appointment in appointments)
+
+
+def encode_cursor(appointment: Appointment) -> str:
+    """Return the ``list --cursor`` value resuming right after ``appointment``."""
+
+    return f"{appointment.start_time.isoformat()}/{appointment.identifier}"
+
+
+def parse_cursor(value: str) -> Tuple[datetime, str]:
+    """Parse a cursor printed by ``list --limit`` into ``(start, identifier)``."""
+
+    start, separator, identifier = value.partition("/")
+    try:
+        if not separator or not identifier:
+            raise ValueError(f"invalid cursor {value!r}")
+        return datetime.fromisoformat(start), identifier
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from exc
+
+
+def format_clients(clients: Iterable[Client]) -> str:
+    """Return one line per client with its identifier and contact details."""
+
+    return "\n".join(
+        " | ".join([client.identifier, client.name, client.email or "-", client.phone or "-"]) for client in clients
+    )
+
+
+def format_series(series: Iterable[Series]) -> str:
+    """Return one line per recurring series with its rule and status."""
+
     parts = []
-    for appointment in appointments:
+    for item in series:
+        rule = item.recurrence
+        repeat = f"{rule.frequency} x{rule.interval}"
+        if rule.count is not None:
+            repeat += f" {rule.count} times"
+        if rule.until is not None:
+            repeat += f" until {rule.until:%Y-%m-%d}"
         parts.append(
-            "{id} | {start} ({duration}m) | {client} | {service} | {status}{notes}".format(
-                id=appointment.identifier,
-                start=appointment.start_time.strftime("%Y-%m-%d %H:%M"),
-                duration=appointment.duration_minutes,
-                client=appointment.client.name,
-                service=appointment.service,
-                status=appointment.status,
-                notes=f" | {appointment.notes}" if appointment.notes else "",
+            "{id} | {start} ({duration}m) | {client} | {service}{resource} | {repeat} | {status}".format(
+                id=item.identifier,
+                start=item.start_time.strftime("%Y-%m-%d %H:%M"),
+                duration=item.duration_minutes,
+                client=item.client.name,
+                service=item.service,
+                resource=f" @ {item.resource}" if item.resource else "",
+                repeat=repeat,
+                status=item.status,
             )
         )
     return "\n".join(parts)
@@ -52,13 +156,85 @@ def build_parser() -> argparse.ArgumentParser:
         default=Path("appointments.json"),
         help="Path to the JSON file where appointments are stored.",
     )
+    parser.add_argument(
+        "--backend",
+        choices=sorted(STORAGE_BACKENDS),
+        default="json",
+        help="Storage backend used for the database file.",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Write JSON databases without indentation and with epoch timestamps.",
+    )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="Keep a memory-mapped columnar copy of JSON databases (<database>.columns) for fast listings.",
+    )
+    parser.add_argument(
+        "--change-log",
+        action="store_true",
+        help="Start recording every change next to the database for the changes command (one extra synced write "
+        "each); every later writer keeps recording.",
+    )
+    parser.add_argument(
+        "--period",
+        choices=PARTITION_PERIODS,
+        default="month",
+        help="Period covered by each file of a new partitioned database directory.",
+    )
+    parser.add_argument(
+        "--socket",
+        type=Path,
+        help="Socket of the serve daemon (defaults to the database path plus .sock).",
+    )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Run the command in this process even if a serve daemon is running.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print a breakdown of where the command spent its time to stderr.",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=Path,
+        help="Write the timings and counters of the command to this file.",
+    )
+    parser.add_argument(
+        "--metrics-format",
+        choices=METRIC_FORMATS,
+        default="json",
+        help="Format of --metrics-file: JSON stats or Prometheus text.",
+    )
 
     subparsers = parser.add_subparsers(dest="command", metavar="COMMAND", required=True)
 
     list_parser = subparsers.add_parser("list", help="List stored appointments")
-    list_parser.add_argument("--client", help="Filter by client information")
+    list_parser.add_argument("--client", help="Filter by client name, email or phone")
+    list_parser.add_argument(
+        "--fuzzy",
+        action="store_true",
+        help="Rank close client matches first instead of requiring an exact substring.",
+    )
+    list_parser.add_argument("--client-id", help="Only show appointments of the client with this identifier")
+    list_parser.add_argument("--resource", help="Only show appointments booked on this employee or room")
     list_parser.add_argument("--from", dest="start", type=parse_datetime, help="Start of the time window")
     list_parser.add_argument("--to", dest="end", type=parse_datetime, help="End of the time window")
+    list_parser.add_argument("--offset", type=parse_count, default=0, help="Skip this many matching appointments")
+    list_parser.add_argument("--limit", type=parse_count, help="Show at most this many appointments")
+    list_parser.add_argument(
+        "--cursor", type=parse_cursor, help="Resume after the appointment named by a previous page's cursor"
+    )
+    list_parser.add_argument(
+        "--format",
+        choices=("text",) + TRANSFER_FORMATS,
+        default="text",
+        help="Output format (machine readable: csv, jsonl)",
+    )
 
     add_parser = subparsers.add_parser("add", help="Create a new appointment")
     add_parser.add_argument("--name", required=True, help="Client name")
@@ -68,6 +244,11 @@ def build_parser() -> argparse.ArgumentParser:
     add_parser.add_argument("--start", required=True, type=parse_datetime, help="Start datetime in ISO format")
     add_parser.add_argument("--duration", required=True, type=int, help="Duration in minutes")
     add_parser.add_argument("--notes", help="Optional notes")
+    add_parser.add_argument("--resource", help="Employee or room being booked")
+    add_parser.add_argument("--repeat", choices=REPEAT_FREQUENCIES, help="Book a recurring series instead")
+    add_parser.add_argument("--interval", type=int, default=1, help="Repeat every N days or weeks")
+    add_parser.add_argument("--count", type=int, help="Number of occurrences in the series")
+    add_parser.add_argument("--until", type=parse_date, help="Last day an occurrence may fall on")
 
     update_parser = subparsers.add_parser("update", help="Update an existing appointment")
     update_parser.add_argument("identifier", help="Identifier of the appointment to update")
@@ -79,6 +260,7 @@ def build_parser() -> argparse.ArgumentParser:
     update_parser.add_argument("--duration", type=int, help="New duration in minutes")
     update_parser.add_argument("--status", help="New appointment status")
     update_parser.add_argument("--notes", help="New notes")
+    update_parser.add_argument("--resource", help="Move the appointment to another employee or room")
 
     cancel_parser = subparsers.add_parser("cancel", help="Cancel an appointment")
     cancel_parser.add_argument("identifier", help="Identifier to cancel")
@@ -86,22 +268,372 @@ def build_parser() -> argparse.ArgumentParser:
     complete_parser = subparsers.add_parser("complete", help="Mark an appointment as completed")
     complete_parser.add_argument("identifier", help="Identifier to complete")
 
+    slots_parser = subparsers.add_parser("slots", help="Show free slots for a service duration")
+    slots_parser.add_argument("--date", dest="day", required=True, type=parse_date, help="First day to search")
+    slots_parser.add_argument("--to", dest="last_day", type=parse_date, help="Last day to search (inclusive)")
+    slots_parser.add_argument("--duration", required=True, type=int, help="Duration in minutes")
+    slots_parser.add_argument("--resource", help="Employee or room whose calendar is searched")
+    slots_parser.add_argument("--granularity", type=int, default=15, help="Minutes between candidate starts")
+    slots_parser.add_argument(
+        "--hours",
+        type=parse_hours,
+        default=DEFAULT_WORKING_HOURS,
+        help="Working hours, e.g. 09:00-13:00,16:00-20:00",
+    )
+
+    subparsers.add_parser("series", help="List recurring series")
+
+    cancel_series_parser = subparsers.add_parser("cancel-series", help="Cancel the remaining occurrences of a series")
+    cancel_series_parser.add_argument("identifier", help="Identifier of the series")
+
+    subparsers.add_parser("clients", help="List clients and their identifiers")
+
+    subparsers.add_parser("resources", help="List the employees and rooms with appointments")
+
+    subparsers.add_parser("migrate", help="Rewrite the database in the current storage format")
+
+    archive_parser = subparsers.add_parser("archive", help="Move old partitions to the archive tier")
+    archive_parser.add_argument(
+        "--before", required=True, type=parse_date, help="Archive the periods that end before this date"
+    )
+
+    import_parser = subparsers.add_parser("import", help="Bulk load appointments from CSV or JSON Lines")
+    import_parser.add_argument("source", help="File to read, or '-' for standard input")
+    import_parser.add_argument("--format", choices=TRANSFER_FORMATS, help="Input format (guessed from the extension)")
+
+    export_parser = subparsers.add_parser("export", help="Write every appointment as CSV or JSON Lines")
+    export_parser.add_argument("target", nargs="?", default="-", help="File to write, or '-' for standard output")
+    export_parser.add_argument("--format", choices=TRANSFER_FORMATS, help="Output format (guessed from the extension)")
+
+    changes_parser = subparsers.add_parser("changes", help="Show the changes recorded after a sequence number")
+    changes_parser.add_argument(
+        "--since", type=int, default=0, help="Sequence of the last change already processed (0 for all)"
+    )
+    changes_parser.add_argument("--limit", type=parse_count, help="Show at most this many changes")
+    changes_parser.add_argument(
+        "--trim",
+        type=int,
+        metavar="SEQUENCE",
+        help="Delete the changes up to this sequence once every consumer has processed them",
+    )
+    changes_parser.add_argument(
+        "--format", choices=("text", "jsonl"), default="text", help="Output format (jsonl carries the full records)"
+    )
+
+    audit_parser = subparsers.add_parser("audit", help="Check every appointment for overlaps and malformed records")
+    audit_parser.add_argument("--workers", type=int, help="Processes to use (default: one per CPU)")
+    audit_parser.add_argument(
+        "--shard", choices=AUDIT_SHARDS, default="day", help="Split the work per resource and day, or per resource"
+    )
+
+    subparsers.add_parser("serve", help="Keep the database loaded and answer commands over a Unix socket")
+
     return parser
 
 
-def run_from_args(args: argparse.Namespace) -> str:
-    storage = AppointmentStorage(args.database)
-    scheduler = Scheduler(storage)
+def format_change(event: ChangeEvent) -> str:
+    """Return the human readable, single-line rendering of a change event."""
 
-    if args.command == "list":
-        appointments = scheduler.list_appointments()
+    status = event.data.get("status")
+    kind = f"{event.kind} ({event.previous_status} -> {status})" if event.previous_status else event.kind
+    return f"{event.sequence} | {event.recorded_at:%Y-%m-%d %H:%M:%S} | {kind} | {event.entity} {event.identifier}"
+
+
+def select_appointments(scheduler: Scheduler, args: argparse.Namespace) -> Iterator[Appointment]:
+    """Yield the appointments matching the ``list`` filters without collecting them.
+
+    Unfiltered listings stream straight from :meth:`Scheduler.iter_appointments`;
+    every other filter is applied lazily on top.
+    """
+
+    start = args.start
+    if args.cursor is not None and (start is None or args.cursor[0] > start):
+        start = args.cursor[0]
+    if args.client_id:
+        selected: Iterable[Appointment] = scheduler.appointments_for_client(args.client_id)
         if args.client:
-            appointments = [a for a in appointments if args.client.lower() in format_client(a.client).lower()]
-        if args.start or args.end:
-            start = args.start or datetime.min
-            end = args.end or datetime.max
-            appointments = [a for a in appointments if start <= a.start_time < end]
-        return format_appointments(appointments)
+            matches = {appointment.identifier for appointment in scheduler.find_for_client(args.client)}
+            selected = (a for a in selected if a.identifier in matches)
+    elif args.client and args.fuzzy:
+        selected = scheduler.search_clients(args.client)
+    elif args.client:
+        selected = scheduler.find_for_client(args.client)
+    else:
+        return _after_cursor(scheduler.iter_appointments(start=start, end=args.end, resource=args.resource), args)
+    if args.resource:
+        selected = (a for a in selected if a.resource == args.resource)
+    if start or args.end:
+        lower = start or datetime.min
+        upper = args.end or datetime.max
+        selected = (a for a in selected if lower <= a.start_time < upper)
+    return _after_cursor(selected, args)
+
+
+def _after_cursor(appointments: Iterable[Appointment], args: argparse.Namespace) -> Iterator[Appointment]:
+    """Skip what was already shown up to and including the cursor's appointment."""
+
+    if args.cursor is None:
+        yield from appointments
+        return
+    start, identifier = args.cursor
+    passed = False
+    for appointment in appointments:
+        if appointment.start_time < start:
+            continue
+        if appointment.start_time == start and not passed:
+            passed = appointment.identifier == identifier
+            continue
+        yield appointment
+
+
+def run_list(scheduler: Scheduler, args: argparse.Namespace, out: TextIO) -> str:
+    """Stream the selected page of appointments to ``out`` in ``args.format``.
+
+    When ``--limit`` cuts the listing short, the cursor for the next page is
+    reported on standard error so ``out`` stays machine readable.
+    """
+
+    if args.cursor is not None and args.fuzzy:
+        raise SystemExit("Error: --cursor follows start time order and cannot be combined with --fuzzy")
+    selected = iter(select_appointments(scheduler, args))
+    if args.offset:
+        selected = islice(selected, args.offset, None)
+    page = selected if args.limit is None else islice(selected, args.limit)
+    last: Optional[Appointment] = None
+
+    def shown() -> Iterator[Appointment]:
+        nonlocal last
+        for appointment in page:
+            last = appointment
+            yield appointment
+
+    if args.format == "text":
+        for appointment in shown():
+            out.write(format_appointment(appointment) + "\n")
+    else:
+        from .transfer import write_appointments
+
+        write_appointments(out, shown(), args.format)
+    if args.limit is not None and last is not None and next(selected, None) is not None:
+        print(f"Next page: --cursor {encode_cursor(last)}", file=sys.stderr)
+    return ""
+
+
+def run_changes(scheduler: Scheduler, args: argparse.Namespace, out: TextIO) -> str:
+    """Write the change events after ``--since`` to ``out``, or drop old ones with ``--trim``.
+
+    When ``--limit`` cuts the feed short, the ``--since`` value fetching the
+    next events is reported on standard error.
+    """
+
+    from . import serialization
+
+    if scheduler.change_log is None:
+        raise SystemExit("Error: this database is not recording changes (turn it on with --change-log)")
+    if args.trim is not None:
+        return f"Removed {scheduler.trim_changes(args.trim)} changes"
+    events = scheduler.changes_since(args.since, limit=None if args.limit is None else args.limit + 1)
+
+    shown = events if args.limit is None else events[: args.limit]
+    for event in shown:
+        if args.format == "jsonl":
+            out.write(serialization.dumps(event.to_dict()).decode("utf-8") + "\n")
+        else:
+            out.write(format_change(event) + "\n")
+    if len(events) > len(shown) and shown:
+        print(f"More changes: --since {shown[-1].sequence}", file=sys.stderr)
+    return ""
+
+
+def run_audit(scheduler: Scheduler, args: argparse.Namespace, out: TextIO) -> str:
+    """Write the audit report to ``out``, exiting with status 1 when it found problems."""
+
+    report = scheduler.audit(workers=args.workers, shard_by=args.shard)
+    out.write(
+        f"Checked {report.checked} appointments: {len(report.conflicts)} conflicts, "
+        f"{len(report.invalid)} invalid records, {len(report.duplicates)} duplicate identifiers\n"
+    )
+    for first, second, resource in report.conflicts:
+        out.write(f"conflict | {first} | {second} | {resource or '-'}\n")
+    for position, identifier, reason in report.invalid:
+        out.write(f"invalid | #{position} {identifier or '-'} | {reason}\n")
+    for identifier in report.duplicates:
+        out.write(f"duplicate | {identifier}\n")
+    if not report.ok:
+        raise SystemExit(1)
+    return ""
+
+
+def run_import(scheduler: Scheduler, source: str, fmt: Optional[str]) -> str:
+    """Bulk create appointments read from ``source`` and describe the outcome."""
+
+    from .transfer import appointment_from_record, guess_format, read_records
+
+    fmt = fmt or guess_format(source)
+    handle = sys.stdin if source == "-" else open(source, "r", encoding="utf-8", newline="")
+    entries = []
+    lines = []
+    errors = []
+    try:
+        for line_number, record in read_records(handle, fmt):
+            try:
+                entries.append(appointment_from_record(record))
+            except (KeyError, TypeError, ValueError) as exc:
+                errors.append((line_number, f"invalid record ({exc})"))
+            else:
+                lines.append(line_number)
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+    result = scheduler.bulk_create(entries)
+    errors.extend((lines[position], reason) for position, _, reason in result.rejected)
+    report = [f"Imported {len(result.created)} appointments, rejected {len(errors)}"]
+    report.extend(f"Line {line}: {reason}" for line, reason in sorted(errors))
+    return "\n".join(report)
+
+
+def run_export(scheduler: Scheduler, target: str, fmt: Optional[str]) -> str:
+    """Stream every stored appointment to ``target``."""
+
+    from .transfer import guess_format, write_appointments
+
+    fmt = fmt or guess_format(target)
+    if target == "-":
+        write_appointments(sys.stdout, scheduler.list_appointments(), fmt)
+        return ""
+    with open(target, "w", encoding="utf-8", newline="") as handle:
+        written = write_appointments(handle, scheduler.list_appointments(), fmt)
+    return f"Exported {written} appointments to {target}"
+
+
+def open_storage(args: argparse.Namespace):
+    """Instantiate the storage backend selected on the command line."""
+
+    from . import storage
+
+    backend = getattr(storage, STORAGE_BACKENDS[args.backend])
+    options = {}
+    if args.backend == "partitioned":
+        options["period"] = getattr(args, "period", "month")
+    if getattr(args, "compact", False) and args.backend != "sqlite":
+        options.update(compact=True, epoch_timestamps=True)
+    if getattr(args, "columnar", False) and args.backend in ("json", "journal"):
+        options["columnar"] = True
+    if getattr(args, "change_log", False):
+        options["change_log"] = True
+    return backend(args.database, **options)
+
+
+def run_serve(args: argparse.Namespace, storage, scheduler: Scheduler) -> str:
+    """Answer commands for this database until interrupted."""
+
+    import signal
+    import threading
+
+    from .server import CommandServer, socket_path
+
+    path = args.socket or socket_path(args.database)
+    try:
+        server = CommandServer(path, daemon_handler(storage, scheduler))
+    except OSError as exc:
+        raise SystemExit(f"Error: cannot listen on {path}: {exc}")
+    handling_signals = threading.current_thread() is threading.main_thread()
+    if handling_signals:
+        previous = signal.signal(signal.SIGTERM, signal.default_int_handler)
+    print(f"Serving {args.database} on {path}", flush=True)
+    with server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if handling_signals:
+                signal.signal(signal.SIGTERM, previous)
+    return "Server stopped"
+
+
+def daemon_handler(storage, scheduler: Scheduler) -> Handler:
+    """Return the request handler of :func:`run_serve`, bound to a resident scheduler."""
+
+    import io
+    from contextlib import redirect_stderr, redirect_stdout
+
+    parser = build_parser()
+
+    def handle(argv: List[str], cwd: str) -> Tuple[int, str, str]:
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                args = parser.parse_args(argv)
+                if args.command == "serve":
+                    raise SystemExit("Error: the server is already running")
+                for name in ("metrics_file", "source", "target"):
+                    value = getattr(args, name, None)
+                    if value is not None and value != "-":
+                        setattr(args, name, type(value)(Path(cwd, value)))
+                execute(parser, args, storage, scheduler)
+                status = 0
+            except SystemExit as exc:
+                status = exit_status(exc)
+            except Exception as exc:  # keep serving after unexpected failures
+                print(f"Error: {exc}", file=sys.stderr)
+                status = 1
+        return status, stdout.getvalue(), stderr.getvalue()
+
+    return handle
+
+
+def exit_status(exc: SystemExit) -> int:
+    """Return the status ``exc`` would exit with, printing its message like the interpreter."""
+
+    if exc.code is None or isinstance(exc.code, int):
+        return exc.code or 0
+    print(exc.code, file=sys.stderr)
+    return 1
+
+
+def run_from_args(args: argparse.Namespace, storage=None, scheduler: Optional[Scheduler] = None) -> str:
+    from .models import Client
+    from .service import Scheduler
+
+    if storage is None:
+        storage = open_storage(args)
+    if scheduler is None:
+        scheduler = Scheduler(storage, cache=True)
+
+    if args.command == "serve":
+        return run_serve(args, storage, scheduler)
+
+    if args.command == "list":
+        return run_list(scheduler, args, sys.stdout)
+
+    if args.command == "changes":
+        return run_changes(scheduler, args, sys.stdout)
+
+    if args.command == "audit":
+        return run_audit(scheduler, args, sys.stdout)
+
+    if args.command == "add" and args.repeat:
+        if args.count is None and args.until is None:
+            raise SystemExit("Error: --repeat needs --count or --until")
+        from .recurrence import Recurrence
+
+        series = scheduler.create_series(
+            client=Client(name=args.name, email=args.email, phone=args.phone),
+            service=args.service,
+            start_time=args.start,
+            duration_minutes=args.duration,
+            recurrence=Recurrence(
+                args.repeat,
+                interval=args.interval,
+                count=args.count,
+                until=datetime.combine(args.until, time.max) if args.until else None,
+            ),
+            notes=args.notes,
+            resource=args.resource,
+        )
+        return f"Created series {series.identifier} with {len(series)} appointments"
 
     if args.command == "add":
         client = Client(name=args.name, email=args.email, phone=args.phone)
@@ -111,27 +643,30 @@ def run_from_args(args: argparse.Namespace) -> str:
             start_time=args.start,
             duration_minutes=args.duration,
             notes=args.notes,
+            resource=args.resource,
         )
         return f"Created appointment {appointment.identifier}"
 
     if args.command == "update":
-        existing = scheduler.get_appointment(args.identifier)
-        client = existing.client
-        if args.name or args.email or args.phone:
-            client = Client(
-                name=args.name or existing.client.name,
-                email=args.email if args.email is not None else existing.client.email,
-                phone=args.phone if args.phone is not None else existing.client.phone,
+        with scheduler.batch():
+            existing = scheduler.get_appointment(args.identifier)
+            client = existing.client
+            if args.name or args.email or args.phone:
+                client = Client(
+                    name=args.name or existing.client.name,
+                    email=args.email if args.email is not None else existing.client.email,
+                    phone=args.phone if args.phone is not None else existing.client.phone,
+                )
+            appointment = scheduler.update_appointment(
+                args.identifier,
+                client=client if (args.name or args.email or args.phone) else None,
+                service=args.service,
+                start_time=args.start,
+                duration_minutes=args.duration,
+                status=args.status,
+                notes=args.notes,
+                resource=args.resource,
             )
-        appointment = scheduler.update_appointment(
-            args.identifier,
-            client=client if (args.name or args.email or args.phone) else None,
-            service=args.service,
-            start_time=args.start,
-            duration_minutes=args.duration,
-            status=args.status,
-            notes=args.notes,
-        )
         return f"Updated appointment {appointment.identifier}"
 
     if args.command == "cancel":
@@ -142,29 +677,139 @@ def run_from_args(args: argparse.Namespace) -> str:
         appointment = scheduler.complete_appointment(args.identifier)
         return f"Completed appointment {appointment.identifier}"
 
-    raise SystemExit("No command supplied")
+    if args.command == "slots":
+        first = datetime.combine(args.day, datetime.min.time())
+        last = datetime.combine(args.last_day or args.day, datetime.min.time()) + timedelta(days=1)
+        slots = scheduler.available_slots(
+            (first, last),
+            duration_minutes=args.duration,
+            granularity_minutes=args.granularity,
+            working_hours=args.hours,
+            resource=args.resource,
+        )
+        return "\n".join(slot.strftime("%Y-%m-%d %H:%M") for slot in slots) or "No free slots"
+
+    if args.command == "series":
+        return format_series(scheduler.list_series())
+
+    if args.command == "cancel-series":
+        series = scheduler.cancel_series(args.identifier)
+        return f"Cancelled series {series.identifier}"
+
+    if args.command == "clients":
+        return format_clients(scheduler.list_clients())
+
+    if args.command == "resources":
+        return "\n".join(scheduler.resources())
+
+    if args.command == "migrate":
+        with storage.transaction():
+            appointments = storage.load()
+            storage.save(appointments)
+        clients = {appointment.client.identifier for appointment in appointments}
+        return f"Migrated {len(appointments)} appointments of {len(clients)} clients"
 
+    if args.command == "archive":
+        archive = getattr(storage, "archive", None)
+        if archive is None:
+            raise SystemExit("Error: archiving needs --backend partitioned")
+        moved = archive(datetime.combine(args.before, datetime.min.time()))
+        return f"Archived {moved} partitions"
 
-def format_client(client: Client) -> str:
-    parts = [client.name]
-    if client.email:
-        parts.append(client.email)
-    if client.phone:
-        parts.append(client.phone)
-    return " | ".join(parts)
+    if args.command == "import":
+        return run_import(scheduler, args.source, args.format)
+
+    if args.command == "export":
+        return run_export(scheduler, args.target, args.format)
+
+    raise SystemExit("No command supplied")
 
 
 def main(argv: Optional[Iterable[str]] = None) -> None:
     parser = build_parser()
-    args = parser.parse_args(argv)
+    arguments = list(sys.argv[1:] if argv is None else argv)
+    args = parser.parse_args(arguments)
+    # Same default as server.socket_path, checked here so the socket modules are only imported when needed.
+    socket = args.socket or Path(f"{args.database}.sock")
+    if args.command != "serve" and not args.no_daemon and getattr(args, "source", None) != "-" and socket.exists():
+        from .server import forward
+
+        reply = forward(socket, arguments, os.getcwd())
+        if reply is not None:
+            status, stdout, stderr = reply
+            sys.stdout.write(stdout)
+            sys.stderr.write(stderr)
+            if status:
+                sys.exit(status)
+            return
+    execute(parser, args)
+
+
+def execute(
+    parser: argparse.ArgumentParser,
+    args: argparse.Namespace,
+    storage=None,
+    scheduler: Optional[Scheduler] = None,
+) -> None:
+    """Run the parsed command, collecting metrics when ``--profile`` or ``--metrics-file`` ask for them."""
+
+    if not (args.profile or args.metrics_file):
+        run_command(parser, args, storage, scheduler)
+        return
+    from .metrics import METRICS
+
+    METRICS.reset()
+    METRICS.enable()
+    began = perf_counter()
+    try:
+        with METRICS.span(f"cli.{args.command}"):
+            run_command(parser, args, storage, scheduler)
+    finally:
+        METRICS.disable()
+        if args.profile:
+            print(METRICS.report(perf_counter() - began), file=sys.stderr)
+        if args.metrics_file:
+            METRICS.write(args.metrics_file, args.metrics_format)
+
+
+def run_command(
+    parser: argparse.ArgumentParser,
+    args: argparse.Namespace,
+    storage=None,
+    scheduler: Optional[Scheduler] = None,
+) -> None:
+    """Run the parsed command, turning domain errors into exit messages."""
+
+    from .service import (
+        AppointmentNotFoundError,
+        ClientNotFoundError,
+        ConcurrentModificationError,
+        SchedulingConflictError,
+        SeriesNotFoundError,
+    )
+
     try:
-        result = run_from_args(args)
+        result = run_from_args(args, storage, scheduler)
     except SchedulingConflictError as exc:
         parser.exit(1, f"Error: {exc}\n")
     except AppointmentNotFoundError as exc:
         parser.exit(1, f"Error: appointment {exc.args[0]} not found\n")
+    except ClientNotFoundError as exc:
+        parser.exit(1, f"Error: client {exc.args[0]} not found\n")
+    except SeriesNotFoundError as exc:
+        parser.exit(1, f"Error: series {exc.args[0]} not found\n")
+    except ConcurrentModificationError:
+        parser.exit(1, "Error: the database was modified concurrently, please retry\n")
+    except BrokenPipeError:
+        # The reader went away (e.g. ``| head``); stop quietly.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
     if result:
         print(result)
 
 
 __all__ = ["main", "build_parser", "run_from_args"]
+
+
+if __name__ == "__main__":
+    main()
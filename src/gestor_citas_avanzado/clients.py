@@ -0,0 +1,85 @@
+"""Registry of distinct clients and the appointments booked by each."""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, Iterator, Optional, Set
+
+from .models import Appointment, Client, renumbered
+
+
+class ClientRegistry:
+    """Deduplicate clients by identifier and index their appointments.
+
+    Lookups by client identifier touch only that client's bookings instead
+    of scanning the whole calendar.
+    """
+
+    def __init__(self, appointments: Iterable[Appointment] = ()) -> None:
+        self._clients: Dict[str, Client] = {}
+        self._by_details: Dict[Client, Client] = {}
+        self._appointments: Dict[str, Set[str]] = {}
+        self._owners: Dict[str, str] = {}
+        for appointment in appointments:
+            self.add(appointment)
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def __iter__(self) -> Iterator[Client]:
+        return iter(self._clients.values())
+
+    def __contains__(self, identifier: object) -> bool:
+        return identifier in self._clients
+
+    def add(self, appointment: Appointment) -> None:
+        """Register ``appointment`` under its client, moving it if the client changed."""
+
+        client = appointment.client
+        self.discard(appointment.identifier)
+        previous = self._clients.get(client.identifier)
+        if previous is not None and previous != client and self._by_details.get(previous) is previous:
+            del self._by_details[previous]
+        self._clients[client.identifier] = client
+        self._by_details.setdefault(client, client)
+        self._appointments.setdefault(client.identifier, set()).add(appointment.identifier)
+        self._owners[appointment.identifier] = client.identifier
+
+    def discard(self, identifier: str) -> None:
+        """Forget the appointment ``identifier``; clients left without bookings are dropped."""
+
+        owner = self._owners.pop(identifier, None)
+        if owner is None:
+            return
+        booked = self._appointments[owner]
+        booked.discard(identifier)
+        if not booked:
+            del self._appointments[owner]
+            client = self._clients.pop(owner)
+            if self._by_details.get(client) is client:
+                del self._by_details[client]
+
+    def get(self, identifier: str) -> Optional[Client]:
+        """Return the client registered under ``identifier``."""
+
+        return self._clients.get(identifier)
+
+    def resolve(self, client: Client) -> Client:
+        """Return the registered client with the same details, or ``client`` itself.
+
+        A ``client`` whose identifier is held by a client with other details
+        (one edited after booking under these) is given a new identifier.
+        """
+
+        registered = self._by_details.get(client)
+        if registered is not None:
+            return registered
+        holder = self._clients.get(client.identifier)
+        return client if holder is None else renumbered(client)
+
+    def appointments_for(self, identifier: str) -> Set[str]:
+        """Return the identifiers of the appointments booked by a client."""
+
+        return set(self._appointments.get(identifier, ()))
+
+
+__all__ = ["ClientRegistry"]
@@ -0,0 +1,303 @@
+"""Columnar snapshot of a JSON database for read-only queries.
+
+Answering ``list`` or a time-window query from a JSON database means parsing
+the whole file and building an :class:`~gestor_citas_avanzado.models.Appointment`
+per row, however few rows are asked for.  A snapshot (``<database>.columns``)
+holds the same appointments in a binary layout meant to be memory mapped:
+
+* fixed-width integer columns, ordered by start time, for the start (in
+  microseconds since the epoch, UTC for aware datetimes), the UTC offset
+  and the duration;
+* dictionary codes for the identifier, client, service, status, resource
+  and notes of each row, pointing into a table of distinct strings stored
+  as one UTF-8 blob plus an array of offsets into it.
+
+Readers bisect the start column and only decode the rows they return, so a
+query costs about the same whatever the size of the file.  Each snapshot
+records the fingerprint of the file it was built from and is ignored once
+that file changes.
+"""
+
+from __future__ import annotations
+
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from heapq import merge
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .models import Appointment, Client, epoch_microseconds
+
+MAGIC = b"GCCOLS1\n"
+# Written in native byte order; a snapshot copied to a machine of the other order reads as stale.
+_ORDER = 0x01020304
+_HEADER = struct.Struct("=8sI4x3qqqq")
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_NAIVE = -(1 << 63)
+_WIDE = ("start", "offset", "duration")
+_NARROW = ("identifier", "client", "service", "status", "resource", "notes")
+
+Signature = Tuple[int, int, int]
+
+
+def _split(value: datetime) -> Tuple[int, int]:
+    """Return the sort key of ``value`` in microseconds and its UTC offset (:data:`_NAIVE` when naive)."""
+
+    offset = value.utcoffset()
+    return epoch_microseconds(value), _NAIVE if offset is None else offset // _MICROSECOND
+
+
+class _Codes(dict):
+    """Number distinct strings in the order they are first seen; ``None`` is ``-1``."""
+
+    def __init__(self) -> None:
+        super().__init__({None: -1})
+
+    def __missing__(self, value: Optional[str]) -> int:
+        code = self[value] = len(self) - 1
+        return code
+
+
+def encode_columns(appointments: Iterable[Appointment], signature: Signature) -> bytes:
+    """Return the snapshot of ``appointments`` for a database file with fingerprint ``signature``.
+
+    Rows are ordered by start time; appointments starting together keep
+    their order in ``appointments``.
+    """
+
+    keyed = sorted(((_split(appointment.start_time), appointment) for appointment in appointments), key=_first_key)
+    rows = [appointment for _, appointment in keyed]
+    codes = _Codes()
+    clients: Dict[Tuple[Optional[str], ...], int] = {}
+    fields = array("i")
+    numbers = array("i")
+    for appointment in rows:
+        client = appointment.client
+        entry = (client.identifier, client.name, client.email, client.phone)
+        number = clients.get(entry)
+        if number is None:
+            number = clients[entry] = len(clients)
+            fields.extend([codes[value] for value in entry])
+        numbers.append(number)
+
+    # The 8-byte columns go first so every column starts aligned to its width.
+    columns = [
+        array("q", [key for (key, _), _ in keyed]),
+        array("q", [offset for (_, offset), _ in keyed]),
+        array("q", [appointment.duration_minutes for appointment in rows]),
+    ]
+    narrow = [
+        array("i", [codes[appointment.identifier] for appointment in rows]),
+        numbers,
+        array("i", [codes[appointment.service] for appointment in rows]),
+        array("i", [codes[appointment.status] for appointment in rows]),
+        array("i", [codes[appointment.resource] for appointment in rows]),
+        array("i", [codes[appointment.notes] for appointment in rows]),
+    ]
+    encoded = [value.encode("utf-8") for value in codes if value is not None]
+    columns.append(array("q", accumulate((len(item) for item in encoded), initial=0)))
+    columns.extend(narrow)
+    columns.append(fields)
+    header = _HEADER.pack(MAGIC, _ORDER, *signature, len(rows), len(encoded), len(clients))
+    return b"".join([header, *(column.tobytes() for column in columns), *encoded])
+
+
+def _first_key(item: Tuple[Tuple[int, int], Appointment]) -> int:
+    return item[0][0]
+
+
+class ColumnarSnapshot:
+    """Read-only view of a snapshot written by :func:`encode_columns`.
+
+    Use :meth:`open`.  ``overlay`` maps identifiers to newer versions of
+    appointments (or new ones) that take precedence over the stored rows,
+    e.g. those recorded in a journal since the snapshot was written.
+    """
+
+    def __init__(self, buffer: mmap.mmap, overlay: Optional[Dict[str, Appointment]] = None) -> None:
+        view = memoryview(buffer)
+        magic, order, *signature, rows, strings, clients = _HEADER.unpack_from(view)
+        if magic != MAGIC or order != _ORDER:
+            raise ValueError("not a columnar snapshot for this platform")
+        self.signature: Signature = tuple(signature)  # type: ignore[assignment]
+        self._rows = rows
+        position = _HEADER.size
+        columns: Dict[str, memoryview] = {}
+        layout = [(name, "q", rows) for name in _WIDE] + [("offsets", "q", strings + 1)]
+        layout += [(name, "i", rows) for name in _NARROW] + [("fields", "i", 4 * clients)]
+        if position + sum(length * (8 if code == "q" else 4) for _, code, length in layout) > len(view):
+            raise ValueError("truncated columnar snapshot")
+        for name, code, length in layout:
+            size = length * (8 if code == "q" else 4)
+            columns[name] = view[position : position + size].cast(code)
+            position += size
+        self._blob = view[position:]
+        if len(self._blob) != columns["offsets"][strings]:
+            raise ValueError("truncated columnar snapshot")
+        self._start, self._offset, self._duration = columns["start"], columns["offset"], columns["duration"]
+        self._offsets, self._fields = columns["offsets"], columns["fields"]
+        self._identifier, self._client = columns["identifier"], columns["client"]
+        self._service, self._status = columns["service"], columns["status"]
+        self._resource, self._notes = columns["resource"], columns["notes"]
+        self._strings: Dict[int, str] = {}
+        self._clients: Dict[int, Client] = {}
+        self._zones: Dict[int, timezone] = {}
+        self.overlay: Dict[str, Appointment] = overlay or {}
+
+    @classmethod
+    def open(cls, path: Path, signature: Optional[Signature] = None) -> Optional["ColumnarSnapshot"]:
+        """Map the snapshot at ``path``; return ``None`` if it is missing, unreadable or not built for ``signature``."""
+
+        try:
+            with open(path, "rb") as handle:
+                buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            snapshot = cls(buffer)
+        except (ValueError, TypeError, struct.error):
+            return None
+        if signature is not None and snapshot.signature != tuple(signature):
+            return None
+        return snapshot
+
+    def with_overlay(self, overlay: Dict[str, Appointment]) -> "ColumnarSnapshot":
+        """Return a view of the same snapshot with ``overlay`` applied on top."""
+
+        view = object.__new__(ColumnarSnapshot)
+        view.__dict__.update(self.__dict__)
+        view.overlay = overlay
+        return view
+
+    def __len__(self) -> int:
+        if not self.overlay:
+            return self._rows
+        stored = sum(1 for row in range(self._rows) if self._text(self._identifier[row]) not in self.overlay)
+        return stored + len(self.overlay)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def iter_appointments(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        resource: Optional[str] = None,
+        *,
+        active: bool = False,
+    ) -> Iterator[Appointment]:
+        """Yield appointments starting in ``[start, end)`` ordered by start time.
+
+        Only rows booked on ``resource`` (every row when it is ``None``) and,
+        with ``active``, not cancelled are decoded.
+        """
+
+        lower = 0 if start is None else bisect_left(self._start, _split(start)[0])
+        upper = self._rows if end is None else bisect_left(self._start, _split(end)[0], lower)
+        rows = self._hydrate(lower, upper, resource, active)
+        if not self.overlay:
+            return rows
+        overlay = self.overlay
+        newer = sorted(
+            (
+                appointment
+                for appointment in overlay.values()
+                if (start is None or appointment.start_time >= start)
+                and (end is None or appointment.start_time < end)
+                and (resource is None or appointment.resource == resource)
+                and not (active and appointment.status == "cancelled")
+            ),
+            key=_start_time,
+        )
+        return merge((item for item in rows if item.identifier not in overlay), newer, key=_start_time)
+
+    def find_between(self, start: datetime, end: datetime, resource: Optional[str] = None) -> List[Appointment]:
+        """Return non-cancelled appointments starting in ``[start, end)``, ties ordered by identifier."""
+
+        found = list(self.iter_appointments(start, end, resource, active=True))
+        found.sort(key=lambda item: (item.start_time, item.identifier))
+        return found
+
+    def upcoming(self, after: datetime, resource: Optional[str] = None) -> List[Appointment]:
+        """Return appointments starting at or after ``after``."""
+
+        return list(self.iter_appointments(after, None, resource))
+
+    def resources(self) -> Set[Optional[str]]:
+        """Return the resources booked by any stored appointment, ``None`` for the default calendar."""
+
+        if self.overlay:
+            codes: Iterable[int] = (
+                self._resource[row]
+                for row in range(self._rows)
+                if self._text(self._identifier[row]) not in self.overlay
+            )
+        else:
+            codes = self._resource
+        named = {self._cached(code) for code in set(codes)}
+        named.update(appointment.resource for appointment in self.overlay.values())
+        return named
+
+    # ------------------------------------------------------------------
+    # Decoding
+    # ------------------------------------------------------------------
+    def _hydrate(self, lower: int, upper: int, resource: Optional[str], active: bool) -> Iterator[Appointment]:
+        cached, text = self._cached, self._text
+        for row in range(lower, upper):
+            if resource is not None and cached(self._resource[row]) != resource:
+                continue
+            status = cached(self._status[row])
+            if active and status == "cancelled":
+                continue
+            yield Appointment(
+                identifier=text(self._identifier[row]),
+                client=self._client_at(self._client[row]),
+                service=cached(self._service[row]),
+                start_time=self._start_time(row),
+                duration_minutes=self._duration[row],
+                status=status,
+                notes=text(self._notes[row]),
+                resource=cached(self._resource[row]),
+            )
+
+    def _start_time(self, row: int) -> datetime:
+        offset = self._offset[row]
+        if offset == _NAIVE:
+            return _EPOCH + timedelta(microseconds=self._start[row])
+        zone = self._zones.get(offset)
+        if zone is None:
+            zone = self._zones[offset] = timezone(timedelta(microseconds=offset))
+        return (_EPOCH + timedelta(microseconds=self._start[row] + offset)).replace(tzinfo=zone)
+
+    def _client_at(self, number: int) -> Client:
+        client = self._clients.get(number)
+        if client is None:
+            identifier, name, email, phone = (self._cached(code) for code in self._fields[4 * number : 4 * number + 4])
+            client = self._clients[number] = Client(name=name, email=email, phone=phone, identifier=identifier)
+        return client
+
+    def _text(self, code: int) -> Optional[str]:
+        if code < 0:
+            return None
+        return str(self._blob[self._offsets[code] : self._offsets[code + 1]], "utf-8")
+
+    def _cached(self, code: int) -> Optional[str]:
+        """Decode a string repeated across rows (service, status, ...) once per snapshot."""
+
+        value = self._strings.get(code)
+        if value is None and code >= 0:
+            value = self._strings[code] = sys.intern(self._text(code))  # type: ignore[arg-type]
+        return value
+
+
+def _start_time(appointment: Appointment) -> datetime:
+    return appointment.start_time
+
+
+__all__ = ["MAGIC", "ColumnarSnapshot", "encode_columns"]
@@ -0,0 +1,224 @@
+"""In-memory interval index used for conflict detection and time queries."""
+
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from functools import lru_cache
+from heapq import merge
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import Appointment
+
+
+class IntervalIndex:
+    """Keep active (non-cancelled) appointments sorted by start time.
+
+    Starts are stored in a sorted list searched with :mod:`bisect`, and
+    again in one sorted list per length bucket (lengths up to 1, 2, 4, ...
+    minutes).  An overlap query only looks back from the window as far as
+    each bucket's bound, so one long booking does not make every query scan
+    the short ones, and the look-back shrinks again once it is removed.
+    Queries cost ``O(b log n + k)`` for ``b`` buckets in use.
+    """
+
+    def __init__(self, appointments: Iterable[Appointment] = ()) -> None:
+        self._keys: List[Tuple[datetime, str]] = []
+        self._spans: Dict[str, Tuple[datetime, datetime]] = {}
+        self._buckets: Dict[int, List[Tuple[datetime, str]]] = {}
+        for appointment in appointments:
+            if appointment.status != "cancelled" and appointment.identifier not in self._spans:
+                self._spans[appointment.identifier] = (appointment.start_time, appointment.end_time)
+                self._keys.append((appointment.start_time, appointment.identifier))
+        self._keys.sort()
+        spans, buckets = self._spans, self._buckets
+        for key in self._keys:
+            start, end = spans[key[1]]
+            bucket = _bucket(end - start)
+            keys = buckets.get(bucket)
+            if keys is None:
+                keys = buckets[bucket] = []
+            keys.append(key)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, identifier: object) -> bool:
+        return identifier in self._spans
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    def add(self, appointment: Appointment) -> None:
+        """Index ``appointment`` unless it has been cancelled."""
+
+        self.discard(appointment.identifier)
+        if appointment.status == "cancelled":
+            return
+        key = (appointment.start_time, appointment.identifier)
+        insort(self._keys, key)
+        insort(self._buckets.setdefault(self._store(appointment), []), key)
+
+    def discard(self, identifier: str) -> None:
+        """Remove ``identifier`` from the index if present."""
+
+        span = self._spans.pop(identifier, None)
+        if span is None:
+            return
+        key = (span[0], identifier)
+        del self._keys[bisect_left(self._keys, key)]
+        bucket = _bucket(span[1] - span[0])
+        keys = self._buckets[bucket]
+        del keys[bisect_left(keys, key)]
+        if not keys:
+            del self._buckets[bucket]
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def overlapping(self, start: datetime, end: datetime) -> List[str]:
+        """Return identifiers of intervals overlapping ``[start, end)``."""
+
+        return [identifier for identifier, _ in self._overlapping(start, end)]
+
+    def spans(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+        """Return ``(start, end)`` of intervals overlapping the window, by start."""
+
+        return [span for _, span in self._overlapping(start, end)]
+
+    def starting_between(self, start: datetime, end: datetime) -> List[str]:
+        """Return identifiers whose start falls within ``[start, end)``."""
+
+        return [identifier for _, identifier in self._starting(start, end)]
+
+    def _starting(self, start: datetime, end: datetime) -> List[Tuple[datetime, str]]:
+        lower = bisect_left(self._keys, (start,))
+        upper = bisect_left(self._keys, (end,))
+        return self._keys[lower:upper]
+
+    def _overlapping(self, start: datetime, end: datetime) -> List[Tuple[str, Tuple[datetime, datetime]]]:
+        slices = []
+        for bucket, keys in self._buckets.items():
+            try:
+                lower = bisect_left(keys, (start - _LOOK_BACK[bucket],))
+            except OverflowError:
+                lower = 0
+            upper = bisect_left(keys, (end,), lower)
+            if upper > lower:
+                slices.append(keys[lower:upper])
+        candidates = slices[0] if len(slices) == 1 else merge(*slices)
+        spans = self._spans
+        return [
+            (identifier, spans[identifier])
+            for _, identifier in candidates
+            if spans[identifier][1] > start
+        ]
+
+    def _store(self, appointment: Appointment) -> int:
+        """Record the span of ``appointment``; return its length bucket."""
+
+        start, end = appointment.start_time, appointment.end_time
+        self._spans[appointment.identifier] = (start, end)
+        return _bucket(end - start)
+
+
+_MINUTE = timedelta(minutes=1)
+# Bucket b holds intervals lasting at most 2 ** b minutes; no timedelta reaches 2 ** 41 minutes.
+_LOOK_BACK = [_MINUTE * (1 << bucket) for bucket in range(41)]
+
+
+@lru_cache(maxsize=1024)
+def _bucket(length: timedelta) -> int:
+    """Return the smallest ``b`` such that ``length`` is at most ``2 ** b`` minutes."""
+
+    return max(-(-length // _MINUTE) - 1, 0).bit_length()
+
+
+class PartitionedIndex:
+    """Keep a separate :class:`IntervalIndex` per booked resource.
+
+    Overlap and span queries only look at one resource's partition, so a
+    conflict check costs the same however many employees or rooms share the
+    calendar.  Appointments without a resource live in the ``None``
+    partition.
+    """
+
+    def __init__(self, appointments: Iterable[Appointment] = ()) -> None:
+        grouped: Dict[Optional[str], List[Appointment]] = {}
+        for appointment in appointments:
+            grouped.setdefault(appointment.resource, []).append(appointment)
+        self._partitions: Dict[Optional[str], IntervalIndex] = {}
+        self._owners: Dict[str, Optional[str]] = {}
+        for resource, members in grouped.items():
+            index = IntervalIndex(members)
+            if len(index):
+                self._partitions[resource] = index
+            for appointment in members:
+                if appointment.identifier in index:
+                    self._owners[appointment.identifier] = resource
+
+    def __len__(self) -> int:
+        return len(self._owners)
+
+    def __contains__(self, identifier: object) -> bool:
+        return identifier in self._owners
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    def add(self, appointment: Appointment) -> None:
+        """Index ``appointment`` in its resource's partition unless cancelled."""
+
+        self.discard(appointment.identifier)
+        if appointment.status == "cancelled":
+            return
+        index = self._partitions.get(appointment.resource)
+        if index is None:
+            index = self._partitions[appointment.resource] = IntervalIndex()
+        index.add(appointment)
+        self._owners[appointment.identifier] = appointment.resource
+
+    def discard(self, identifier: str) -> None:
+        """Remove ``identifier`` from whichever partition holds it."""
+
+        if identifier not in self._owners:
+            return
+        resource = self._owners.pop(identifier)
+        index = self._partitions[resource]
+        index.discard(identifier)
+        if not len(index):
+            del self._partitions[resource]
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def partition(self, resource: Optional[str]) -> IntervalIndex:
+        """Return the index of ``resource`` (empty if nothing is booked on it)."""
+
+        return self._partitions.get(resource) or IntervalIndex()
+
+    def resources(self) -> List[Optional[str]]:
+        """Return the resources with at least one active appointment."""
+
+        return list(self._partitions)
+
+    def overlapping(self, start: datetime, end: datetime, resource: Optional[str] = None) -> List[str]:
+        """Return identifiers on ``resource`` overlapping ``[start, end)``."""
+
+        return self.partition(resource).overlapping(start, end)
+
+    def spans(
+        self, start: datetime, end: datetime, resource: Optional[str] = None
+    ) -> List[Tuple[datetime, datetime]]:
+        """Return ``(start, end)`` of the intervals on ``resource`` overlapping the window."""
+
+        return self.partition(resource).spans(start, end)
+
+    def starting_between(self, start: datetime, end: datetime) -> List[str]:
+        """Return identifiers on every resource starting in ``[start, end)``, by start."""
+
+        slices = [index._starting(start, end) for index in self._partitions.values()]
+        return [identifier for _, identifier in merge(*slices)]
+
+
+__all__ = ["IntervalIndex", "PartitionedIndex"]
@@ -0,0 +1,197 @@
+"""Opt-in timing spans and counters around the scheduler's hot paths.
+
+Instrumented code reports to the module level :data:`METRICS` registry,
+which is disabled by default: a disabled :func:`timed` wrapper costs one
+attribute check and :func:`span` hands back a shared no-op context
+manager.  Enable it around the code being investigated and read the
+results with :meth:`Metrics.snapshot`, :meth:`Metrics.report` or
+:meth:`Metrics.to_prometheus`::
+
+    METRICS.enable()
+    scheduler.create_appointment(...)
+    print(METRICS.report())
+
+Span times are inclusive (``scheduler.create_appointment`` contains the
+``storage.save`` it triggers) and a span re-entered under the same name,
+such as a subclass ``load`` calling its parent's, is only timed once.
+"""
+
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, TypeVar
+
+METRIC_FORMATS = ("json", "prometheus")
+PROMETHEUS_PREFIX = "gestor_citas"
+
+F = TypeVar("F", bound=Callable[..., Any])
+_DISABLED = nullcontext()
+
+
+class Metrics:
+    """Accumulate call counts and durations per span name, plus plain counters."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._spans: Dict[str, List[float]] = {}
+        self._counters: Dict[str, int] = {}
+        self._mutex = threading.Lock()
+        self._active = threading.local()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        """Forget everything recorded so far."""
+
+        with self._mutex:
+            self._spans.clear()
+            self._counters.clear()
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time the enclosed block under ``name``."""
+
+        active = self._names()
+        if name in active:
+            yield
+            return
+        active.add(name)
+        began = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, perf_counter() - began)
+            active.discard(name)
+
+    def record(self, name: str, seconds: float) -> None:
+        """Add one call of ``seconds`` to the span ``name``."""
+
+        with self._mutex:
+            entry = self._spans.get(name)
+            if entry is None:
+                self._spans[name] = [1, seconds, seconds]
+            else:
+                entry[0] += 1
+                entry[1] += seconds
+                if seconds > entry[2]:
+                    entry[2] = seconds
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Increase the counter ``name`` by ``amount``."""
+
+        with self._mutex:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the recorded spans and counters as plain data."""
+
+        with self._mutex:
+            spans = {
+                name: {"calls": int(calls), "total_seconds": total, "max_seconds": longest}
+                for name, (calls, total, longest) in sorted(self._spans.items())
+            }
+            return {"spans": spans, "counters": dict(sorted(self._counters.items()))}
+
+    def report(self, elapsed: Optional[float] = None) -> str:
+        """Return a human readable breakdown, slowest spans first.
+
+        With ``elapsed`` (the wall time of the whole run) each span also
+        shows its share of it.
+        """
+
+        snapshot = self.snapshot()
+        spans = sorted(snapshot["spans"].items(), key=lambda item: -item[1]["total_seconds"])
+        width = max(len(name) for name in [*snapshot["spans"], *snapshot["counters"], "wall time"])
+        lines = [f"{'span':{width}s} {'calls':>7s} {'total ms':>10s} {'mean ms':>9s} {'max ms':>9s}"]
+        if elapsed:
+            lines[0] += f" {'share':>6s}"
+        for name, entry in spans:
+            calls, total = entry["calls"], entry["total_seconds"]
+            line = f"{name:{width}s} {calls:7d} {total * 1e3:10.3f} {total / calls * 1e3:9.3f}"
+            line += f" {entry['max_seconds'] * 1e3:9.3f}"
+            if elapsed:
+                line += f" {total / elapsed:6.1%}"
+            lines.append(line)
+        for name, value in snapshot["counters"].items():
+            lines.append(f"{name:{width}s} {value:7d}")
+        if elapsed:
+            lines.append(f"{'wall time':{width}s} {'':7s} {elapsed * 1e3:10.3f}")
+        return "\n".join(lines)
+
+    def to_prometheus(self) -> str:
+        """Return the metrics in the Prometheus text exposition format."""
+
+        snapshot = self.snapshot()
+        seconds = f"{PROMETHEUS_PREFIX}_span_seconds"
+        longest = f"{PROMETHEUS_PREFIX}_span_max_seconds"
+        events = f"{PROMETHEUS_PREFIX}_events_total"
+        lines = [f"# HELP {seconds} Time spent in instrumented spans.", f"# TYPE {seconds} summary"]
+        for name, entry in snapshot["spans"].items():
+            lines.append(f'{seconds}_count{{span="{name}"}} {entry["calls"]}')
+            lines.append(f'{seconds}_sum{{span="{name}"}} {entry["total_seconds"]:.9f}')
+        lines += [f"# HELP {longest} Slowest single call of each span.", f"# TYPE {longest} gauge"]
+        for name, entry in snapshot["spans"].items():
+            lines.append(f'{longest}{{span="{name}"}} {entry["max_seconds"]:.9f}')
+        lines += [f"# HELP {events} Instrumented event counters.", f"# TYPE {events} counter"]
+        for name, value in snapshot["counters"].items():
+            lines.append(f'{events}{{counter="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path, fmt: str = "json") -> None:
+        """Write the metrics to ``path`` as JSON stats or Prometheus text."""
+
+        if fmt not in METRIC_FORMATS:
+            raise ValueError(f"Unknown metrics format {fmt!r}")
+        import json
+
+        text = self.to_prometheus() if fmt == "prometheus" else json.dumps(self.snapshot(), indent=2) + "\n"
+        Path(path).write_text(text, encoding="utf-8")
+
+    def _names(self) -> set:
+        names = getattr(self._active, "names", None)
+        if names is None:
+            names = self._active.names = set()
+        return names
+
+
+METRICS = Metrics()
+
+
+def span(name: str) -> ContextManager[None]:
+    """Return a context manager timing its block as ``name`` when metrics are enabled."""
+
+    return METRICS.span(name) if METRICS.enabled else _DISABLED
+
+
+def count(name: str, amount: int = 1) -> None:
+    """Increase the counter ``name`` when metrics are enabled."""
+
+    if METRICS.enabled:
+        METRICS.count(name, amount)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorate a function so each call is recorded as the span ``name``."""
+
+    def decorate(function: F) -> F:
+        @wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not METRICS.enabled:
+                return function(*args, **kwargs)
+            with METRICS.span(name):
+                return function(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+__all__ = ["METRICS", "METRIC_FORMATS", "Metrics", "count", "span", "timed"]
@@ -2,35 +2,114 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
-import uuid
+from typing import Any, Dict, Optional, Tuple
+import sys
 
+from .serialization import decode_timestamp, encode_timestamp
 
-@dataclass
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_DURATIONS: Dict[int, timedelta] = {}
+
+
+def epoch_microseconds(value: datetime) -> int:
+    """Return microseconds between the Unix epoch and ``value``, exactly.
+
+    Naive datetimes are taken as wall-clock times; aware ones are converted
+    to UTC first.
+    """
+
+    offset = value.utcoffset()
+    if offset is not None:
+        value = value.replace(tzinfo=None) - offset
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+
+def new_identifier() -> str:
+    """Return a random identifier for a new appointment or series."""
+
+    from uuid import uuid4  # deferred: only writes need it, and it is slow to import
+
+    return uuid4().hex
+
+
+def _client_identifier(name: str, email: Optional[str], phone: Optional[str]) -> str:
+    from hashlib import blake2b  # deferred: stored clients already carry their identifier
+
+    digest = blake2b(digest_size=8)
+    digest.update("\x1f".join((name, email or "", phone or "")).encode("utf-8"))
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True, slots=True)
 class Client:
-    """Represents the person attending an appointment."""
+    """Represents the person attending an appointment.
+
+    Instances are immutable and their strings interned, so the many
+    appointments of a regular client can share one object.
+
+    ``identifier`` is derived from the contact details when not given, so
+    the same person booked twice gets the same id.  It is not part of
+    equality; once stored it stays with the client when their details are
+    edited through :meth:`Scheduler.update_client
+    <gestor_citas_avanzado.service.Scheduler.update_client>`.
+    """
 
     name: str
     email: Optional[str] = None
     phone: Optional[str] = None
+    identifier: str = field(default="", compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "name", sys.intern(self.name))
+        object.__setattr__(self, "email", _intern(self.email))
+        object.__setattr__(self, "phone", _intern(self.phone))
+        identifier = self.identifier or _client_identifier(self.name, self.email, self.phone)
+        object.__setattr__(self, "identifier", sys.intern(identifier))
 
     def to_dict(self) -> Dict[str, Any]:
         """Return a serialisable representation of the client."""
 
-        return {"name": self.name, "email": self.email, "phone": self.phone}
+        return {"identifier": self.identifier, "name": self.name, "email": self.email, "phone": self.phone}
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "Client":
         """Create a client from a dictionary."""
 
-        return cls(name=data["name"], email=data.get("email"), phone=data.get("phone"))
+        return cls(
+            name=data["name"],
+            email=data.get("email"),
+            phone=data.get("phone"),
+            identifier=data.get("identifier") or "",
+        )
+
+
+def renumbered(client: Client) -> Client:
+    """Return ``client`` under a random identifier.
+
+    Used when the identifier derived from its details already belongs to a
+    client whose details were edited since.
+    """
+
+    return replace(client, identifier=new_identifier()[:16])
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Appointment:
-    """Represents a scheduled appointment."""
+    """Represents a scheduled appointment.
+
+    Appointments are immutable; use :func:`dataclasses.replace` to derive a
+    modified copy.  ``resource`` names the employee or room being booked;
+    appointments only conflict with others on the same resource, and those
+    without one share a single default calendar.  ``end_time`` is computed
+    once at construction so comparisons never allocate.
+    """
 
     client: Client
     service: str
@@ -38,40 +117,79 @@ class Appointment:
     duration_minutes: int
     status: str = "scheduled"
     notes: Optional[str] = None
-    identifier: str = field(default_factory=lambda: uuid.uuid4().hex)
-
-    @property
-    def end_time(self) -> datetime:
-        """Return the expected finishing time of the appointment."""
-
-        return self.start_time + timedelta(minutes=self.duration_minutes)
-
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert the appointment into a serialisable dictionary."""
-
-        return {
+    identifier: str = field(default_factory=new_identifier)
+    resource: Optional[str] = None
+    end_time: datetime = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        duration = self.duration_minutes
+        setter = object.__setattr__
+        setter(self, "service", sys.intern(self.service))
+        setter(self, "status", sys.intern(self.status))
+        if self.resource is not None:
+            setter(self, "resource", sys.intern(self.resource))
+        length = _DURATIONS.get(duration)
+        if length is None:
+            length = _DURATIONS[duration] = timedelta(minutes=duration)
+        setter(self, "end_time", self.start_time + length)
+
+    def to_dict(self, *, epoch_timestamps: bool = False, client_reference: bool = False) -> Dict[str, Any]:
+        """Convert the appointment into a serialisable dictionary.
+
+        With ``epoch_timestamps`` the start time is written as integer seconds
+        since the Unix epoch when that is lossless.  With ``client_reference``
+        only the client's identifier is written instead of the whole client.
+        """
+
+        data = {
             "identifier": self.identifier,
-            "client": self.client.to_dict(),
+            "client": self.client.identifier if client_reference else self.client.to_dict(),
             "service": self.service,
-            "start_time": self.start_time.isoformat(),
+            "start_time": encode_timestamp(self.start_time, epoch=epoch_timestamps),
             "duration_minutes": self.duration_minutes,
             "status": self.status,
             "notes": self.notes,
         }
+        if self.resource is not None:
+            data["resource"] = self.resource
+        return data
 
     @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> "Appointment":
-        """Rehydrate an appointment instance from its dictionary representation."""
-
+    def from_dict(
+        cls,
+        data: Dict[str, Any],
+        clients: Optional[Dict[Any, Client]] = None,
+    ) -> "Appointment":
+        """Rehydrate an appointment instance from its dictionary representation.
+
+        Passing the same ``clients`` dictionary while loading many rows makes
+        identical clients share a single :class:`Client` instance.  Rows that
+        reference their client by identifier are resolved through it.
+        """
+
+        raw_client = data["client"]
+        if isinstance(raw_client, str):
+            try:
+                client = (clients or {})[raw_client]
+            except KeyError:
+                raise ValueError(f"unknown client {raw_client!r}") from None
+        elif clients is None:
+            client = Client.from_dict(raw_client)
+        else:
+            key = (raw_client["name"], raw_client.get("email"), raw_client.get("phone"), raw_client.get("identifier"))
+            client = clients.get(key)
+            if client is None:
+                client = clients[key] = Client.from_dict(raw_client)
         return cls(
             identifier=data["identifier"],
-            client=Client.from_dict(data["client"]),
+            client=client,
             service=data["service"],
-            start_time=datetime.fromisoformat(data["start_time"]),
+            start_time=decode_timestamp(data["start_time"]),
             duration_minutes=int(data["duration_minutes"]),
             status=data.get("status", "scheduled"),
             notes=data.get("notes"),
+            resource=data.get("resource"),
         )
 
 
-__all__ = ["Client", "Appointment"]
+__all__ = ["Client", "Appointment", "epoch_microseconds", "new_identifier", "renumbered"]
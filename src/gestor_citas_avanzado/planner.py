@@ -0,0 +1,199 @@
+"""Place batches of booking requests into the free time of a calendar.
+
+:class:`FreeTimeline` keeps the free intervals of one resource (working
+windows minus busy spans) as two sorted lists, so finding the earliest fit
+is a bisection plus a short scan and reserving a slot splits one interval.
+:func:`place` walks the requests earliest deadline first, trying each
+request's preferred windows in order on every resource it accepts.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from time import perf_counter
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .availability import DEFAULT_WORKING_HOURS, Interval
+from .models import Client
+
+
+@dataclass(frozen=True)
+class BookingRequest:
+    """An appointment to be placed by :meth:`Scheduler.auto_schedule`.
+
+    ``windows`` lists acceptable ``(start, end)`` ranges in order of
+    preference; without any the constraints' horizon is used.  ``resources``
+    restricts the employees or rooms it may be booked on.
+    """
+
+    client: Client
+    service: str
+    duration_minutes: int
+    windows: Tuple[Interval, ...] = ()
+    resources: Tuple[Optional[str], ...] = ()
+    notes: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        if self.duration_minutes <= 0:
+            raise ValueError("duration_minutes must be positive")
+        if any(end <= start for start, end in self.windows):
+            raise ValueError("every window must end after it starts")
+
+    @property
+    def duration(self) -> timedelta:
+        return timedelta(minutes=self.duration_minutes)
+
+
+@dataclass(frozen=True)
+class Constraints:
+    """Calendar-wide rules for :meth:`Scheduler.auto_schedule`.
+
+    ``time_budget`` bounds the placement in seconds; requests not reached
+    in time are reported as unplaced.
+    """
+
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    working_hours: Sequence[Tuple[time, time]] = DEFAULT_WORKING_HOURS
+    granularity_minutes: int = 15
+    resources: Tuple[Optional[str], ...] = (None,)
+    time_budget: float = 1.0
+
+    def __post_init__(self) -> None:
+        if self.granularity_minutes <= 0:
+            raise ValueError("granularity_minutes must be positive")
+        if self.start is not None and self.end is not None and self.end <= self.start:
+            raise ValueError("end must be after start")
+
+    def windows(self, request: BookingRequest) -> Tuple[Interval, ...]:
+        """Return the windows ``request`` may be placed in."""
+
+        if request.windows:
+            return request.windows
+        if self.start is None or self.end is None:
+            return ()
+        return ((self.start, self.end),)
+
+    def resources_for(self, request: BookingRequest) -> Tuple[Optional[str], ...]:
+        return request.resources or self.resources
+
+
+class FreeTimeline:
+    """Free intervals of one resource, kept sorted and disjoint."""
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self, busy: Iterable[Interval], windows: Iterable[Interval]) -> None:
+        """Subtract ``busy`` from ``windows``; both must be sorted by start."""
+
+        self.starts: List[datetime] = []
+        self.ends: List[datetime] = []
+        busy_iter = iter(busy)
+        pending = next(busy_iter, None)
+        blocked_until: Optional[datetime] = None
+        for window_start, window_end in windows:
+            cursor = window_start if blocked_until is None else max(window_start, blocked_until)
+            while pending is not None and pending[0] < window_end:
+                if pending[0] > cursor:
+                    self.starts.append(cursor)
+                    self.ends.append(pending[0])
+                if pending[1] > cursor:
+                    cursor = pending[1]
+                if blocked_until is None or pending[1] > blocked_until:
+                    blocked_until = pending[1]
+                pending = next(busy_iter, None)
+            if cursor < window_end:
+                self.starts.append(cursor)
+                self.ends.append(window_end)
+
+    def __iter__(self) -> Iterator[Interval]:
+        return iter(zip(self.starts, self.ends))
+
+    def earliest(
+        self, start: datetime, end: datetime, duration: timedelta, granularity: timedelta
+    ) -> Optional[datetime]:
+        """Return the first grid-aligned start in ``[start, end)`` where ``duration`` fits.
+
+        Starts are aligned to ``granularity`` from midnight of their day.
+        """
+
+        position = bisect_right(self.ends, start)
+        while position < len(self.starts) and self.starts[position] < end:
+            lower = max(self.starts[position], start)
+            midnight = datetime.combine(lower.date(), time(0, 0), lower.tzinfo)
+            slot = midnight - ((midnight - lower) // granularity) * granularity
+            if slot + duration <= min(self.ends[position], end):
+                return slot
+            position += 1
+        return None
+
+    def reserve(self, start: datetime, end: datetime) -> None:
+        """Remove ``[start, end)``, which must lie inside one free interval."""
+
+        position = bisect_right(self.starts, start) - 1
+        if position < 0 or self.ends[position] < end:
+            raise ValueError("the reserved range is not free")
+        free_start, free_end = self.starts[position], self.ends[position]
+        pieces = [(low, high) for low, high in ((free_start, start), (end, free_end)) if low < high]
+        self.starts[position : position + 1] = [low for low, _ in pieces]
+        self.ends[position : position + 1] = [high for _, high in pieces]
+
+
+Placement = Tuple[int, BookingRequest, Optional[str], datetime]
+
+
+def place(
+    requests: Sequence[BookingRequest],
+    timelines: Dict[Optional[str], FreeTimeline],
+    constraints: Constraints,
+) -> Tuple[List[Placement], List[Tuple[int, BookingRequest, str]]]:
+    """Greedily place ``requests`` into ``timelines``, reserving as it goes.
+
+    Requests are taken by the latest end of their windows (earliest deadline
+    first), longer ones first on ties.  Each one goes to the earliest fit in
+    its first window that has room, on whichever accepted resource offers
+    it soonest.  Returns ``(position, request, resource, start)`` placements
+    and ``(position, request, reason)`` for the rest, by input position.
+    """
+
+    granularity = timedelta(minutes=constraints.granularity_minutes)
+    deadline = perf_counter() + constraints.time_budget
+
+    def urgency(position: int) -> Tuple[datetime, timedelta, int]:
+        windows = constraints.windows(requests[position])
+        latest = max((end for _, end in windows), default=datetime.max)
+        return latest, -requests[position].duration, position
+
+    placed: List[Placement] = []
+    unplaced: List[Tuple[int, BookingRequest, str]] = []
+    for position in sorted(range(len(requests)), key=urgency):
+        request = requests[position]
+        windows = constraints.windows(request)
+        if perf_counter() > deadline:
+            unplaced.append((position, request, "time budget exhausted"))
+            continue
+        if not windows:
+            unplaced.append((position, request, "no window to place it in"))
+            continue
+        best: Optional[Tuple[datetime, Optional[str]]] = None
+        for window_start, window_end in windows:
+            for resource in constraints.resources_for(request):
+                slot = timelines[resource].earliest(window_start, window_end, request.duration, granularity)
+                if slot is not None and (best is None or slot < best[0]):
+                    best = slot, resource
+            if best is not None:
+                break
+        if best is None:
+            unplaced.append((position, request, "no free slot in the requested windows"))
+            continue
+        slot, resource = best
+        timelines[resource].reserve(slot, slot + request.duration)
+        placed.append((position, request, resource, slot))
+    placed.sort(key=lambda item: item[0])
+    unplaced.sort(key=lambda item: item[0])
+    return placed, unplaced
+
+
+__all__ = ["BookingRequest", "Constraints", "FreeTimeline", "place"]
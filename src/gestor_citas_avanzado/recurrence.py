@@ -0,0 +1,277 @@
+"""Recurring appointment series stored as a single rule record."""
+
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from math import gcd
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+from .models import Appointment, Client, new_identifier
+from .serialization import decode_timestamp, encode_timestamp
+
+FREQUENCIES: Dict[str, int] = {"daily": 1, "weekly": 7}
+
+
+def _ceil_div(delta: timedelta, step: timedelta) -> int:
+    return -(-delta // step)
+
+
+@dataclass(frozen=True, slots=True)
+class Recurrence:
+    """RRULE-style repetition: every ``interval`` days or weeks.
+
+    A rule must end, after ``count`` occurrences or with the last occurrence
+    starting no later than ``until``; when both are given the first reached
+    wins.
+    """
+
+    frequency: str
+    interval: int = 1
+    count: Optional[int] = None
+    until: Optional[datetime] = None
+
+    def __post_init__(self) -> None:
+        if self.frequency not in FREQUENCIES:
+            raise ValueError(f"unknown frequency {self.frequency!r}")
+        if self.interval < 1:
+            raise ValueError("interval must be positive")
+        if self.count is None and self.until is None:
+            raise ValueError("a recurrence needs a count or an until date")
+        if self.count is not None and self.count < 1:
+            raise ValueError("count must be positive")
+
+    @property
+    def step(self) -> timedelta:
+        """Return the time between two consecutive occurrences."""
+
+        return timedelta(days=FREQUENCIES[self.frequency] * self.interval)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a serialisable representation of the rule."""
+
+        return {
+            "frequency": self.frequency,
+            "interval": self.interval,
+            "count": self.count,
+            "until": encode_timestamp(self.until) if self.until is not None else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Recurrence":
+        """Create a rule from a dictionary."""
+
+        until = data.get("until")
+        return cls(
+            frequency=data["frequency"],
+            interval=int(data.get("interval", 1)),
+            count=data.get("count"),
+            until=decode_timestamp(until) if until is not None else None,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Series:
+    """A recurring booking whose occurrences are generated on demand.
+
+    Occurrence ``k`` starts at ``start_time + k * recurrence.step`` and is
+    identified as ``"<series id>:<k>"``.  Only the occurrences inside a
+    queried window are ever built.  When one is edited or cancelled through
+    :class:`~gestor_citas_avanzado.service.Scheduler` it is stored as a
+    regular appointment and its index is added to ``detached``, so the rule
+    no longer produces it.  A cancelled series produces nothing.
+    """
+
+    client: Client
+    service: str
+    start_time: datetime
+    duration_minutes: int
+    recurrence: Recurrence
+    notes: Optional[str] = None
+    resource: Optional[str] = None
+    status: str = "scheduled"
+    detached: FrozenSet[int] = frozenset()
+    identifier: str = field(default_factory=new_identifier)
+    last: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        setter = object.__setattr__
+        setter(self, "service", sys.intern(self.service))
+        setter(self, "status", sys.intern(self.status))
+        setter(self, "detached", frozenset(self.detached))
+        if self.resource is not None:
+            setter(self, "resource", sys.intern(self.resource))
+        rule = self.recurrence
+        last = rule.count - 1 if rule.count is not None else sys.maxsize
+        if rule.until is not None:
+            last = min(last, (rule.until - self.start_time) // rule.step)
+        if last < 0:
+            raise ValueError("the recurrence ends before its first occurrence")
+        setter(self, "last", last)
+
+    def __len__(self) -> int:
+        return self.last + 1
+
+    @property
+    def length(self) -> timedelta:
+        return timedelta(minutes=self.duration_minutes)
+
+    @property
+    def end_time(self) -> datetime:
+        """Return when the last occurrence ends."""
+
+        return self.start_time + self.last * self.recurrence.step + self.length
+
+    @property
+    def active(self) -> bool:
+        return self.status != "cancelled"
+
+    # ------------------------------------------------------------------
+    # Occurrences
+    # ------------------------------------------------------------------
+    def occurrence_id(self, index: int) -> str:
+        return f"{self.identifier}:{index}"
+
+    def occurrence(self, index: int) -> Appointment:
+        """Build occurrence ``index`` as a regular appointment."""
+
+        if not 0 <= index <= self.last:
+            raise IndexError(index)
+        return Appointment(
+            client=self.client,
+            service=self.service,
+            start_time=self.start_time + index * self.recurrence.step,
+            duration_minutes=self.duration_minutes,
+            notes=self.notes,
+            identifier=self.occurrence_id(index),
+            resource=self.resource,
+        )
+
+    def starting(self, start: datetime, end: datetime) -> range:
+        """Return the indices of occurrences starting in ``[start, end)``."""
+
+        step = self.recurrence.step
+        lower = max(0, _ceil_div(start - self.start_time, step))
+        upper = min(self.last + 1, _ceil_div(end - self.start_time, step))
+        return range(lower, max(lower, upper))
+
+    def overlapping(self, start: datetime, end: datetime) -> range:
+        """Return the indices of occurrences overlapping ``[start, end)``."""
+
+        step = self.recurrence.step
+        try:
+            lower = max(0, (start - self.length - self.start_time) // step + 1)
+        except OverflowError:
+            lower = 0
+        upper = min(self.last + 1, _ceil_div(end - self.start_time, step))
+        return range(lower, max(lower, upper))
+
+    def occurrences(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Iterator[Appointment]:
+        """Yield the occurrences still produced by the rule that start in ``[start, end)``."""
+
+        if not self.active:
+            return
+        indices = self.starting(start or datetime.min, end or datetime.max)
+        for index in indices:
+            if index not in self.detached:
+                yield self.occurrence(index)
+
+    def blocking(self, start: datetime, end: datetime) -> List[str]:
+        """Return identifiers of produced occurrences overlapping ``[start, end)``."""
+
+        if not self.active:
+            return []
+        return [self.occurrence_id(index) for index in self.overlapping(start, end) if index not in self.detached]
+
+    def detach(self, index: int) -> "Series":
+        """Return a copy that no longer produces occurrence ``index``."""
+
+        return replace(self, detached=self.detached | {index})
+
+    # ------------------------------------------------------------------
+    # Serialisation
+    # ------------------------------------------------------------------
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a serialisable representation of the series."""
+
+        return {
+            "identifier": self.identifier,
+            "client": self.client.to_dict(),
+            "service": self.service,
+            "start_time": encode_timestamp(self.start_time),
+            "duration_minutes": self.duration_minutes,
+            "recurrence": self.recurrence.to_dict(),
+            "notes": self.notes,
+            "resource": self.resource,
+            "status": self.status,
+            "detached": sorted(self.detached),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Series":
+        """Rehydrate a series from its dictionary representation."""
+
+        return cls(
+            identifier=data["identifier"],
+            client=Client.from_dict(data["client"]),
+            service=data["service"],
+            start_time=decode_timestamp(data["start_time"]),
+            duration_minutes=int(data["duration_minutes"]),
+            recurrence=Recurrence.from_dict(data["recurrence"]),
+            notes=data.get("notes"),
+            resource=data.get("resource"),
+            status=data.get("status", "scheduled"),
+            detached=frozenset(data.get("detached", ())),
+        )
+
+
+def split_occurrence(identifier: str) -> Optional[Tuple[str, int]]:
+    """Return ``(series id, index)`` for an occurrence identifier, else ``None``."""
+
+    series, separator, index = identifier.rpartition(":")
+    if not separator or not series or not index.isdigit():
+        return None
+    return series, int(index)
+
+
+def series_conflict(first: Series, second: Series) -> Optional[str]:
+    """Return an occurrence of ``second`` overlapping one of ``first``, if any.
+
+    The relative position of two fixed-step progressions repeats every
+    least common multiple of their steps, so only the occurrences of
+    ``first`` in the first two such periods after ``second`` starts are
+    checked, each against ``second`` in constant time.  A chain of overlaps
+    is followed past detached occurrences, which cannot happen more often
+    than there are detached indices.
+    """
+
+    if first.resource != second.resource or not first.active or not second.active:
+        return None
+    step = first.recurrence.step
+    days = step.days
+    other = second.recurrence.step.days
+    period = other // gcd(days, other)
+    try:
+        begin = first.overlapping(second.start_time, datetime.max).start
+    except OverflowError:
+        begin = 0
+    patience = len(first.detached) + len(second.detached) + 1
+    for index in range(begin, min(begin + 2 * period + 1, first.last + 1)):
+        candidate = index
+        for _ in range(patience):
+            if candidate > first.last:
+                break
+            start = first.start_time + candidate * step
+            hits = second.overlapping(start, start + first.length)
+            if not hits:
+                break
+            if candidate not in first.detached:
+                for hit in hits:
+                    if hit not in second.detached:
+                        return second.occurrence_id(hit)
+            candidate += period
+    return None
+
+
+__all__ = ["FREQUENCIES", "Recurrence", "Series", "series_conflict", "split_occurrence"]
@@ -0,0 +1,209 @@
+"""Trigram search index over client details."""
+
+from __future__ import annotations
+
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from . import serialization
+from .models import Appointment, Client
+
+_PHONE_CHARACTERS = set("0123456789+-.() ")
+_SEPARATOR = "\x1f"
+
+
+def normalize_text(value: str) -> str:
+    """Case-fold ``value`` and strip accents so ``"Álvaro"`` matches ``"alvaro"``."""
+
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def normalize_phone(value: str) -> str:
+    """Keep only the digits of a phone number."""
+
+    return "".join(char for char in value if char.isdigit())
+
+
+@lru_cache(maxsize=8192)
+def client_document(client: Client) -> str:
+    """Return the normalized text indexed for ``client``."""
+
+    fields = [normalize_text(client.name)]
+    if client.email:
+        fields.append(normalize_text(client.email))
+    if client.phone:
+        fields.append(normalize_text(client.phone))
+        fields.append(normalize_phone(client.phone))
+    return _SEPARATOR.join(fields)
+
+
+def query_forms(query: str) -> List[str]:
+    """Return the normalized strings to look up for ``query``.
+
+    Phone-like queries are also tried as bare digits.
+    """
+
+    forms = [normalize_text(query).strip()]
+    digits = normalize_phone(query)
+    if len(digits) >= 3 and set(query) <= _PHONE_CHARACTERS and digits != forms[0]:
+        forms.append(digits)
+    return [form for form in forms if form]
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[position : position + 3] for position in range(len(text) - 2)}
+
+
+class ClientSearchIndex:
+    """Map client trigrams to the appointments booked by that client.
+
+    Postings are kept per distinct client document rather than per
+    appointment, so a regular client's hundreds of bookings cost one entry
+    and lookups only touch documents sharing the query's trigrams.
+    """
+
+    def __init__(self, appointments: Iterable[Appointment] = ()) -> None:
+        self._documents: Dict[str, Set[str]] = {}
+        self._grams: Dict[str, Set[str]] = {}
+        self._by_appointment: Dict[str, str] = {}
+        for appointment in appointments:
+            self.add(appointment)
+
+    def __len__(self) -> int:
+        return len(self._by_appointment)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    def add(self, appointment: Appointment) -> None:
+        """Index ``appointment`` under its client, replacing any older entry."""
+
+        self._link(appointment.identifier, client_document(appointment.client))
+
+    def discard(self, identifier: str) -> None:
+        """Forget ``identifier`` if it is indexed."""
+
+        document = self._by_appointment.pop(identifier, None)
+        if document is None:
+            return
+        owners = self._documents[document]
+        owners.discard(identifier)
+        if not owners:
+            del self._documents[document]
+            for gram in _trigrams(document):
+                postings = self._grams[gram]
+                postings.discard(document)
+                if not postings:
+                    del self._grams[gram]
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def find(self, query: str) -> Set[str]:
+        """Return identifiers whose client contains ``query`` as a substring."""
+
+        forms = query_forms(query)
+        if not forms:
+            return set(self._by_appointment)
+        matches: Set[str] = set()
+        for form in forms:
+            for document in self._candidates(form, require_all=True):
+                if form in document:
+                    matches.update(self._documents[document])
+        return matches
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Return ``(identifier, score)`` pairs ranked by similarity to ``query``.
+
+        Substring matches score at least ``1``; other clients score the
+        share of the query's trigrams they contain, so misspellings still
+        surface close matches.
+        """
+
+        scores: Dict[str, float] = {}
+        for form in query_forms(query):
+            grams = _trigrams(form)
+            for document in self._candidates(form, require_all=False):
+                if form in document:
+                    score = 2.0 if document.startswith(form) else 1.0
+                elif grams:
+                    score = len(grams & _trigrams(document)) / len(grams)
+                else:
+                    continue
+                if score > scores.get(document, 0.0):
+                    scores[document] = score
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        results = [
+            (identifier, score)
+            for document, score in ranked
+            for identifier in sorted(self._documents[document])
+        ]
+        return results[:limit] if limit is not None else results
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def save(self, path: Path, signature: Any) -> None:
+        """Write the index next to the database it was built from, replacing ``path`` atomically."""
+
+        from .storage import atomic_write
+
+        payload = {
+            "signature": list(signature) if isinstance(signature, tuple) else signature,
+            "documents": {document: sorted(owners) for document, owners in self._documents.items()},
+        }
+        atomic_write(path, serialization.dumps(payload))
+
+    @classmethod
+    def load(cls, path: Path, signature: Any) -> Optional["ClientSearchIndex"]:
+        """Read an index saved for ``signature``; return ``None`` if it is stale."""
+
+        try:
+            payload = serialization.loads(path.read_bytes())
+        except (OSError, ValueError):
+            return None
+        expected = list(signature) if isinstance(signature, tuple) else signature
+        if payload.get("signature") != expected:
+            return None
+        index = cls()
+        for document, owners in payload["documents"].items():
+            for identifier in owners:
+                index._link(identifier, document)
+        return index
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    def _link(self, identifier: str, document: str) -> None:
+        if self._by_appointment.get(identifier) == document:
+            return
+        self.discard(identifier)
+        self._by_appointment[identifier] = document
+        owners = self._documents.get(document)
+        if owners is None:
+            owners = self._documents[document] = set()
+            for gram in _trigrams(document):
+                self._grams.setdefault(gram, set()).add(document)
+        owners.add(identifier)
+
+    def _candidates(self, form: str, *, require_all: bool) -> Iterable[str]:
+        grams = _trigrams(form)
+        if not grams:
+            # Queries shorter than a trigram scan the distinct clients only.
+            return list(self._documents)
+        postings = sorted((self._grams.get(gram, set()) for gram in grams), key=len)
+        if require_all:
+            result = set(postings[0])
+            for posting in postings[1:]:
+                result &= posting
+            return result
+        union: Set[str] = set()
+        for posting in postings:
+            union |= posting
+        return union
+
+
+__all__ = ["ClientSearchIndex", "client_document", "normalize_phone", "normalize_text", "query_forms"]
@@ -0,0 +1,80 @@
+"""JSON encoding helpers with optional fast backends.
+
+``orjson`` or ``msgspec`` are used when installed; otherwise the standard
+library :mod:`json` module is used.  All backends read and write the same
+documents, so files stay interchangeable between environments.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta
+from typing import Any, Union
+
+try:  # pragma: no cover - depends on the environment
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+try:  # pragma: no cover - depends on the environment
+    import msgspec
+except ImportError:  # pragma: no cover - depends on the environment
+    msgspec = None
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def backend_name() -> str:
+    """Return the name of the JSON library in use."""
+
+    if orjson is not None:
+        return "orjson"
+    if msgspec is not None:
+        return "msgspec"
+    return "json"
+
+
+def dumps(data: Any, *, indent: bool = False) -> bytes:
+    """Encode ``data`` as UTF-8 JSON, pretty-printed when ``indent`` is set."""
+
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    if msgspec is not None:
+        encoded = msgspec.json.encode(data)
+        return msgspec.json.format(encoded, indent=2) if indent else encoded
+    if indent:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode a JSON document."""
+
+    if orjson is not None:
+        return orjson.loads(data)
+    if msgspec is not None:
+        return msgspec.json.decode(data)
+    return json.loads(data)
+
+
+def encode_timestamp(value: datetime, *, epoch: bool = False) -> Union[str, int]:
+    """Encode ``value`` as ISO text, or as integer epoch seconds when possible.
+
+    Epoch integers are only used for naive datetimes without microseconds;
+    anything else keeps the ISO representation so no information is lost.
+    """
+
+    if epoch and value.tzinfo is None and not value.microsecond:
+        return (value - _EPOCH) // timedelta(seconds=1)
+    return value.isoformat()
+
+
+def decode_timestamp(value: Union[str, int]) -> datetime:
+    """Decode a timestamp written by :func:`encode_timestamp`."""
+
+    if isinstance(value, int):
+        return _EPOCH + timedelta(seconds=value)
+    return datetime.fromisoformat(value)
+
+
+__all__ = ["backend_name", "decode_timestamp", "dumps", "encode_timestamp", "loads"]
@@ -0,0 +1,116 @@
+"""Answer command line requests from a long-running process over a Unix socket.
+
+``gestor-citas serve`` keeps one :class:`~gestor_citas_avanzado.service.Scheduler`
+and its parsed calendar resident and listens on ``<database>.sock``.  The
+protocol is one JSON object per line in each direction, so scripts can talk
+to the daemon directly and keep the connection open between requests::
+
+    -> {"argv": ["list", "--limit", "5"], "cwd": "/home/recepcion"}
+    <- {"status": 0, "stdout": "...", "stderr": ""}
+
+``argv`` holds the same arguments the CLI accepts; relative paths in them
+are resolved against ``cwd``.  :func:`forward` is the client half used by
+the CLI when it finds a daemon listening for its database.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import socketserver
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Reply = Tuple[int, str, str]
+Handler = Callable[[List[str], str], Reply]
+
+# Seconds :func:`forward` waits for the daemon before running the command locally instead.
+TIMEOUT = 30.0
+
+
+def socket_path(database: Path) -> Path:
+    """Return the socket a daemon serving ``database`` listens on."""
+
+    return Path(str(database) + ".sock")
+
+
+class CommandServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded Unix socket server running requests one at a time through ``handler``.
+
+    Connections are read and written concurrently, but ``handler`` is
+    called under a lock because the resident scheduler is not thread-safe.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path: Path, handler: Handler) -> None:
+        self.path = Path(path)
+        self.handler = handler
+        self.mutex = threading.Lock()
+        if self.path.exists():
+            if forward(self.path, [], "", timeout=1.0) is not None:
+                raise OSError(f"a server is already listening on {self.path}")
+            self.path.unlink()
+        super().__init__(str(self.path), _RequestHandler)
+
+    def execute(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        argv, cwd = request.get("argv", []), request.get("cwd") or os.getcwd()
+        if not argv:
+            return {"status": 0, "stdout": "", "stderr": ""}
+        with self.mutex:
+            status, stdout, stderr = self.handler([str(value) for value in argv], cwd)
+        return {"status": status, "stdout": stdout, "stderr": stderr}
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.path.unlink(missing_ok=True)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                response = {"status": 2, "stdout": "", "stderr": "Error: malformed request\n"}
+            else:
+                response = self.server.execute(request)  # type: ignore[attr-defined]
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+def forward(path: Path, argv: List[str], cwd: str, *, timeout: Optional[float] = TIMEOUT) -> Optional[Reply]:
+    """Send one request to the daemon at ``path``.
+
+    Returns ``(status, stdout, stderr)``, or ``None`` when no daemon is
+    available there: nothing listening (including a stale socket file left
+    behind), no complete reply within ``timeout`` seconds, or a reply that
+    is not a well-formed response.
+    """
+
+    if not hasattr(socket, "AF_UNIX") or not Path(path).exists():
+        return None
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    connection.settimeout(timeout)
+    try:
+        connection.connect(str(path))
+        with connection.makefile("rwb") as stream:
+            stream.write(json.dumps({"argv": argv, "cwd": cwd}).encode("utf-8") + b"\n")
+            stream.flush()
+            line = stream.readline()
+        response = json.loads(line) if line.endswith(b"\n") else None
+    except (OSError, ValueError):
+        return None
+    finally:
+        connection.close()
+    if not isinstance(response, dict):
+        return None
+    status, stdout, stderr = response.get("status"), response.get("stdout"), response.get("stderr")
+    if type(status) is not int or not isinstance(stdout, str) or not isinstance(stderr, str):
+        return None
+    return status, stdout, stderr
+
+
+__all__ = ["TIMEOUT", "CommandServer", "forward", "socket_path"]
@@ -2,47 +2,279 @@
 
 from __future__ import annotations
 
-from dataclasses import replace
-from datetime import datetime
-from typing import Iterable, List, Optional
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime, time, timedelta
+from heapq import merge
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
-from .models import Appointment, Client
-from .storage import AppointmentStorage
+from .availability import DEFAULT_WORKING_HOURS, Interval, day_range, free_slots, working_windows
+from .changes import Change, ChangeEvent, ChangeLog, change_kind, number_changes
+from .clients import ClientRegistry
+from .index import PartitionedIndex
+from .metrics import count, span, timed
+from .models import Appointment, Client, renumbered
+from .recurrence import Recurrence, Series, series_conflict, split_occurrence
+from .search import ClientSearchIndex, client_document, query_forms
+from .storage import AppointmentStorage, ConcurrentModificationError
+
+if TYPE_CHECKING:
+    from .audit import AuditReport
+    from .columnar import ColumnarSnapshot
+    from .planner import BookingRequest, Constraints
 
 
 class AppointmentNotFoundError(KeyError):
     """Raised when an appointment identifier is unknown."""
 
 
+class ClientNotFoundError(KeyError):
+    """Raised when a client identifier is unknown."""
+
+
+class SeriesNotFoundError(KeyError):
+    """Raised when a recurring series identifier is unknown."""
+
+
 class SchedulingConflictError(ValueError):
     """Raised when two appointments overlap in time."""
 
 
+@dataclass
+class BulkResult:
+    """Outcome of :meth:`Scheduler.bulk_create`.
+
+    ``rejected`` holds ``(position, appointment, reason)`` tuples where
+    ``position`` is the zero-based index of the entry in the input.
+    """
+
+    created: List[Appointment] = field(default_factory=list)
+    rejected: List[Tuple[int, Appointment, str]] = field(default_factory=list)
+
+
+@dataclass
+class ScheduleResult:
+    """Outcome of :meth:`Scheduler.auto_schedule`.
+
+    ``placed`` holds ``(position, appointment)`` pairs and ``unplaced``
+    holds ``(position, request, reason)`` tuples, where ``position`` is the
+    zero-based index of the request in the input.  With ``dry_run`` the
+    placed appointments were not stored.
+    """
+
+    placed: List[Tuple[int, Appointment]] = field(default_factory=list)
+    unplaced: List[Tuple[int, BookingRequest, str]] = field(default_factory=list)
+    dry_run: bool = False
+
+
+class _Calendar:
+    """Parsed appointments together with the indexes built over them.
+
+    The client registry and search index are only built when first needed.
+    """
+
+    def __init__(
+        self,
+        appointments: Iterable[Appointment],
+        index: Optional[PartitionedIndex] = None,
+        search: Optional[ClientSearchIndex] = None,
+        clients: Optional[ClientRegistry] = None,
+    ) -> None:
+        self.appointments: Dict[str, Appointment] = {
+            appointment.identifier: appointment for appointment in appointments
+        }
+        if index is None:
+            with span("scheduler.index"):
+                index = PartitionedIndex(self.appointments.values())
+        self.index = index
+        self.search = search
+        self.clients = clients
+        self._ordered: Optional[List[Appointment]] = None
+
+    def registry(self) -> ClientRegistry:
+        if self.clients is None:
+            self.clients = ClientRegistry(self.appointments.values())
+        return self.clients
+
+    def ordered(self) -> List[Appointment]:
+        if self._ordered is None:
+            with span("scheduler.sort"):
+                self._ordered = sorted(self.appointments.values(), key=lambda item: item.start_time)
+        return self._ordered
+
+    def put(self, appointment: Appointment) -> None:
+        self.appointments[appointment.identifier] = appointment
+        self.index.add(appointment)
+        if self.search is not None:
+            self.search.add(appointment)
+        if self.clients is not None:
+            self.clients.add(appointment)
+        self._ordered = None
+
+
+class _Sweep:
+    """Overlap state of one resource while :meth:`Scheduler.bulk_create` walks its input."""
+
+    __slots__ = ("existing", "position", "existing_end", "existing_owner", "accepted_end", "accepted_owner")
+
+    def __init__(self) -> None:
+        self.existing: List[Appointment] = []
+        self.position = 0
+        self.existing_end: Optional[datetime] = None
+        self.existing_owner = ""
+        self.accepted_end: Optional[datetime] = None
+        self.accepted_owner = ""
+
+    def blocker(self, candidate: Appointment) -> str:
+        """Return the identifier ``candidate`` overlaps, or ``""``; inputs must arrive by start."""
+
+        start, end = candidate.start_time, candidate.end_time
+        existing = self.existing
+        while self.position < len(existing) and existing[self.position].start_time <= start:
+            finish = existing[self.position].end_time
+            if self.existing_end is None or finish > self.existing_end:
+                self.existing_end, self.existing_owner = finish, existing[self.position].identifier
+            self.position += 1
+        if self.existing_end is not None and self.existing_end > start:
+            return self.existing_owner
+        if self.position < len(existing) and existing[self.position].start_time < end:
+            return existing[self.position].identifier
+        if self.accepted_end is not None and self.accepted_end > start:
+            return self.accepted_owner
+        return ""
+
+    def accept(self, candidate: Appointment) -> None:
+        if self.accepted_end is None or candidate.end_time > self.accepted_end:
+            self.accepted_end, self.accepted_owner = candidate.end_time, candidate.identifier
+
+
 class Scheduler:
-    """Coordinate appointment operations on top of a storage backend."""
+    """Coordinate appointment operations on top of a storage backend.
+
+    Backends that implement ``get``, ``find_between``, ``upcoming``,
+    ``find_for_client``, ``overlapping`` and the client lookups
+    ``find_by_client``, ``clients`` and ``resolve_client`` (such as
+    :class:`~gestor_citas_avanzado.storage.SQLiteStorage`) answer those
+    queries themselves instead of having every row loaded and filtered here.
+
+    Recurring series live in the backend's ``series`` store as one rule
+    each; their occurrences are merged into query results only for the
+    window being asked about.
+
+    Backends offering a ``columns`` snapshot (a JSON
+    :class:`~gestor_citas_avanzado.storage.AppointmentStorage` opened with
+    ``columnar=True``) answer listings, time-window queries and
+    :meth:`resources` from it, decoding only the rows returned, until the
+    calendar has been loaded for a write.
+
+    With ``cache=True`` the parsed appointments stay in memory between calls
+    and are only reloaded when the storage fingerprint changes, i.e. when
+    another process wrote the file.  Appointments returned in this mode are
+    shared with the cache and should be treated as read-only.
+
+    Every mutation is published as a :class:`~gestor_citas_avanzado.changes.ChangeEvent`
+    to the callbacks registered with :meth:`subscribe` and, for databases
+    recording changes (see ``change_log`` in the storage backends), to the
+    backend's ``changes`` log, which :meth:`changes_since` reads back and
+    :meth:`trim_changes` truncates.
+    """
 
-    def __init__(self, storage: AppointmentStorage) -> None:
+    def __init__(self, storage: AppointmentStorage, *, cache: bool = False) -> None:
         self._storage = storage
+        self._cache = cache
+        self._pushdown = callable(getattr(storage, "overlapping", None))
+        self._calendar: Optional[_Calendar] = None
+        self._signature: Optional[object] = None
+        self._batch: Optional[Dict[str, Appointment]] = None
+        self._series_store = getattr(storage, "series", None)
+        self._series_batch: Optional[Dict[str, Series]] = None
+        self._change_log = getattr(storage, "changes", None)
+        self._pending_changes: Optional[List[Change]] = None
+        self._subscribers: List[Callable[[ChangeEvent], None]] = []
+        self._sequence = 0
 
     # ------------------------------------------------------------------
     # Retrieval helpers
     # ------------------------------------------------------------------
-    def list_appointments(self) -> List[Appointment]:
-        """Return all appointments ordered by start time."""
+    @timed("scheduler.list_appointments")
+    def list_appointments(self, *, resource: Optional[str] = None) -> List[Appointment]:
+        """Return all appointments ordered by start time, optionally for one ``resource``.
 
-        return sorted(self._storage.load(), key=lambda appointment: appointment.start_time)
+        Every occurrence of the recurring series is included.
+        """
+
+        columns = self._columns()
+        if columns is not None:
+            stored = list(columns.iter_appointments(resource=resource))
+        else:
+            stored = self._current().ordered()
+        return _on_resource(self._with_occurrences(stored), resource)
+
+    def iter_appointments(
+        self,
+        *,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        resource: Optional[str] = None,
+    ) -> Iterator[Appointment]:
+        """Yield appointments starting in ``[start, end)`` ordered by start time.
+
+        Backends with their own ``iter_appointments`` (such as
+        :class:`~gestor_citas_avanzado.storage.PartitionedStorage`) stream the
+        rows, so only the part of the calendar inside the window is read.
+        """
+
+        stream = getattr(self._storage, "iter_appointments", None)
+        columns = self._columns()
+        if stream is not None and self._batch is None:
+            source: Iterable[Appointment] = stream(start, end)
+        elif columns is not None:
+            source = columns.iter_appointments(start, end, resource)
+        else:
+            source = (
+                appointment
+                for appointment in self._current().ordered()
+                if (start is None or appointment.start_time >= start) and (end is None or appointment.start_time < end)
+            )
+        occurrences = [series.occurrences(start, end) for series in self._live_series()]
+        if occurrences:
+            source = merge(source, *occurrences, key=_start_time)
+        for appointment in source:
+            if resource is None or appointment.resource == resource:
+                yield appointment
 
+    @timed("scheduler.get_appointment")
     def get_appointment(self, identifier: str) -> Appointment:
         """Retrieve a single appointment or raise :class:`AppointmentNotFoundError`."""
 
-        for appointment in self._storage.load():
-            if appointment.identifier == identifier:
-                return appointment
-        raise AppointmentNotFoundError(identifier)
+        if self._pushdown:
+            found = self._storage.get(identifier)
+        elif self._cache or self._batch is not None or not hasattr(self._storage, "find"):
+            found = self._current().appointments.get(identifier)
+        else:
+            # Only the matching row is hydrated into an Appointment.
+            found = self._storage.find(identifier)
+        if found is None:
+            found = self._occurrence(identifier)[1]
+        return found
 
     # ------------------------------------------------------------------
     # Creation and mutation
     # ------------------------------------------------------------------
+    @timed("scheduler.create_appointment")
     def create_appointment(
         self,
         *,
@@ -51,8 +283,9 @@ class Scheduler:
         start_time: datetime,
         duration_minutes: int,
         notes: Optional[str] = None,
+        resource: Optional[str] = None,
     ) -> Appointment:
-        """Create and persist a new appointment."""
+        """Create and persist a new appointment on ``resource``."""
 
         appointment = Appointment(
             client=client,
@@ -60,13 +293,27 @@ class Scheduler:
             start_time=start_time,
             duration_minutes=duration_minutes,
             notes=notes,
+            resource=resource,
         )
-        appointments = self.list_appointments()
-        self._ensure_no_conflict(appointments, appointment)
-        appointments.append(appointment)
-        self._save(appointments)
+        with self._transaction():
+            if self._pushdown:
+                registered = self._resolve_client(None, client)
+                if registered is not client:
+                    appointment = replace(appointment, client=registered)
+                self._ensure_no_conflict(self._storage, appointment)
+                self._storage.append(appointment)
+                self._record("appointment", None, appointment)
+                return appointment
+            calendar = self._current()
+            registered = self._resolve_client(calendar, client)
+            if registered.identifier != client.identifier:
+                appointment = replace(appointment, client=registered)
+            self._ensure_no_conflict(calendar.index, appointment)
+            self._save(calendar, appointment)
+            self._record("appointment", None, appointment)
         return appointment
 
+    @timed("scheduler.update_appointment")
     def update_appointment(
         self,
         identifier: str,
@@ -77,118 +324,951 @@ class Scheduler:
         duration_minutes: Optional[int] = None,
         notes: Optional[str] = None,
         status: Optional[str] = None,
+        resource: Optional[str] = None,
     ) -> Appointment:
-        """Update an existing appointment."""
+        """Update an existing appointment, moving it to ``resource`` if given.
 
-        appointments = self.list_appointments()
-        for index, appointment in enumerate(appointments):
-            if appointment.identifier != identifier:
-                continue
+        Occurrences of a recurring series can be updated too; the edited one
+        is stored on its own and detached from the series.
+        """
 
-            updated = replace(
-                appointment,
-                client=client or appointment.client,
-                service=service or appointment.service,
-                start_time=start_time or appointment.start_time,
-                duration_minutes=duration_minutes or appointment.duration_minutes,
-                notes=notes if notes is not None else appointment.notes,
-                status=status or appointment.status,
-            )
-            self._ensure_no_conflict(appointments, updated, ignore_identifier=identifier)
-            appointments[index] = updated
-            self._save(appointments)
-            return updated
-
-        raise AppointmentNotFoundError(identifier)
+        changes = dict(
+            client=client,
+            service=service,
+            start_time=start_time,
+            duration_minutes=duration_minutes,
+            notes=notes,
+            status=status,
+            resource=resource,
+        )
+        with self._transaction():
+            if self._pushdown:
+                if client is not None:
+                    changes["client"] = self._resolve_client(None, client)
+                existing, series = self._existing(None, identifier)
+                updated = self._apply_changes(existing, **changes)
+                self._ensure_no_conflict(self._storage, updated, ignore_identifier=identifier)
+                self._storage.append(updated)
+                self._record("appointment", existing, updated)
+                self._put_series(series)
+                return updated
+            calendar = self._current()
+            if client is not None:
+                changes["client"] = self._resolve_client(calendar, client)
+            existing, series = self._existing(calendar, identifier)
+            updated = self._apply_changes(existing, **changes)
+            self._ensure_no_conflict(calendar.index, updated, ignore_identifier=identifier)
+            self._save(calendar, updated)
+            self._record("appointment", existing, updated)
+            self._put_series(series)
+        return updated
 
+    @timed("scheduler.cancel_appointment")
     def cancel_appointment(self, identifier: str) -> Appointment:
-        """Mark an appointment as cancelled."""
+        """Mark an appointment, or one occurrence of a series, as cancelled."""
 
         return self._update_status(identifier, "cancelled")
 
+    @timed("scheduler.complete_appointment")
     def complete_appointment(self, identifier: str) -> Appointment:
         """Mark an appointment as completed."""
 
         return self._update_status(identifier, "completed")
 
+    @timed("scheduler.bulk_create")
+    def bulk_create(self, appointments: Iterable[Appointment]) -> BulkResult:
+        """Store many appointments at once, rejecting the ones that conflict.
+
+        The input is sorted once and checked against the existing active
+        appointments on the same resource, and against the entries accepted
+        before it, in a single sweep.  Rejected rows do not abort the batch; everything accepted is
+        persisted with one save at the end.
+        """
+
+        entries = list(appointments)
+        result = BulkResult()
+        with self.batch():
+            calendar = self._current()
+            sweeps: Dict[Optional[str], _Sweep] = {}
+            for item in calendar.ordered():
+                if item.status != "cancelled":
+                    sweeps.setdefault(item.resource, _Sweep()).existing.append(item)
+            seen = set(calendar.appointments)
+            for order in sorted(range(len(entries)), key=lambda item: entries[item].start_time):
+                candidate = entries[order]
+                if candidate.identifier in seen:
+                    result.rejected.append((order, candidate, "duplicate identifier %s" % candidate.identifier))
+                    continue
+                if candidate.status != "cancelled":
+                    sweep = sweeps.setdefault(candidate.resource, _Sweep())
+                    blocker = sweep.blocker(candidate) or self._series_blocker(candidate)
+                    if blocker:
+                        result.rejected.append((order, candidate, "The appointment overlaps with %s" % blocker))
+                        continue
+                    sweep.accept(candidate)
+                seen.add(candidate.identifier)
+                result.created.append(candidate)
+
+            if self._pushdown:
+                self._storage.extend(result.created)
+            else:
+                for candidate in result.created:
+                    self._save(calendar, candidate)
+            for candidate in result.created:
+                self._record("appointment", None, candidate)
+        result.rejected.sort(key=lambda item: item[0])
+        return result
+
+    @timed("scheduler.resources")
+    def resources(self) -> List[str]:
+        """Return the names of the resources that have appointments."""
+
+        columns = self._columns()
+        if self._pushdown:
+            named = set(self._storage.resources())
+        elif columns is not None:
+            named = columns.resources()
+        else:
+            named = {appointment.resource for appointment in self._current().appointments.values()}
+        named.update(series.resource for series in self._live_series())
+        named.discard(None)
+        return sorted(named)
+
+    # ------------------------------------------------------------------
+    # Recurring series
+    # ------------------------------------------------------------------
+    @timed("scheduler.create_series")
+    def create_series(
+        self,
+        *,
+        client: Client,
+        service: str,
+        start_time: datetime,
+        duration_minutes: int,
+        recurrence: Recurrence,
+        notes: Optional[str] = None,
+        resource: Optional[str] = None,
+    ) -> Series:
+        """Create a recurring series stored as a single rule record.
+
+        The series is checked against the appointments and other series on
+        ``resource`` without expanding every occurrence.
+        """
+
+        if self._series_store is None:
+            raise TypeError(f"{type(self._storage).__name__} cannot store recurring series")
+        series = Series(
+            client=client,
+            service=service,
+            start_time=start_time,
+            duration_minutes=duration_minutes,
+            recurrence=recurrence,
+            notes=notes,
+            resource=resource,
+        )
+        with self._transaction():
+            if self._pushdown:
+                source: Any = self._storage
+                registered = self._resolve_client(None, client)
+            else:
+                calendar = self._current()
+                source = calendar.index
+                registered = self._resolve_client(calendar, client)
+            if registered.identifier != client.identifier:
+                series = replace(series, client=registered)
+            self._ensure_series_fits(source, series)
+            self._put_series(series)
+        return series
+
+    @timed("scheduler.list_series")
+    def list_series(self) -> List[Series]:
+        """Return every recurring series ordered by first occurrence."""
+
+        return sorted(self._all_series().values(), key=lambda series: series.start_time)
+
+    @timed("scheduler.get_series")
+    def get_series(self, series_id: str) -> Series:
+        """Retrieve a series or raise :class:`SeriesNotFoundError`."""
+
+        series = self._all_series().get(series_id)
+        if series is None:
+            raise SeriesNotFoundError(series_id)
+        return series
+
+    @timed("scheduler.cancel_series")
+    def cancel_series(self, series_id: str) -> Series:
+        """Cancel every remaining occurrence of a series.
+
+        Occurrences already edited on their own are left untouched.
+        """
+
+        with self._transaction():
+            cancelled = replace(self.get_series(series_id), status="cancelled")
+            self._put_series(cancelled)
+        return cancelled
+
+    # ------------------------------------------------------------------
+    # Clients
+    # ------------------------------------------------------------------
+    @timed("scheduler.list_clients")
+    def list_clients(self) -> List[Client]:
+        """Return every client with at least one appointment, ordered by name."""
+
+        if self._pushdown:
+            clients = {client.identifier: client for client in self._storage.clients()}
+        else:
+            clients = {client.identifier: client for client in self._current().registry()}
+        for series in self._live_series():
+            clients.setdefault(series.client.identifier, series.client)
+        return sorted(clients.values(), key=lambda client: (client.name, client.identifier))
+
+    @timed("scheduler.get_client")
+    def get_client(self, client_id: str) -> Client:
+        """Retrieve a client or raise :class:`ClientNotFoundError`."""
+
+        if self._pushdown:
+            booked = self._storage.find_by_client(client_id)
+            client = booked[0].client if booked else None
+        else:
+            client = self._current().registry().get(client_id)
+        for series in self._live_series():
+            if client is None and series.client.identifier == client_id:
+                client = series.client
+        if client is None:
+            raise ClientNotFoundError(client_id)
+        return client
+
+    @timed("scheduler.appointments_for_client")
+    def appointments_for_client(self, client_id: str) -> List[Appointment]:
+        """Return the appointments booked by ``client_id`` ordered by start time."""
+
+        series = [item for item in self._live_series() if item.client.identifier == client_id]
+        return self._with_occurrences(self._stored_for_client(client_id), series=series)
+
+    @timed("scheduler.update_client")
+    def update_client(
+        self,
+        client_id: str,
+        *,
+        name: Optional[str] = None,
+        email: Optional[str] = None,
+        phone: Optional[str] = None,
+    ) -> Client:
+        """Change a client's details on all of their appointments.
+
+        The client keeps ``client_id``, so later lookups still find every
+        booking made under the old details.
+        """
+
+        with self.batch():
+            booked = self._stored_for_client(client_id)
+            series = [item for item in self._all_series().values() if item.client.identifier == client_id]
+            if not booked and not series:
+                raise ClientNotFoundError(client_id)
+            current = booked[0].client if booked else series[0].client
+            updated = Client(
+                name=name or current.name,
+                email=email if email is not None else current.email,
+                phone=phone if phone is not None else current.phone,
+                identifier=client_id,
+            )
+            changed = [replace(appointment, client=updated) for appointment in booked]
+            if self._pushdown:
+                self._storage.extend(changed)
+            else:
+                calendar = self._current()
+                for appointment in changed:
+                    self._save(calendar, appointment)
+            for before, after in zip(booked, changed):
+                self._record("appointment", before, after)
+            for item in series:
+                self._put_series(replace(item, client=updated))
+        return updated
+
+    @contextmanager
+    def batch(self) -> Iterator["Scheduler"]:
+        """Group several mutations so they share one load and one save.
+
+        Changes made inside the block are validated against each other as
+        usual but only written when the block exits without an exception;
+        otherwise they are discarded.  Nested blocks join the outer one.  The
+        storage write lock is held for the whole block.
+        """
+
+        if self._series_batch is not None:
+            yield self
+            return
+
+        with self._transaction():
+            calendar = None if self._pushdown else self._current()
+            self._series_batch = {}
+            if calendar is not None:
+                self._batch = {}
+            try:
+                yield self
+            except BaseException:
+                self._batch = self._series_batch = None
+                self._calendar = None
+                raise
+            changed, self._batch = self._batch, None
+            series, self._series_batch = self._series_batch, None
+            if changed:
+                self._persist(calendar, list(changed.values()))
+            if series:
+                self._series_store.put(series.values())
+
+    # ------------------------------------------------------------------
+    # Change feed
+    # ------------------------------------------------------------------
+    def subscribe(self, callback: Callable[[ChangeEvent], None]) -> Callable[[], None]:
+        """Call ``callback`` with every change made through this scheduler; return an unsubscribe function.
+
+        Callbacks run synchronously once the change is stored and the write
+        lock released (for a :meth:`batch`, when the batch is written).
+        Every subscriber is called even if one raises; the first exception
+        is then re-raised to the caller that made the change, which stays
+        stored.
+        """
+
+        self._subscribers.append(callback)
+
+        def unsubscribe() -> None:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    @property
+    def change_log(self) -> Optional[ChangeLog]:
+        """The storage's change log, ``None`` while the database records no changes."""
+
+        return getattr(self._storage, "changes", None)
+
+    @timed("scheduler.changes_since")
+    def changes_since(self, sequence: int = 0, *, limit: Optional[int] = None) -> List[ChangeEvent]:
+        """Return the stored change events numbered after ``sequence``, oldest first.
+
+        Consumers keep the ``sequence`` of the last event they processed and
+        pass it back to receive only what changed since, from any process.
+        """
+
+        return self._require_change_log().since(sequence, limit)
+
+    def trim_changes(self, sequence: int) -> int:
+        """Drop the stored change events numbered up to ``sequence``; return how many were dropped.
+
+        Call it with the last sequence every consumer has processed to keep
+        the log from growing without bound.  The newest event is always kept.
+        """
+
+        change_log = self._require_change_log()
+        with self._transaction():
+            return change_log.trim(sequence)
+
+    def _require_change_log(self) -> ChangeLog:
+        self._change_log = self.change_log
+        if self._change_log is None:
+            raise TypeError(f"{type(self._storage).__name__} does not record changes (open it with change_log=True)")
+        return self._change_log
+
     # ------------------------------------------------------------------
     # Query helpers
     # ------------------------------------------------------------------
-    def upcoming(self, *, after: Optional[datetime] = None) -> List[Appointment]:
+    @timed("scheduler.upcoming")
+    def upcoming(self, *, after: Optional[datetime] = None, resource: Optional[str] = None) -> List[Appointment]:
         """Return scheduled appointments taking place after ``after``."""
 
         threshold = after or datetime.utcnow()
-        return [appointment for appointment in self.list_appointments() if appointment.start_time >= threshold]
+        columns = self._columns()
+        if self._pushdown or columns is not None:
+            stored = self._storage.upcoming(threshold) if columns is None else columns.upcoming(threshold, resource)
+            return _on_resource(self._with_occurrences(stored, threshold, datetime.max), resource)
+        return [
+            appointment
+            for appointment in self.list_appointments(resource=resource)
+            if appointment.start_time >= threshold
+        ]
 
+    @timed("scheduler.find_for_client")
     def find_for_client(self, query: str) -> List[Appointment]:
-        """Return appointments whose client matches the query string."""
+        """Return appointments whose client matches the query string.
 
-        lowered = query.lower()
-        return [
-            appointment
-            for appointment in self.list_appointments()
-            if lowered in appointment.client.name.lower()
-            or (appointment.client.email and lowered in appointment.client.email.lower())
-            or (appointment.client.phone and lowered in appointment.client.phone.lower())
+        Matching ignores case and accents, and phone numbers match whatever
+        their spacing or punctuation.
+        """
+
+        forms = query_forms(query)
+        series = [
+            item
+            for item in self._live_series()
+            if not forms or any(form in client_document(item.client) for form in forms)
         ]
+        if self._pushdown:
+            return self._with_occurrences(self._storage.find_for_client(query), series=series)
+        calendar = self._current()
+        matches = self._client_index(calendar).find(query)
+        stored = sorted(
+            (calendar.appointments[identifier] for identifier in matches),
+            key=lambda item: item.start_time,
+        )
+        return self._with_occurrences(stored, series=series)
+
+    @timed("scheduler.search_clients")
+    def search_clients(self, query: str, limit: Optional[int] = None) -> List[Appointment]:
+        """Return appointments ranked by how closely their client matches ``query``.
+
+        Clients containing ``query`` come first (those starting with it ahead
+        of the rest), followed by partial matches such as misspellings.
+        """
 
-    def find_between(self, start: datetime, end: datetime) -> List[Appointment]:
+        calendar = self._current()
+        ranked = self._client_index(calendar).search(query, limit)
+        return [calendar.appointments[identifier] for identifier, _ in ranked]
+
+    @timed("scheduler.find_between")
+    def find_between(
+        self, start: datetime, end: datetime, *, resource: Optional[str] = None
+    ) -> List[Appointment]:
         """Return appointments starting in the provided time window."""
 
         if start > end:
             raise ValueError("start must be before end")
-        return [
-            appointment
-            for appointment in self.list_appointments()
-            if start <= appointment.start_time < end and appointment.status != "cancelled"
-        ]
+        columns = self._columns()
+        if self._pushdown:
+            stored = _on_resource(self._storage.find_between(start, end), resource)
+        elif columns is not None:
+            stored = columns.find_between(start, end, resource)
+        else:
+            calendar = self._current()
+            index = calendar.index if resource is None else calendar.index.partition(resource)
+            stored = [calendar.appointments[identifier] for identifier in index.starting_between(start, end)]
+        series = [item for item in self._live_series() if resource is None or item.resource == resource]
+        return self._with_occurrences(stored, start, end, series=series)
+
+    @timed("scheduler.available_slots")
+    def available_slots(
+        self,
+        day_or_range: Union[date, Tuple[datetime, datetime]],
+        duration_minutes: int,
+        granularity_minutes: int = 15,
+        working_hours: Sequence[Tuple[time, time]] = DEFAULT_WORKING_HOURS,
+        *,
+        resource: Optional[str] = None,
+    ) -> List[datetime]:
+        """Return start times where an appointment of ``duration_minutes`` fits.
+
+        ``day_or_range`` is either a calendar day or a ``(start, end)`` pair.
+        Busy intervals of ``resource`` are fetched from its interval index
+        (or the storage backend) once and merged with the working windows in
+        a single pass.
+        """
+
+        if isinstance(day_or_range, tuple):
+            start, end = day_or_range
+        elif isinstance(day_or_range, datetime):
+            start, end = day_range(day_or_range.date())
+        else:
+            start, end = day_range(day_or_range)
+        if start > end:
+            raise ValueError("start must be before end")
+        return free_slots(
+            self._busy(start, end, resource),
+            working_windows(start, end, working_hours),
+            timedelta(minutes=duration_minutes),
+            timedelta(minutes=granularity_minutes),
+        )
+
+    @timed("scheduler.auto_schedule")
+    def auto_schedule(
+        self,
+        requests: Iterable[BookingRequest],
+        constraints: Optional[Constraints] = None,
+        *,
+        dry_run: bool = False,
+    ) -> ScheduleResult:
+        """Place a batch of booking requests around the existing bookings.
+
+        The free time of every resource the requests may use is computed
+        once over the span of their windows, then requests are placed
+        greedily, earliest deadline first (see
+        :func:`~gestor_citas_avanzado.planner.place`).  Everything placed is
+        stored with one save unless ``dry_run`` is set; requests that do not
+        fit, or are not reached within ``constraints.time_budget``, are
+        reported in :attr:`ScheduleResult.unplaced`.
+        """
+
+        from .planner import Constraints, FreeTimeline, place
+
+        entries = list(requests)
+        constraints = constraints or Constraints()
+        windows = [window for entry in entries for window in constraints.windows(entry)]
+        result = ScheduleResult(dry_run=dry_run)
+        with self.batch():
+            timelines: Dict[Optional[str], FreeTimeline] = {}
+            if windows:
+                start = min(window_start for window_start, _ in windows)
+                end = max(window_end for _, window_end in windows)
+                for resource in {resource for entry in entries for resource in constraints.resources_for(entry)}:
+                    timelines[resource] = FreeTimeline(
+                        self._busy(start, end, resource), working_windows(start, end, constraints.working_hours)
+                    )
+            placements, result.unplaced = place(entries, timelines, constraints)
+            result.placed = [
+                (
+                    position,
+                    Appointment(
+                        client=request.client,
+                        service=request.service,
+                        start_time=slot,
+                        duration_minutes=request.duration_minutes,
+                        notes=request.notes,
+                        resource=resource,
+                    ),
+                )
+                for position, request, resource, slot in placements
+            ]
+            if not dry_run:
+                stored = self.bulk_create(appointment for _, appointment in result.placed)
+                refused = {appointment.identifier: reason for _, appointment, reason in stored.rejected}
+                if refused:
+                    result.unplaced += [
+                        (position, entries[position], refused[appointment.identifier])
+                        for position, appointment in result.placed
+                        if appointment.identifier in refused
+                    ]
+                    result.unplaced.sort(key=lambda item: item[0])
+                    result.placed = [item for item in result.placed if item[1].identifier not in refused]
+        return result
+
+    @timed("scheduler.audit")
+    def audit(self, *, workers: Optional[int] = None, shard_by: str = "day") -> AuditReport:
+        """Check every stored appointment and series occurrence for overlaps and malformed rows.
+
+        Backends exposing ``records`` are checked from their raw rows, so
+        rows the scheduler could not even load are reported instead of
+        aborting the audit.  The work is spread over ``workers`` processes
+        for large calendars; see :func:`~gestor_citas_avanzado.audit.audit`.
+        """
+
+        from .audit import audit
+
+        records_of = getattr(self._storage, "records", None)
+        records: List[Any] = records_of() if records_of is not None else list(self._storage.load())
+        for series in self._live_series():
+            records.extend(series.occurrences())
+        return audit(records, workers=workers, shard_by=shard_by)
 
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
+    def _busy(self, start: datetime, end: datetime, resource: Optional[str]) -> Iterator[Interval]:
+        """Return the busy spans of ``resource`` overlapping ``[start, end)``, series included, by start."""
+
+        source = self._storage if self._pushdown else self._current().index
+        recurring = [
+            [(occurrence.start_time, occurrence.end_time) for occurrence in self._occurrences_on(series, start, end)]
+            for series in self._live_series()
+            if series.resource == resource
+        ]
+        return merge(source.spans(start, end, resource), *recurring)
+
     def _update_status(self, identifier: str, status: str) -> Appointment:
-        appointments = self.list_appointments()
-        for index, appointment in enumerate(appointments):
-            if appointment.identifier != identifier:
+        with self._transaction():
+            if self._pushdown:
+                existing, series = self._existing(None, identifier)
+                updated = replace(existing, status=status)
+                self._storage.append(updated)
+                self._record("appointment", existing, updated)
+                self._put_series(series)
+                return updated
+            calendar = self._current()
+            existing, series = self._existing(calendar, identifier)
+            updated = replace(existing, status=status)
+            self._save(calendar, updated)
+            self._record("appointment", existing, updated)
+            self._put_series(series)
+        return updated
+
+    def _existing(self, calendar: Optional[_Calendar], identifier: str) -> Tuple[Appointment, Optional[Series]]:
+        """Return the appointment to modify and, for a series occurrence, its series with it detached."""
+
+        found = self._storage.get(identifier) if calendar is None else calendar.appointments.get(identifier)
+        if found is not None:
+            return found, None
+        series, occurrence = self._occurrence(identifier)
+        return occurrence, series
+
+    def _occurrence(self, identifier: str) -> Tuple[Series, Appointment]:
+        """Build the series occurrence ``identifier`` and return it with its series detached from it."""
+
+        parts = split_occurrence(identifier)
+        series = self._all_series().get(parts[0]) if parts is not None else None
+        if series is None or not series.active or parts[1] in series.detached or parts[1] >= len(series):
+            raise AppointmentNotFoundError(identifier)
+        return series.detach(parts[1]), series.occurrence(parts[1])
+
+    def _stored_for_client(self, client_id: str) -> List[Appointment]:
+        if self._pushdown:
+            return self._storage.find_by_client(client_id)
+        calendar = self._current()
+        return sorted(
+            (calendar.appointments[identifier] for identifier in calendar.registry().appointments_for(client_id)),
+            key=lambda item: item.start_time,
+        )
+
+    def _all_series(self) -> Dict[str, Series]:
+        """Return the stored series, with changes pending in the current batch applied."""
+
+        if self._series_store is None:
+            return {}
+        series = self._series_store.load()
+        series.update(self._series_batch or {})
+        return series
+
+    def _resolve_client(self, calendar: Optional[_Calendar], client: Client) -> Client:
+        """Return the stored client with ``client``'s details, or ``client`` under an identifier of its own.
+
+        Identifiers are derived from the contact details, so after
+        :meth:`update_client` edited a client a new booking under the old
+        details would otherwise take over the edited client's identifier.
+        ``calendar`` is ``None`` when the backend resolves clients itself.
+        """
+
+        if calendar is None:
+            registered = self._storage.resolve_client(client)
+        else:
+            registered = calendar.registry().resolve(client)
+        if registered is not client:
+            return registered
+        for series in self._all_series().values():
+            if series.client.identifier == client.identifier:
+                return series.client if series.client == client else renumbered(client)
+        return client
+
+    def _live_series(self) -> List[Series]:
+        return [series for series in self._all_series().values() if series.active]
+
+    def _put_series(self, series: Optional[Series]) -> None:
+        """Persist ``series``, or keep it with the batch being built."""
+
+        if series is None:
+            return
+        if self._change_log is not None or self._subscribers:
+            self._record("series", self._all_series().get(series.identifier), series)
+        if self._series_batch is not None:
+            self._series_batch[series.identifier] = series
+        else:
+            self._series_store.put([series])
+
+    def _record(self, entity: str, before: Any, after: Any) -> None:
+        """Queue the change from ``before`` (``None`` when created) to ``after`` for publication."""
+
+        if self._pending_changes is None or (self._change_log is None and not self._subscribers):
+            return
+        kind = change_kind(before, after)
+        if kind is None:
+            return
+        previous_status = before.status if before is not None and before.status != after.status else None
+        self._pending_changes.append((kind, entity, after, previous_status))
+
+    def _notify(self, events: List[ChangeEvent]) -> None:
+        failure: Optional[BaseException] = None
+        for event in events:
+            for callback in list(self._subscribers):
+                try:
+                    callback(event)
+                except Exception as exc:
+                    failure = failure or exc
+        if failure is not None:
+            raise failure
+
+    def _with_occurrences(
+        self,
+        stored: List[Appointment],
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        *,
+        series: Optional[List[Series]] = None,
+    ) -> List[Appointment]:
+        """Merge occurrences of ``series`` starting in ``[start, end)`` into ``stored``.
+
+        ``stored`` must be ordered by start time; ``series`` defaults to
+        every live series.
+        """
+
+        if series is None:
+            series = self._live_series()
+        if not series:
+            return stored
+        return list(merge(stored, *(item.occurrences(start, end) for item in series), key=_start_time))
+
+    @staticmethod
+    def _occurrences_on(series: Series, start: datetime, end: datetime) -> Iterator[Appointment]:
+        """Yield the occurrences of ``series`` overlapping ``[start, end)``."""
+
+        for index in series.overlapping(start, end):
+            if index not in series.detached:
+                yield series.occurrence(index)
+
+    def _series_blocker(self, candidate: Appointment, ignore_identifier: Optional[str] = None) -> str:
+        """Return the first series occurrence overlapping ``candidate`` on its resource, or ``""``."""
+
+        for series in self._live_series():
+            if series.resource != candidate.resource:
                 continue
-            updated = replace(appointment, status=status)
-            appointments[index] = updated
-            self._save(appointments)
-            return updated
-        raise AppointmentNotFoundError(identifier)
+            for identifier in series.blocking(candidate.start_time, candidate.end_time):
+                if identifier not in (ignore_identifier, candidate.identifier):
+                    return identifier
+        return ""
+
+    @timed("scheduler.series_conflict_check")
+    def _ensure_series_fits(self, index: Any, series: Series) -> None:
+        """Ensure no occurrence of ``series`` overlaps an appointment or another series.
+
+        Each active appointment within the series' span is tested against
+        the rule arithmetically, and series against series through
+        :func:`~gestor_citas_avanzado.recurrence.series_conflict`.
+        """
+
+        start, end = series.start_time, series.end_time
+        # Both lists come from the same ordered rows, so they pair up.
+        identifiers = index.overlapping(start, end, series.resource)
+        for identifier, (begin, finish) in zip(identifiers, index.spans(start, end, series.resource)):
+            if series.blocking(begin, finish):
+                raise SchedulingConflictError("The series overlaps with %s" % identifier)
+        for other in self._live_series():
+            blocker = series_conflict(series, other) if other.identifier != series.identifier else None
+            if blocker:
+                raise SchedulingConflictError("The series overlaps with %s" % blocker)
+
+    @staticmethod
+    def _apply_changes(
+        appointment: Appointment,
+        *,
+        client: Optional[Client],
+        service: Optional[str],
+        start_time: Optional[datetime],
+        duration_minutes: Optional[int],
+        notes: Optional[str],
+        status: Optional[str],
+        resource: Optional[str],
+    ) -> Appointment:
+        return replace(
+            appointment,
+            client=client or appointment.client,
+            service=service or appointment.service,
+            start_time=start_time or appointment.start_time,
+            duration_minutes=duration_minutes or appointment.duration_minutes,
+            notes=notes if notes is not None else appointment.notes,
+            status=status or appointment.status,
+            resource=resource or appointment.resource,
+        )
+
+    def _current(self) -> _Calendar:
+        """Return the calendar matching what is currently stored.
+
+        The interval index is reused while the storage fingerprint is
+        unchanged since our last load or save; in cached mode the parsed
+        appointments are reused as well.
+        """
 
+        if self._batch is not None and self._calendar is not None:
+            return self._calendar
+        signature = self._storage_signature()
+        fresh = self._calendar is not None and signature is not None and signature == self._signature
+        if fresh and self._cache:
+            count("scheduler.cache_hits")
+            return self._calendar
+        count("scheduler.reloads")
+        index = self._calendar.index if fresh else None
+        search = self._calendar.search if fresh else None
+        clients = self._calendar.clients if fresh else None
+        self._calendar = _Calendar(self._storage.load(), index, search, clients)
+        self._signature = signature
+        count("scheduler.appointments_loaded", len(self._calendar.appointments))
+        return self._calendar
+
+    def _columns(self) -> Optional[ColumnarSnapshot]:
+        """Return the backend's columnar snapshot when it should answer a read instead of a full load.
+
+        A calendar kept in memory by ``cache=True`` is preferred while it is
+        fresh, and batches always read what they have written so far.
+        """
+
+        columns = getattr(self._storage, "columns", None)
+        if columns is None or self._pushdown or self._batch is not None:
+            return None
+        if self._cache and self._calendar is not None and self._storage_signature() == self._signature:
+            return None
+        snapshot = columns()
+        if snapshot is not None:
+            count("scheduler.columnar_reads")
+        return snapshot
+
+    def _client_index(self, calendar: _Calendar) -> ClientSearchIndex:
+        """Return the client search index, reading or writing its sidecar file.
+
+        File backends keep the index in ``<database>.clients`` tagged with
+        the storage fingerprint, so later processes skip the rebuild.  Writes
+        made through a scheduler keep an existing sidecar current (see
+        :meth:`_refresh_client_index`); one left stale by another writer is
+        rebuilt here and saved under the write lock.
+        """
+
+        if calendar.search is not None:
+            return calendar.search
+        sidecar = self._client_sidecar()
+        if sidecar is not None and self._batch is None:
+            calendar.search = ClientSearchIndex.load(sidecar, self._signature)
+        if calendar.search is None:
+            calendar.search = ClientSearchIndex(calendar.appointments.values())
+            if sidecar is not None and self._batch is None:
+                try:
+                    with self._transaction():
+                        if self._storage_signature() == self._signature:
+                            calendar.search.save(sidecar, self._signature)
+                except OSError:
+                    pass
+        return calendar.search
+
+    def _refresh_client_index(self, calendar: _Calendar, changed: List[Appointment], previous: object) -> None:
+        """Bring an existing client index sidecar up to date after ``changed`` was written.
+
+        ``previous`` is the storage fingerprint before the write.  Sidecars
+        that nobody created (no client search was ever run) are left alone,
+        so plain writes pay nothing for the feature.
+        """
+
+        sidecar = self._client_sidecar()
+        if sidecar is None or (calendar.search is None and not sidecar.exists()):
+            return
+        try:
+            if calendar.search is None:
+                calendar.search = ClientSearchIndex.load(sidecar, previous)
+                if calendar.search is None:
+                    calendar.search = ClientSearchIndex(calendar.appointments.values())
+                else:
+                    for appointment in changed:
+                        calendar.search.add(appointment)
+            calendar.search.save(sidecar, self._signature)
+        except OSError:
+            pass
+
+    def _client_sidecar(self) -> Optional[Path]:
+        path = getattr(self._storage, "path", None)
+        if path is None or self._signature is None or self._pushdown:
+            return None
+        return Path(str(path) + ".clients")
+
+    @contextmanager
+    def _transaction(self) -> Iterator[Any]:
+        """Hold the storage write lock, or nothing for backends without one.
+
+        Changes recorded inside the outermost block are numbered in the
+        change log before the lock is released, so sequences stay gap-free
+        across processes, and handed to the subscribers after it.  A block
+        that raises publishes nothing.
+        """
+
+        transaction = getattr(self._storage, "transaction", None)
+        lock = transaction() if transaction is not None else nullcontext()
+        if self._pending_changes is not None:
+            with lock as handle:
+                yield handle
+            return
+        self._pending_changes = []
+        try:
+            with lock as handle:
+                # Looked up under the lock: recording may have been turned on by another process.
+                self._change_log = getattr(self._storage, "changes", None)
+                yield handle
+                changes = self._pending_changes
+                if not changes:
+                    events: List[ChangeEvent] = []
+                elif self._change_log is not None:
+                    events = self._change_log.append(changes)
+                else:
+                    events = number_changes(changes, self._sequence)
+        finally:
+            self._pending_changes = None
+        if events:
+            self._sequence = events[-1].sequence
+            self._notify(events)
+
+    def _storage_signature(self) -> Optional[object]:
+        signature = getattr(self._storage, "signature", None)
+        return signature() if signature is not None else None
+
+    @timed("scheduler.conflict_check")
     def _ensure_no_conflict(
         self,
-        appointments: Iterable[Appointment],
+        index: Any,
         candidate: Appointment,
         *,
         ignore_identifier: Optional[str] = None,
     ) -> None:
-        """Ensure the candidate appointment does not overlap active ones."""
+        """Ensure the candidate appointment does not overlap active ones.
 
-        for existing in appointments:
-            if ignore_identifier and existing.identifier == ignore_identifier:
-                continue
-            if existing.status == "cancelled":
+        ``index`` is anything exposing ``overlapping(start, end, resource)``:
+        the in-memory :class:`PartitionedIndex` or a query-capable storage
+        backend.  Only appointments and series occurrences on the candidate's
+        resource are compared.
+        """
+
+        for identifier in index.overlapping(candidate.start_time, candidate.end_time, candidate.resource):
+            if identifier in (ignore_identifier, candidate.identifier):
                 continue
-            if self._overlap(existing, candidate):
-                raise SchedulingConflictError(
-                    "The appointment overlaps with %s" % existing.identifier
-                )
+            raise SchedulingConflictError("The appointment overlaps with %s" % identifier)
+        blocker = self._series_blocker(candidate, ignore_identifier)
+        if blocker:
+            raise SchedulingConflictError("The appointment overlaps with %s" % blocker)
 
-    @staticmethod
-    def _overlap(first: Appointment, second: Appointment) -> bool:
-        if first.identifier == second.identifier:
-            return False
-        return first.start_time < second.end_time and second.start_time < first.end_time
+    def _save(self, calendar: _Calendar, changed: Appointment) -> None:
+        """Apply ``changed`` to ``calendar`` and persist it unless batching."""
+
+        calendar.put(changed)
+        if self._batch is not None:
+            self._batch[changed.identifier] = changed
+            return
+        self._persist(calendar, [changed])
+
+    def _persist(self, calendar: _Calendar, changed: List[Appointment]) -> None:
+        """Write ``changed``, appending it when the backend keeps a journal."""
+
+        extend = getattr(self._storage, "extend", None)
+        try:
+            if self._storage_signature() != self._signature:
+                raise ConcurrentModificationError("storage changed since it was read")
+            if extend is not None:
+                extend(changed)
+            else:
+                self._storage.save(calendar.ordered())
+        except BaseException:
+            self._calendar = None
+            raise
+        previous, self._signature = self._signature, self._storage_signature()
+        self._refresh_client_index(calendar, changed, previous)
+
+
+def _start_time(appointment: Appointment) -> datetime:
+    return appointment.start_time
+
+
+def _on_resource(appointments: List[Appointment], resource: Optional[str]) -> List[Appointment]:
+    """Return ``appointments`` booked on ``resource``; every one when it is ``None``."""
 
-    def _save(self, appointments: Iterable[Appointment]) -> None:
-        ordered = sorted(appointments, key=lambda item: item.start_time)
-        self._storage.save(ordered)
+    if resource is None:
+        return list(appointments)
+    return [appointment for appointment in appointments if appointment.resource == resource]
 
 
 __all__ = [
     "AppointmentNotFoundError",
+    "BulkResult",
+    "ClientNotFoundError",
+    "ConcurrentModificationError",
+    "ScheduleResult",
     "SchedulingConflictError",
     "Scheduler",
+    "SeriesNotFoundError",
 ]
@@ -2,37 +2,1342 @@
 
 from __future__ import annotations
 
-import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Iterable, List
+from typing import TYPE_CHECKING, Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from .models import Appointment
+from . import serialization
+from .changes import ChangeLog
+from .columnar import ColumnarSnapshot, encode_columns
+from .metrics import span, timed
+from .models import Appointment, Client, epoch_microseconds, renumbered
+from .recurrence import Series
+from .search import client_document, normalize_phone, normalize_text, query_forms
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+if TYPE_CHECKING:  # imported on first use to keep the CLI start-up light
+    import sqlite3
+
+
+_UNCHECKED = object()
+
+
+class ConcurrentModificationError(RuntimeError):
+    """Raised when the stored data changed since it was read."""
+
+
+class FileLock:
+    """Reentrant, inter-process advisory lock held on a sidecar file.
+
+    Uses :func:`fcntl.flock`; on platforms without :mod:`fcntl` only threads
+    of the current process are serialised.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._mutex = threading.RLock()
+        self._depth = 0
+        self._handle: Optional[Any] = None
+
+    def __enter__(self) -> "FileLock":
+        self._mutex.acquire()
+        if self._depth == 0:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                handle = open(self.path, "a+b")
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            except BaseException:
+                self._mutex.release()
+                raise
+            self._handle = handle
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._depth -= 1
+        if self._depth == 0 and self._handle is not None:
+            if fcntl is not None:
+                fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+            self._handle.close()
+            self._handle = None
+        self._mutex.release()
 
-class AppointmentStorage:
-    """Store appointments on disk using JSON files."""
+
+@timed("storage.write")
+def atomic_write(path: Path, data: bytes) -> None:
+    """Replace ``path`` with ``data`` so readers never observe a partial file."""
+
+    from tempfile import mkstemp
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporary = mkstemp(prefix=path.name + ".", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(descriptor, "wb") as handle:
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        try:
+            os.unlink(temporary)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class SeriesStore:
+    """Keep recurring series as rule records in a small JSON file.
+
+    Every storage backend exposes one as its ``series`` attribute, stored
+    next to its data.  Writes replace the whole file atomically and are
+    expected to run under the backend's write lock; parsed series are
+    cached until the file changes.
+    """
 
     def __init__(self, path: Path) -> None:
         self.path = Path(path)
+        self._cache: Optional[Tuple[Any, Dict[str, Series]]] = None
+
+    @timed("series.load")
+    def load(self) -> Dict[str, Series]:
+        """Return the stored series keyed by identifier."""
+
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return {}
+        signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        if self._cache is None or self._cache[0] != signature:
+            rows = serialization.loads(self.path.read_bytes())
+            self._cache = (signature, {row["identifier"]: Series.from_dict(row) for row in rows})
+        return dict(self._cache[1])
+
+    @timed("series.save")
+    def put(self, changed: Iterable[Series]) -> None:
+        """Insert or replace ``changed`` and rewrite the file."""
+
+        stored = self.load()
+        for series in changed:
+            stored[series.identifier] = series
+        atomic_write(self.path, serialization.dumps([series.to_dict() for series in stored.values()], indent=True))
+        self._cache = None
+
+
+class AppointmentStorage:
+    """Store appointments on disk using JSON files.
+
+    By default files are pretty-printed with ISO timestamps.  ``compact``
+    drops the indentation and ``epoch_timestamps`` writes start times as
+    integer epoch seconds; both layouts are always readable.
+
+    Saves replace the file atomically, and :meth:`transaction` holds an
+    advisory lock on ``<path>.lock`` so several processes can run
+    read-modify-write cycles against the same file safely.
+
+    With ``columnar`` every save also writes a
+    :class:`~gestor_citas_avanzado.columnar.ColumnarSnapshot` to
+    ``<path>.columns``, which :meth:`columns` maps for read-only queries.
+    With ``change_log`` the database starts recording every mutation in
+    ``<path>.changes`` (see :class:`~gestor_citas_avanzado.changes.ChangeLog`);
+    once that file exists every writer records to it, with the option or
+    not.  ``changes`` is ``None`` while the database records nothing.
+    """
+
+    FORMAT_VERSION = 2
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        compact: bool = False,
+        epoch_timestamps: bool = False,
+        columnar: bool = False,
+        change_log: bool = False,
+    ) -> None:
+        self.path = Path(path)
+        self.indent = not compact
+        self.epoch_timestamps = epoch_timestamps
+        self.columnar = columnar
+        self.columns_path = self.path.with_name(self.path.name + ".columns")
+        self._columns: Optional[Tuple[Tuple[int, ...], Optional[ColumnarSnapshot]]] = None
+        self._lock = FileLock(self.path.with_name(self.path.name + ".lock"))
+        self.series = SeriesStore(self.path.with_name(self.path.name + ".series"))
+        self._changes = ChangeLog(self.path.with_name(self.path.name + ".changes"))
+        self._record_changes = change_log
+
+    def transaction(self) -> FileLock:
+        """Return a context manager holding the inter-process write lock."""
+
+        return self._lock
 
+    @property
+    def changes(self) -> Optional[ChangeLog]:
+        """The database's change log, or ``None`` while it does not record changes."""
+
+        return self._changes if self._changes.enabled(self._record_changes) else None
+
+    @timed("storage.load")
     def load(self) -> List[Appointment]:
         """Return all stored appointments."""
 
+        rows, clients = self._document()
+        return [Appointment.from_dict(item, clients) for item in rows]
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Return the stored rows as plain dictionaries without hydrating them.
+
+        Client references are replaced by the client's fields, one dictionary
+        shared by every row of that client; unknown references are left as
+        they are.
+        """
+
+        rows, clients = self._document()
+        if clients:
+            fields = {identifier: client.to_dict() for identifier, client in clients.items()}
+            for row in rows:
+                client = row.get("client") if isinstance(row, dict) else None
+                if isinstance(client, str) and client in fields:
+                    row["client"] = fields[client]
+        return rows
+
+    def find(self, identifier: str) -> Optional[Appointment]:
+        """Return the appointment stored under ``identifier``, hydrating only that row."""
+
+        rows, clients = self._document()
+        for item in rows:
+            if item["identifier"] == identifier:
+                return Appointment.from_dict(item, clients)
+        return None
+
+    def signature(self) -> Optional[Tuple[int, ...]]:
+        """Return a cheap fingerprint of the file used to detect external changes."""
+
+        return self._file_signature()
+
+    def columns(self) -> Optional[ColumnarSnapshot]:
+        """Return the columnar snapshot of the file, or ``None`` unless ``columnar`` is set.
+
+        A snapshot missing or left stale by a process that does not keep one
+        is rebuilt from the file first.  ``None`` is also returned when it
+        cannot be written.
+        """
+
+        if not self.columnar:
+            return None
+        signature = self._file_signature()
+        if signature is None:
+            return None
+        if self._columns is None or self._columns[0] != signature:
+            snapshot = ColumnarSnapshot.open(self.columns_path, signature)
+            if snapshot is None and self._write_columns(AppointmentStorage.load(self), signature):
+                snapshot = ColumnarSnapshot.open(self.columns_path, signature)
+            self._columns = (signature, snapshot)
+        return self._columns[1]
+
+    @timed("storage.save")
+    def save(self, appointments: Iterable[Appointment], *, expected_signature: Any = _UNCHECKED) -> None:
+        """Persist the provided appointments.
+
+        When ``expected_signature`` is given the save is refused with
+        :class:`ConcurrentModificationError` if the file no longer matches it.
+        """
+
+        if self.columnar:
+            appointments = list(appointments)
+        payload = self._encode(appointments)
+        with self._lock:
+            if expected_signature is not _UNCHECKED and self.signature() != expected_signature:
+                raise ConcurrentModificationError(str(self.path))
+            atomic_write(self.path, payload)
+            if self.columnar:
+                self._write_columns(appointments, self._file_signature())
+
+    @timed("storage.encode")
+    def _encode(self, appointments: Iterable[Appointment]) -> bytes:
+        clients: Dict[str, Client] = {}
+        rows = []
+        for appointment in appointments:
+            clients.setdefault(appointment.client.identifier, appointment.client)
+            rows.append(appointment.to_dict(epoch_timestamps=self.epoch_timestamps, client_reference=True))
+        data = {
+            "version": self.FORMAT_VERSION,
+            "clients": [client.to_dict() for client in clients.values()],
+            "appointments": rows,
+        }
+        return serialization.dumps(data, indent=self.indent)
+
+    def _file_signature(self) -> Optional[Tuple[int, ...]]:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    @timed("storage.write_columns")
+    def _write_columns(self, appointments: Iterable[Appointment], signature: Optional[Tuple[int, ...]]) -> bool:
+        """Write the columnar snapshot of ``appointments``; ``False`` if the file cannot be written."""
+
+        if signature is None:
+            return False
+        try:
+            atomic_write(self.columns_path, encode_columns(appointments, signature))  # type: ignore[arg-type]
+        except OSError:
+            return False
+        return True
+
+    def _document(self) -> Tuple[List[Dict[str, Any]], Dict[Any, Client]]:
+        """Return the stored rows and the clients they reference.
+
+        Files written before the client registry hold a bare list of rows
+        with the client embedded in each; they are read as is and rewritten
+        in the current format by the next save.
+        """
+
         if not self.path.exists():
-            return []
+            return [], {}
+        raw = self.path.read_bytes()
+        with span("storage.parse"):
+            data = serialization.loads(raw)
+        if isinstance(data, list):
+            return data, {}
+        clients: Dict[Any, Client] = {}
+        for fields in data["clients"]:
+            client = Client.from_dict(fields)
+            clients[client.identifier] = client
+        return data["appointments"], clients
+
+
+class JournalStorage(AppointmentStorage):
+    """Store appointments as a JSON snapshot plus an append-only journal.
+
+    The snapshot at ``path`` uses the same format as
+    :class:`AppointmentStorage`, so existing files are picked up unchanged.
+    Every mutation recorded through :meth:`append` adds one JSON Lines record
+    to ``<path>.journal``; :meth:`load` replays it on top of the snapshot.
+    Once the journal holds ``compact_after`` records it is folded back into
+    the snapshot.
+    """
+
+    def __init__(self, path: Path, *, compact_after: int = 1000, **options: Any) -> None:
+        super().__init__(path, **options)
+        self.journal_path = self.path.with_name(self.path.name + ".journal")
+        self.compact_after = compact_after
+        self._pending: Optional[int] = None
+
+    @timed("storage.load")
+    def load(self) -> List[Appointment]:
+        """Return the snapshot with every journal record applied."""
+
+        appointments: Dict[str, Appointment] = {
+            appointment.identifier: appointment for appointment in super().load()
+        }
+        clients: Dict[Tuple[Any, ...], Client] = {}
+        for record in self._journal_records():
+            appointment = Appointment.from_dict(record["appointment"], clients)
+            appointments[appointment.identifier] = appointment
+        return list(appointments.values())
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Return the snapshot rows with the journal applied, without hydrating them."""
+
+        rows = super().records()
+        positions = {row.get("identifier"): position for position, row in enumerate(rows) if isinstance(row, dict)}
+        for record in self._journal_records():
+            row = record["appointment"]
+            position = positions.get(row.get("identifier"))
+            if position is None:
+                positions[row.get("identifier")] = len(rows)
+                rows.append(row)
+            else:
+                rows[position] = row
+        return rows
+
+    def find(self, identifier: str) -> Optional[Appointment]:
+        """Return the latest version of ``identifier`` without hydrating other rows."""
+
+        latest = None
+        for record in self._journal_records():
+            if record["appointment"]["identifier"] == identifier:
+                latest = record["appointment"]
+        if latest is not None:
+            return Appointment.from_dict(latest)
+        return super().find(identifier)
+
+    def append(self, appointment: Appointment) -> None:
+        """Record a created or modified appointment in the journal."""
+
+        self.extend([appointment])
+
+    @timed("storage.extend")
+    def extend(self, appointments: Iterable[Appointment]) -> None:
+        """Record several appointments with a single journal write."""
+
+        lines = [
+            serialization.dumps(
+                {"op": "upsert", "appointment": appointment.to_dict(epoch_timestamps=self.epoch_timestamps)}
+            )
+            + b"\n"
+            for appointment in appointments
+        ]
+        if not lines:
+            return
+        with self._lock:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.journal_path.open("a+b") as handle:
+                # Cut off a line torn by an interrupted append, or readers would stop there.
+                end = _complete_length(handle)
+                if end != handle.seek(0, os.SEEK_END):
+                    handle.truncate(end)
+                handle.writelines(lines)
+                handle.flush()
+                os.fsync(handle.fileno())
+            if self._pending is None:
+                self._pending = self._count_records()
+            else:
+                self._pending += len(lines)
+            if self._pending >= self.compact_after:
+                self.compact()
+
+    @timed("storage.save")
+    def save(self, appointments: Iterable[Appointment], *, expected_signature: Any = _UNCHECKED) -> None:
+        """Write a fresh snapshot and discard the journal."""
+
+        with self._lock:
+            if expected_signature is not _UNCHECKED and self.signature() != expected_signature:
+                raise ConcurrentModificationError(str(self.path))
+            super().save(appointments)
+            self.journal_path.unlink(missing_ok=True)
+            self._pending = 0
+
+    def compact(self) -> None:
+        """Fold the journal into the snapshot."""
+
+        with self._lock:
+            appointments = sorted(self.load(), key=lambda item: item.start_time)
+            self.save(appointments)
+
+    def columns(self) -> Optional[ColumnarSnapshot]:
+        """Return the columnar snapshot of the JSON snapshot with the journal applied on top."""
+
+        snapshot = super().columns()
+        if snapshot is None:
+            return None
+        clients: Dict[Tuple[Any, ...], Client] = {}
+        overlay = {}
+        for record in self._journal_records():
+            appointment = Appointment.from_dict(record["appointment"], clients)
+            overlay[appointment.identifier] = appointment
+        return snapshot.with_overlay(overlay) if overlay else snapshot
+
+    def signature(self) -> Optional[Tuple[int, ...]]:
+        """Return a fingerprint covering both the snapshot and the journal."""
+
+        snapshot = super().signature()
+        try:
+            stat = self.journal_path.stat()
+        except FileNotFoundError:
+            journal: Tuple[int, ...] = ()
+        else:
+            journal = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        if snapshot is None and not journal:
+            return None
+        return (snapshot or ()) + journal
+
+    def _journal_records(self) -> Iterator[Dict[str, Any]]:
+        if not self.journal_path.exists():
+            self._pending = 0
+            return
+        pending = 0
+        with self.journal_path.open("rb") as handle:
+            for line in handle:
+                try:
+                    record = serialization.loads(line)
+                except ValueError:
+                    # A torn final line left by an interrupted append.
+                    break
+                pending += 1
+                yield record
+        self._pending = pending
+
+    def _count_records(self) -> int:
+        if not self.journal_path.exists():
+            return 0
+        with self.journal_path.open("rb") as handle:
+            return sum(1 for _ in handle)
+
+
+def _complete_length(handle: BinaryIO) -> int:
+    """Return the length of ``handle`` up to the end of its last complete (newline-terminated) line."""
+
+    end = handle.seek(0, os.SEEK_END)
+    position = end
+    while position:
+        start = max(0, position - 65536)
+        handle.seek(start)
+        newline = handle.read(position - start).rfind(b"\n")
+        if newline >= 0:
+            return start + newline + 1
+        position = start
+    return 0
+
+
+def _reach(appointments: Iterable[Appointment]) -> Optional[int]:
+    """Return when the last of the active ``appointments`` ends, in epoch microseconds; ``None`` if none is active."""
+
+    return max(
+        (epoch_microseconds(item.end_time) for item in appointments if item.status != "cancelled"), default=None
+    )
+
+
+PARTITION_PERIODS = ("day", "month", "year")
+
+
+def partition_key(value: datetime, period: str) -> str:
+    """Return the name of the ``period`` partition holding appointments starting at ``value``."""
+
+    if period == "month":
+        return f"{value.year:04d}-{value.month:02d}"
+    if period == "year":
+        return f"{value.year:04d}"
+    if period == "day":
+        return f"{value.year:04d}-{value.month:02d}-{value.day:02d}"
+    raise ValueError(f"unknown partition period {period!r}")
+
+
+class PartitionedStorage:
+    """Store appointments in one JSON file per period, with an archive tier.
+
+    ``path`` is a directory holding one partition per ``period`` named after
+    it (``2024-06.json`` with the default monthly period), an ``archive/``
+    subdirectory for the partitions moved there by :meth:`archive`, and two
+    small index files: ``manifest.json`` lists the partitions, the resources
+    and, per partition, when its last active appointment ends, and
+    ``clients.json`` records every client together with the partitions
+    holding their appointments.
+
+    Like :class:`SQLiteStorage` this backend answers lookups itself, so
+    :class:`~gestor_citas_avanzado.service.Scheduler` pushes queries down and
+    only the partitions a time window overlaps are read.  Writes rewrite the
+    partitions they touch and the manifest, whose fingerprint is the storage
+    signature.  Archived partitions are written compactly and stay readable;
+    they are simply never opened by queries about the present.  With
+    ``change_log`` the database records mutations in ``changes.jsonl``, as
+    described for :class:`AppointmentStorage`.
+    """
+
+    MANIFEST = "manifest.json"
+    CLIENTS = "clients.json"
+    ARCHIVE = "archive"
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        period: str = "month",
+        compact: bool = False,
+        epoch_timestamps: bool = False,
+        change_log: bool = False,
+    ) -> None:
+        partition_key(datetime(2000, 1, 1), period)
+        self.path = Path(path)
+        self.compact = compact
+        self.epoch_timestamps = epoch_timestamps
+        self._lock = FileLock(self.path / ".lock")
+        self.series = SeriesStore(self.path / "series.json")
+        self._changes = ChangeLog(self.path / "changes.jsonl")
+        self._record_changes = change_log
+        self._locations: Dict[str, str] = {}
+        self._undo: Optional[Dict[Path, Optional[bytes]]] = None
+        self._manifest_cache: Optional[Tuple[Any, Dict[str, Any]]] = None
+        self._clients_cache: Optional[Tuple[Any, Dict[str, Tuple[Client, List[str]]]]] = None
+        # Reach of the partitions rewritten since the manifest was last written.
+        self._written_reach: Dict[str, Optional[int]] = {}
+        # An existing layout keeps the period it was created with.
+        self.period = self._manifest().get("period", period)
+
+    @property
+    def changes(self) -> Optional[ChangeLog]:
+        """The database's change log, or ``None`` while it does not record changes."""
+
+        return self._changes if self._changes.enabled(self._record_changes) else None
+
+    @contextmanager
+    def transaction(self) -> Iterator["PartitionedStorage"]:
+        """Hold the write lock; if the block raises, restore every file it rewrote.
+
+        Nested transactions join the outermost one.
+        """
+
+        with self._lock:
+            if self._undo is not None:
+                yield self
+                return
+            self._undo = {}
+            try:
+                yield self
+            except BaseException:
+                undo, self._undo = self._undo, None
+                for path, previous in undo.items():
+                    if previous is None:
+                        path.unlink(missing_ok=True)
+                    else:
+                        atomic_write(path, previous)
+                self._locations.clear()
+                self._written_reach.clear()
+                self._manifest_cache = self._clients_cache = None
+                raise
+            self._undo = None
+
+    def signature(self) -> Optional[Tuple[int, ...]]:
+        """Return the manifest fingerprint, which changes with every write."""
+
+        try:
+            stat = (self.path / self.MANIFEST).stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    # ------------------------------------------------------------------
+    # AppointmentStorage interface
+    # ------------------------------------------------------------------
+    @timed("storage.load")
+    def load(self) -> List[Appointment]:
+        """Return every stored appointment, archived ones included."""
+
+        return list(self.iter_appointments())
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Return the rows of every partition, archived ones included, without hydrating them."""
 
-        with self.path.open("r", encoding="utf-8") as handle:
-            raw = json.load(handle)
+        rows: List[Dict[str, Any]] = []
+        for key, tier in self._partitions():
+            rows.extend(self._partition(key, tier).records())
+        return rows
 
-        return [Appointment.from_dict(item) for item in raw]
+    def iter_appointments(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> Iterator[Appointment]:
+        """Yield appointments starting in ``[start, end)`` ordered by start time.
 
+        Partitions are read one at a time, so memory stays bounded by the
+        largest partition rather than the whole calendar.
+        """
+
+        lower = partition_key(start, self.period) if start is not None else None
+        upper = partition_key(end, self.period) if end is not None else None
+        for key, tier in self._partitions(lower, upper):
+            for appointment in self._read(key, tier):
+                if start is not None and appointment.start_time < start:
+                    continue
+                if end is not None and appointment.start_time >= end:
+                    return
+                yield appointment
+
+    @timed("storage.save")
+    def save(self, appointments: Iterable[Appointment], *, expected_signature: Any = _UNCHECKED) -> None:
+        """Replace the stored appointments with ``appointments``."""
+
+        grouped: Dict[str, List[Appointment]] = {}
+        for appointment in appointments:
+            grouped.setdefault(partition_key(appointment.start_time, self.period), []).append(appointment)
+        with self.transaction():
+            if expected_signature is not _UNCHECKED and self.signature() != expected_signature:
+                raise ConcurrentModificationError(str(self.path))
+            previous = self._manifest()["partitions"]
+            partitions: Dict[str, str] = {}
+            for key in set(previous) - set(grouped):
+                self._remove(self._partition(key, previous[key]).path)
+            self._locations.clear()
+            for key, members in grouped.items():
+                self._write(key, previous.get(key, "active"), members, partitions)
+            stored = [appointment for members in grouped.values() for appointment in members]
+            self._write_clients(stored, {})
+            self._write_manifest(partitions, stored, {"resources": [], "reach": {}})
+
+    def append(self, appointment: Appointment) -> None:
+        """Insert or replace a single appointment."""
+
+        self.extend([appointment])
+
+    @timed("storage.extend")
+    def extend(self, appointments: Iterable[Appointment]) -> None:
+        """Insert or replace several appointments, rewriting only their partitions.
+
+        Appointments read through this instance remember their partition, so
+        an edit that moves one to another period also removes the old copy.
+        """
+
+        items = list(appointments)
+        if not items:
+            return
+        with self.transaction():
+            manifest = self._manifest()
+            partitions = dict(manifest["partitions"])
+            changes: Dict[str, Dict[str, Optional[Appointment]]] = {}
+            for appointment in items:
+                key = partition_key(appointment.start_time, self.period)
+                previous = self._locations.get(appointment.identifier)
+                if previous is not None and previous != key:
+                    changes.setdefault(previous, {})[appointment.identifier] = None
+                changes.setdefault(key, {})[appointment.identifier] = appointment
+            for key, updates in changes.items():
+                tier = partitions.get(key, "active")
+                current = {item.identifier: item for item in self._read(key, tier)} if key in partitions else {}
+                for identifier, appointment in updates.items():
+                    if appointment is None:
+                        current.pop(identifier, None)
+                    else:
+                        current[identifier] = appointment
+                self._write(key, tier, current.values(), partitions)
+            self._write_clients(items, self._client_entries())
+            self._write_manifest(partitions, items, manifest)
+
+    def archive(self, before: datetime) -> int:
+        """Move the partitions of periods ending before ``before`` to the archive tier.
+
+        Returns how many partitions were moved.
+        """
+
+        cutoff = partition_key(before, self.period)
+        with self.transaction():
+            manifest = self._manifest()
+            partitions = dict(manifest["partitions"])
+            moved = 0
+            for key, tier in manifest["partitions"].items():
+                if tier != "active" or key >= cutoff:
+                    continue
+                appointments = self._read(key, tier)
+                self._write(key, "archive", appointments, partitions)
+                self._remove(self._partition(key, tier).path)
+                moved += 1
+            if moved:
+                self._write_manifest(partitions, [], manifest)
+        return moved
+
+    # ------------------------------------------------------------------
+    # Pushed-down queries
+    # ------------------------------------------------------------------
+    def get(self, identifier: str) -> Optional[Appointment]:
+        """Return the appointment stored under ``identifier`` if any.
+
+        Partitions are searched newest first, the archive last.
+        """
+
+        partitions = self._manifest()["partitions"]
+        order = sorted(partitions, key=lambda key: (partitions[key] != "archive", key), reverse=True)
+        known = self._locations.get(identifier)
+        if known in partitions:
+            order.insert(0, known)
+        for key, tier in ((key, partitions[key]) for key in order):
+            for appointment in self._read(key, tier):
+                if appointment.identifier == identifier:
+                    return appointment
+        return None
+
+    def find_between(self, start: datetime, end: datetime) -> List[Appointment]:
+        """Return non-cancelled appointments starting in ``[start, end)``."""
+
+        return [item for item in self.iter_appointments(start, end) if item.status != "cancelled"]
+
+    def upcoming(self, after: datetime) -> List[Appointment]:
+        """Return appointments starting at or after ``after``."""
+
+        return list(self.iter_appointments(after))
+
+    def find_for_client(self, query: str) -> List[Appointment]:
+        """Return appointments whose client name, email or phone contain ``query``.
+
+        Clients are matched against ``clients.json`` first, so only the
+        partitions holding their appointments are opened.
+        """
+
+        forms = query_forms(query)
+        matches = {
+            identifier: keys
+            for identifier, (client, keys) in self._client_entries().items()
+            if not forms or any(form in client_document(client) for form in forms)
+        }
+        return self._for_clients(matches)
+
+    def find_by_client(self, client_id: str) -> List[Appointment]:
+        """Return the appointments booked by the client ``client_id``."""
+
+        entry = self._client_entries().get(client_id)
+        return self._for_clients({client_id: entry[1]} if entry else {})
+
+    def clients(self) -> List[Client]:
+        """Return every client recorded in ``clients.json``."""
+
+        clients = [client for client, _ in self._client_entries().values()]
+        return sorted(clients, key=lambda client: (client.name, client.identifier))
+
+    def resolve_client(self, client: Client) -> Client:
+        """Return ``client`` carrying the identifier already stored for the same details."""
+
+        entries = self._client_entries()
+        for stored, _ in entries.values():
+            if stored == client:
+                return stored
+        # The identifier belongs to a client whose details were edited since.
+        return renumbered(client) if client.identifier in entries else client
+
+    def resources(self) -> List[str]:
+        """Return the names of the resources that have appointments."""
+
+        return list(self._manifest()["resources"])
+
+    def overlapping(self, start: datetime, end: datetime, resource: Optional[str] = None) -> List[str]:
+        """Return identifiers of active appointments on ``resource`` overlapping ``[start, end)``."""
+
+        return [appointment.identifier for appointment in self._overlapping(start, end, resource)]
+
+    def spans(
+        self, start: datetime, end: datetime, resource: Optional[str] = None
+    ) -> List[Tuple[datetime, datetime]]:
+        """Return ``(start, end)`` of active appointments on ``resource`` overlapping the window."""
+
+        return [(item.start_time, item.end_time) for item in self._overlapping(start, end, resource)]
+
+    def _overlapping(self, start: datetime, end: datetime, resource: Optional[str]) -> List[Appointment]:
+        # Only partitions with an active appointment still running at ``start`` can hold an overlap.
+        reach = self._reaches(self._manifest())
+        after = epoch_microseconds(start)
+        return [
+            appointment
+            for key, tier in self._partitions(None, partition_key(end, self.period))
+            if reach.get(key, after) > after
+            for appointment in self._read(key, tier)
+            if appointment.start_time < end
+            and appointment.resource == resource
+            and appointment.status != "cancelled"
+            and appointment.end_time > start
+        ]
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    def _partition(self, key: str, tier: str) -> AppointmentStorage:
+        if tier == "archive":
+            return AppointmentStorage(self.path / self.ARCHIVE / f"{key}.json", compact=True, epoch_timestamps=True)
+        return AppointmentStorage(
+            self.path / f"{key}.json", compact=self.compact, epoch_timestamps=self.epoch_timestamps
+        )
+
+    def _partitions(self, lower: Optional[str] = None, upper: Optional[str] = None) -> List[Tuple[str, str]]:
+        return [
+            (key, tier)
+            for key, tier in sorted(self._manifest()["partitions"].items())
+            if (lower is None or key >= lower) and (upper is None or key <= upper)
+        ]
+
+    def _read(self, key: str, tier: str) -> List[Appointment]:
+        appointments = sorted(self._partition(key, tier).load(), key=lambda item: item.start_time)
+        for appointment in appointments:
+            self._locations[appointment.identifier] = key
+        return appointments
+
+    def _write(
+        self, key: str, tier: str, appointments: Iterable[Appointment], partitions: Dict[str, str]
+    ) -> None:
+        ordered = sorted(appointments, key=lambda item: item.start_time)
+        storage = self._partition(key, tier)
+        self._written_reach[key] = _reach(ordered)
+        if not ordered:
+            self._remove(storage.path)
+            partitions.pop(key, None)
+            return
+        self._replace(storage.path, storage._encode(ordered))
+        partitions[key] = tier
+        for appointment in ordered:
+            self._locations[appointment.identifier] = key
+
+    def _replace(self, path: Path, data: bytes) -> None:
+        self._stash(path)
+        atomic_write(path, data)
+
+    def _remove(self, path: Path) -> None:
+        self._stash(path)
+        path.unlink(missing_ok=True)
+
+    def _stash(self, path: Path) -> None:
+        """Remember the content ``path`` had when the transaction started."""
+
+        if self._undo is not None and path not in self._undo:
+            self._undo[path] = path.read_bytes() if path.exists() else None
+
+    def _for_clients(self, matches: Dict[str, List[str]]) -> List[Appointment]:
+        keys = sorted({key for partitions in matches.values() for key in partitions})
+        tiers = self._manifest()["partitions"]
+        found = [
+            appointment
+            for key in keys
+            if key in tiers
+            for appointment in self._read(key, tiers[key])
+            if appointment.client.identifier in matches
+        ]
+        return sorted(found, key=lambda item: item.start_time)
+
+    def _manifest(self) -> Dict[str, Any]:
+        signature = self.signature()
+        if self._manifest_cache is None or self._manifest_cache[0] != signature:
+            if signature is None:
+                data: Dict[str, Any] = {"partitions": {}, "resources": [], "reach": {}}
+            else:
+                data = serialization.loads((self.path / self.MANIFEST).read_bytes())
+            self._manifest_cache = (signature, data)
+        return self._manifest_cache[1]
+
+    def _write_manifest(
+        self, partitions: Dict[str, str], written: List[Appointment], previous: Dict[str, Any]
+    ) -> None:
+        resources = set(previous["resources"])
+        resources.update(item.resource for item in written if item.resource is not None)
+        reach = self._reaches(previous)
+        reach.update(self._written_reach)
+        self._written_reach = {}
+        data = {
+            "version": 2,
+            "period": self.period,
+            "partitions": dict(sorted(partitions.items())),
+            "resources": sorted(resources),
+            "reach": {key: reach[key] for key in sorted(partitions) if reach.get(key) is not None},
+        }
+        self._replace(self.path / self.MANIFEST, serialization.dumps(data, indent=True))
+        self._manifest_cache = (self.signature(), data)
+
+    def _reaches(self, manifest: Dict[str, Any]) -> Dict[str, Optional[int]]:
+        """Return when the last active appointment of each partition ends, in epoch microseconds.
+
+        Partitions without active appointments are left out.  Manifests
+        written before this was recorded are measured by reading every
+        partition once.
+        """
+
+        reach = manifest.get("reach")
+        if reach is None:
+            measured = {key: _reach(self._read(key, tier)) for key, tier in manifest["partitions"].items()}
+            reach = manifest["reach"] = {key: value for key, value in measured.items() if value is not None}
+        return dict(reach)
+
+    def _client_entries(self) -> Dict[str, Tuple[Client, List[str]]]:
+        path = self.path / self.CLIENTS
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return {}
+        signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        if self._clients_cache is None or self._clients_cache[0] != signature:
+            entries = {}
+            for fields in serialization.loads(path.read_bytes())["clients"]:
+                client = Client.from_dict(fields)
+                entries[client.identifier] = (client, fields["partitions"])
+            self._clients_cache = (signature, entries)
+        return self._clients_cache[1]
+
+    def _write_clients(
+        self, written: List[Appointment], entries: Dict[str, Tuple[Client, List[str]]]
+    ) -> None:
+        """Record the clients and partitions of ``written``, rewriting the file only if needed."""
+
+        entries = dict(entries)
+        changed = not entries
+        for appointment in written:
+            client = appointment.client
+            key = partition_key(appointment.start_time, self.period)
+            stored, keys = entries.get(client.identifier, (None, []))
+            if stored is None or stored != client or key not in keys:
+                entries[client.identifier] = (client, sorted({*keys, key}))
+                changed = True
+        if not changed:
+            return
+        data = {"clients": [{**client.to_dict(), "partitions": keys} for client, keys in entries.values()]}
+        self._replace(self.path / self.CLIENTS, serialization.dumps(data, indent=not self.compact))
+        self._clients_cache = None
+
+
+class SQLiteStorage:
+    """Store appointments in an indexed SQLite database.
+
+    Besides the ``load``/``save`` pair shared with :class:`AppointmentStorage`
+    this backend answers lookups, time windows and overlap checks with SQL,
+    so :class:`~gestor_citas_avanzado.service.Scheduler` pushes those queries
+    down instead of filtering every row in Python.  Timestamps are stored as
+    fixed-width ISO strings, which order correctly as long as every
+    appointment uses naive datetimes (or the same UTC offset).  With
+    ``change_log`` the database records mutations in ``<path>.changes``, as
+    described for :class:`AppointmentStorage`.
+    """
+
+    _COLUMNS = (
+        "identifier, client_name, client_email, client_phone, service, "
+        "start_time, end_time, duration_minutes, status, notes, client_id, resource"
+    )
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS appointments (
+            identifier TEXT PRIMARY KEY,
+            client_name TEXT NOT NULL,
+            client_email TEXT,
+            client_phone TEXT,
+            service TEXT NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT NOT NULL,
+            duration_minutes INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            notes TEXT,
+            client_id TEXT,
+            resource TEXT
+        );
+        CREATE INDEX IF NOT EXISTS appointments_start ON appointments (start_time);
+        CREATE INDEX IF NOT EXISTS appointments_status_start ON appointments (status, start_time);
+        CREATE INDEX IF NOT EXISTS appointments_duration ON appointments (duration_minutes);
+        CREATE INDEX IF NOT EXISTS appointments_client_name ON appointments (client_name);
+        CREATE INDEX IF NOT EXISTS appointments_client_email ON appointments (client_email);
+        CREATE INDEX IF NOT EXISTS appointments_client_phone ON appointments (client_phone);
+    """
+
+    def __init__(self, path: Path, *, change_log: bool = False) -> None:
+        self.path = Path(path)
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        self._depth = 0
+        self.series = SeriesStore(self.path.with_name(self.path.name + ".series"))
+        self._changes = ChangeLog(self.path.with_name(self.path.name + ".changes"))
+        self._record_changes = change_log
+
+    @property
+    def changes(self) -> Optional[ChangeLog]:
+        """The database's change log, or ``None`` while it does not record changes."""
+
+        return self._changes if self._changes.enabled(self._record_changes) else None
+
+    # ------------------------------------------------------------------
+    # AppointmentStorage interface
+    # ------------------------------------------------------------------
+    @timed("storage.load")
+    def load(self) -> List[Appointment]:
+        """Return all stored appointments ordered by start time."""
+
+        return self._select("ORDER BY start_time")
+
+    @timed("storage.save")
     def save(self, appointments: Iterable[Appointment]) -> None:
-        """Persist the provided appointments."""
+        """Replace the stored appointments with ``appointments``."""
+
+        rows = [self._to_row(appointment) for appointment in appointments]
+        with self.transaction() as connection:
+            connection.execute("DELETE FROM appointments")
+            connection.executemany(self._UPSERT, rows)
+
+    def append(self, appointment: Appointment) -> None:
+        """Insert or replace a single appointment."""
+
+        self.extend([appointment])
+
+    @timed("storage.extend")
+    def extend(self, appointments: Iterable[Appointment]) -> None:
+        """Insert or replace several appointments in one transaction."""
+
+        rows = [self._to_row(appointment) for appointment in appointments]
+        with self.transaction() as connection:
+            connection.executemany(self._UPSERT, rows)
+
+    def signature(self) -> Tuple[int, int]:
+        """Return a value that changes whenever any connection writes."""
+
+        with self._lock:
+            connection = self._connect()
+            (data_version,) = connection.execute("PRAGMA data_version").fetchone()
+            return (data_version, connection.total_changes)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run the enclosed statements in one write transaction.
+
+        Nested calls join the outermost transaction.
+        """
+
+        with self._lock:
+            connection = self._connect()
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield connection
+                finally:
+                    self._depth -= 1
+                return
+            connection.execute("BEGIN IMMEDIATE")
+            self._depth = 1
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            else:
+                connection.execute("COMMIT")
+            finally:
+                self._depth = 0
+
+    def close(self) -> None:
+        """Close the underlying connection."""
+
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    # ------------------------------------------------------------------
+    # Pushed-down queries
+    # ------------------------------------------------------------------
+    def get(self, identifier: str) -> Optional[Appointment]:
+        """Return the appointment stored under ``identifier`` if any."""
+
+        rows = self._select("WHERE identifier = ?", (identifier,))
+        return rows[0] if rows else None
+
+    def find_between(self, start: datetime, end: datetime) -> List[Appointment]:
+        """Return non-cancelled appointments starting in ``[start, end)``."""
+
+        return self._select(
+            "WHERE start_time >= ? AND start_time < ? AND status != 'cancelled' ORDER BY start_time",
+            (_timestamp(start), _timestamp(end)),
+        )
+
+    def upcoming(self, after: datetime) -> List[Appointment]:
+        """Return appointments starting at or after ``after``."""
+
+        return self._select("WHERE start_time >= ? ORDER BY start_time", (_timestamp(after),))
+
+    def find_for_client(self, query: str) -> List[Appointment]:
+        """Return appointments whose client name, email or phone contain ``query``.
+
+        Matching follows :class:`~gestor_citas_avanzado.search.ClientSearchIndex`:
+        case and accents are ignored and phone numbers are compared digit by digit.
+        """
+
+        forms = query_forms(query)
+        if not forms:
+            return self._select("ORDER BY start_time")
+        conditions = []
+        parameters = {}
+        for position, form in enumerate(forms):
+            name = "q%d" % position
+            parameters[name] = form
+            conditions.append(
+                f"instr(py_fold(client_name), :{name}) OR instr(py_fold(client_email), :{name}) "
+                f"OR instr(py_fold(client_phone), :{name}) OR instr(py_digits(client_phone), :{name})"
+            )
+        return self._select("WHERE " + " OR ".join(conditions) + " ORDER BY start_time", parameters)
+
+    def find_by_client(self, client_id: str) -> List[Appointment]:
+        """Return the appointments booked by the client ``client_id``."""
+
+        return self._select("WHERE client_id = ? ORDER BY start_time", (client_id,))
+
+    def resolve_client(self, client: Client) -> Client:
+        """Return ``client`` carrying the identifier already stored for the same details."""
+
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT client_id FROM appointments WHERE client_name = ? AND client_email IS ? "
+                "AND client_phone IS ? LIMIT 1",
+                (client.name, client.email, client.phone),
+            ).fetchone()
+            if row is None:
+                taken = self._connect().execute(
+                    "SELECT 1 FROM appointments WHERE client_id = ? LIMIT 1", (client.identifier,)
+                ).fetchone()
+                # The identifier belongs to a client whose details were edited since.
+                return client if taken is None else renumbered(client)
+        if row[0] == client.identifier:
+            return client
+        return Client(name=client.name, email=client.email, phone=client.phone, identifier=row[0])
+
+    def clients(self) -> List[Client]:
+        """Return every distinct client with at least one appointment."""
+
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT client_id, client_name, client_email, client_phone FROM appointments "
+                "GROUP BY client_id ORDER BY client_name"
+            ).fetchall()
+        return [
+            Client(name=name, email=email, phone=phone, identifier=client_id)
+            for client_id, name, email, phone in rows
+        ]
+
+    def resources(self) -> List[str]:
+        """Return the names of the resources that have appointments."""
+
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT DISTINCT resource FROM appointments WHERE resource IS NOT NULL ORDER BY resource"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def overlapping(self, start: datetime, end: datetime, resource: Optional[str] = None) -> List[str]:
+        """Return identifiers of active appointments on ``resource`` overlapping ``[start, end)``."""
+
+        return [row[0] for row in self._overlapping(start, end, resource)]
+
+    def spans(
+        self, start: datetime, end: datetime, resource: Optional[str] = None
+    ) -> List[Tuple[datetime, datetime]]:
+        """Return ``(start, end)`` of active appointments on ``resource`` overlapping the window."""
+
+        return [
+            (datetime.fromisoformat(row[1]), datetime.fromisoformat(row[2]))
+            for row in self._overlapping(start, end, resource)
+        ]
+
+    def _overlapping(self, start: datetime, end: datetime, resource: Optional[str]) -> List[Tuple[str, str, str]]:
+        with self._lock:
+            connection = self._connect()
+            (longest,) = connection.execute(
+                "SELECT MAX(duration_minutes) FROM appointments WHERE resource IS ? AND status != 'cancelled'",
+                (resource,),
+            ).fetchone()
+            if longest is None:
+                return []
+            try:
+                lower = _timestamp(start - timedelta(minutes=longest))
+            except OverflowError:
+                lower = ""
+            return connection.execute(
+                "SELECT identifier, start_time, end_time FROM appointments WHERE resource IS ? "
+                "AND status != 'cancelled' AND start_time >= ? AND start_time < ? AND end_time > ? "
+                "ORDER BY start_time",
+                (resource, lower, _timestamp(end), _timestamp(start)),
+            ).fetchall()
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    _UPSERT = (
+        "INSERT OR REPLACE INTO appointments (" + _COLUMNS + ") VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+    )
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            import sqlite3
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            connection.create_function("py_fold", 1, _fold, deterministic=True)
+            connection.create_function("py_digits", 1, _digits, deterministic=True)
+            connection.executescript(self._SCHEMA)
+            self._migrate(connection)
+            self._connection = connection
+        return self._connection
+
+    @staticmethod
+    def _migrate(connection: sqlite3.Connection) -> None:
+        """Add the columns missing from databases created by earlier versions."""
+
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(appointments)")}
+        if "client_id" not in columns:
+            connection.execute("ALTER TABLE appointments ADD COLUMN client_id TEXT")
+        if "resource" not in columns:
+            connection.execute("ALTER TABLE appointments ADD COLUMN resource TEXT")
+        missing = connection.execute(
+            "SELECT DISTINCT client_name, client_email, client_phone FROM appointments WHERE client_id IS NULL"
+        ).fetchall()
+        if missing:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.executemany(
+                "UPDATE appointments SET client_id = ? WHERE client_id IS NULL "
+                "AND client_name = ? AND client_email IS ? AND client_phone IS ?",
+                [
+                    (Client(name=name, email=email, phone=phone).identifier, name, email, phone)
+                    for name, email, phone in missing
+                ],
+            )
+            connection.execute("COMMIT")
+        connection.execute("CREATE INDEX IF NOT EXISTS appointments_client_id ON appointments (client_id, start_time)")
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS appointments_resource_start ON appointments (resource, start_time)"
+        )
+        # Bounds the overlap look-back by active bookings only, so a cancelled long one stops widening it.
+        connection.execute("DROP INDEX IF EXISTS appointments_resource_duration")
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS appointments_active_resource_duration "
+            "ON appointments (resource, duration_minutes) WHERE status != 'cancelled'"
+        )
+
+    def _select(self, clause: str, parameters: Any = ()) -> List[Appointment]:
+        with self._lock:
+            cursor = self._connect().execute(
+                "SELECT " + self._COLUMNS + " FROM appointments " + clause, parameters
+            )
+            clients: Dict[Tuple[Any, ...], Client] = {}
+            return [self._from_row(row, clients) for row in cursor]
+
+    @staticmethod
+    def _to_row(appointment: Appointment) -> Tuple[Any, ...]:
+        client = appointment.client
+        return (
+            appointment.identifier,
+            client.name,
+            client.email,
+            client.phone,
+            appointment.service,
+            _timestamp(appointment.start_time),
+            _timestamp(appointment.end_time),
+            appointment.duration_minutes,
+            appointment.status,
+            appointment.notes,
+            client.identifier,
+            appointment.resource,
+        )
+
+    @staticmethod
+    def _from_row(row: Tuple[Any, ...], clients: Dict[Tuple[Any, ...], Client]) -> Appointment:
+        identifier, name, email, phone, service, start, _, duration, status, notes, client_id, resource = row
+        key = (name, email, phone, client_id)
+        client = clients.get(key)
+        if client is None:
+            client = clients[key] = Client(name=name, email=email, phone=phone, identifier=client_id)
+        return Appointment(
+            identifier=identifier,
+            client=client,
+            service=service,
+            start_time=datetime.fromisoformat(start),
+            duration_minutes=duration,
+            status=status,
+            notes=notes,
+            resource=resource,
+        )
+
+
+def _timestamp(value: datetime) -> str:
+    return value.isoformat(timespec="microseconds")
+
+
+def _fold(value: Optional[str]) -> Optional[str]:
+    return normalize_text(value) if value is not None else None
+
 
-        data = [appointment.to_dict() for appointment in appointments]
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        with self.path.open("w", encoding="utf-8") as handle:
-            json.dump(data, handle, indent=2, ensure_ascii=False)
+def _digits(value: Optional[str]) -> Optional[str]:
+    return normalize_phone(value) if value is not None else None
 
 
-__all__ = ["AppointmentStorage"]
+__all__ = [
+    "AppointmentStorage",
+    "ConcurrentModificationError",
+    "FileLock",
+    "JournalStorage",
+    "PARTITION_PERIODS",
+    "PartitionedStorage",
+    "SQLiteStorage",
+    "SeriesStore",
+    "atomic_write",
+    "partition_key",
+]
@@ -0,0 +1,134 @@
+"""CSV and JSON Lines import/export of appointments."""
+
+from __future__ import annotations
+
+import csv
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, TextIO, Tuple, Union
+
+from .models import Appointment, Client
+
+FORMATS = ("csv", "jsonl")
+
+CSV_FIELDS = [
+    "identifier",
+    "name",
+    "email",
+    "phone",
+    "service",
+    "start_time",
+    "duration_minutes",
+    "status",
+    "notes",
+    "resource",
+]
+
+
+def guess_format(filename: str, default: str = "jsonl") -> str:
+    """Infer the transfer format from a file name."""
+
+    lowered = filename.lower()
+    if lowered.endswith(".csv"):
+        return "csv"
+    if lowered.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    return default
+
+
+Record = Union[Dict[str, Any], str]
+
+
+def read_records(handle: TextIO, fmt: str) -> Iterator[Tuple[int, Record]]:
+    """Yield ``(line_number, record)`` pairs from a CSV or JSON Lines stream.
+
+    JSON Lines records are yielded undecoded so a malformed line only fails
+    its own :func:`appointment_from_record` call.
+    """
+
+    if fmt == "csv":
+        reader = csv.DictReader(handle)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(handle, start=1):
+        if line.strip():
+            yield line_number, line
+
+
+def appointment_from_record(record: Record) -> Appointment:
+    """Build an appointment from a flat CSV row or an ``Appointment.to_dict`` record.
+
+    Missing identifiers receive a freshly generated one; malformed values
+    raise :class:`ValueError` or :class:`KeyError`.
+    """
+
+    if isinstance(record, str):
+        record = json.loads(record)
+    if not isinstance(record, dict):
+        raise ValueError("expected an object")
+
+    if isinstance(record.get("client"), dict):
+        client = Client.from_dict(record["client"])
+    else:
+        client = Client(
+            name=record["name"],
+            email=record.get("email") or None,
+            phone=record.get("phone") or None,
+        )
+    if not client.name:
+        raise ValueError("client name is required")
+    fields: Dict[str, Any] = dict(
+        client=client,
+        service=record["service"],
+        start_time=datetime.fromisoformat(record["start_time"]),
+        duration_minutes=int(record["duration_minutes"]),
+        status=record.get("status") or "scheduled",
+        notes=record.get("notes") or None,
+        resource=record.get("resource") or None,
+    )
+    if fields["duration_minutes"] <= 0:
+        raise ValueError("duration_minutes must be positive")
+    if record.get("identifier"):
+        fields["identifier"] = record["identifier"]
+    return Appointment(**fields)
+
+
+def write_appointments(handle: TextIO, appointments: Iterable[Appointment], fmt: str) -> int:
+    """Stream ``appointments`` to ``handle`` and return how many were written."""
+
+    written = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(handle, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for appointment in appointments:
+            writer.writerow(
+                {
+                    "identifier": appointment.identifier,
+                    "name": appointment.client.name,
+                    "email": appointment.client.email or "",
+                    "phone": appointment.client.phone or "",
+                    "service": appointment.service,
+                    "start_time": appointment.start_time.isoformat(),
+                    "duration_minutes": appointment.duration_minutes,
+                    "status": appointment.status,
+                    "notes": appointment.notes or "",
+                    "resource": appointment.resource or "",
+                }
+            )
+            written += 1
+        return written
+    for appointment in appointments:
+        handle.write(json.dumps(appointment.to_dict(), ensure_ascii=False) + "\n")
+        written += 1
+    return written
+
+
+__all__ = [
+    "CSV_FIELDS",
+    "FORMATS",
+    "appointment_from_record",
+    "guess_format",
+    "read_records",
+    "write_appointments",
+]
@@ -0,0 +1,163 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from gestor_citas_avanzado.async_service import AsyncScheduler
+from gestor_citas_avanzado.models import Client
+from gestor_citas_avanzado.recurrence import Recurrence
+from gestor_citas_avanzado.service import AppointmentNotFoundError, Scheduler, SchedulingConflictError
+from gestor_citas_avanzado.storage import AppointmentStorage, SQLiteStorage
+
+BASE = datetime(2024, 8, 1, 9, 0)
+
+
+class CountingStorage(AppointmentStorage):
+    saves = 0
+
+    def save(self, appointments, **kwargs) -> None:
+        CountingStorage.saves += 1
+        super().save(appointments, **kwargs)
+
+
+def test_burst_of_writes_is_saved_once(tmp_path: Path) -> None:
+    path = tmp_path / "appointments.json"
+    CountingStorage.saves = 0
+
+    async def scenario():
+        async with AsyncScheduler(lambda: CountingStorage(path)) as scheduler:
+            results = await asyncio.gather(
+                *[
+                    scheduler.create_appointment(
+                        client=Client(name=f"Client {offset}"),
+                        service="Therapy",
+                        start_time=BASE + timedelta(minutes=30 * (offset // 2)),
+                        duration_minutes=30,
+                    )
+                    for offset in range(10)
+                ],
+                return_exceptions=True,
+            )
+            listed = await scheduler.list_appointments()
+        return results, listed
+
+    results, listed = asyncio.run(scenario())
+
+    conflicts = [result for result in results if isinstance(result, SchedulingConflictError)]
+    assert len(conflicts) == 5
+    assert len(listed) == 5
+    assert CountingStorage.saves == 1
+
+
+def test_reads_and_errors_round_trip(tmp_path: Path) -> None:
+    async def scenario():
+        def storage() -> SQLiteStorage:
+            return SQLiteStorage(tmp_path / "appointments.sqlite3", change_log=True)
+
+        async with AsyncScheduler(storage) as scheduler:
+            created = await scheduler.create_appointment(
+                client=Client(name="Ana"), service="Therapy", start_time=BASE, duration_minutes=45
+            )
+            await scheduler.update_appointment(created.identifier, notes="Bring documents")
+            fetched = await scheduler.get_appointment(created.identifier)
+            window = await scheduler.find_between(BASE, BASE + timedelta(hours=1))
+            slots = await scheduler.available_slots(BASE.date(), 60)
+            with pytest.raises(AppointmentNotFoundError):
+                await scheduler.cancel_appointment("missing")
+            changes = await scheduler.changes_since(0)
+        return fetched, window, slots, changes
+
+    fetched, window, slots, changes = asyncio.run(scenario())
+
+    assert fetched.notes == "Bring documents"
+    assert [item.identifier for item in window] == [fetched.identifier]
+    assert slots[0] == BASE + timedelta(minutes=45)
+    assert [(event.sequence, event.kind) for event in changes] == [(1, "created"), (2, "updated")]
+
+
+def test_series_through_the_writer_task(tmp_path: Path) -> None:
+    path = tmp_path / "appointments.json"
+
+    async def scenario():
+        async with AsyncScheduler(lambda: AppointmentStorage(path)) as scheduler:
+            series = await scheduler.create_series(
+                client=Client(name="Ana"),
+                service="Therapy",
+                start_time=BASE,
+                duration_minutes=30,
+                recurrence=Recurrence("weekly", count=6),
+            )
+            clash = scheduler.create_appointment(
+                client=Client(name="Luis"), service="Therapy", start_time=BASE + timedelta(weeks=2), duration_minutes=30
+            )
+            with pytest.raises(SchedulingConflictError):
+                await clash
+            window = await scheduler.find_between(BASE, BASE + timedelta(weeks=2))
+            return series, window
+
+    series, window = asyncio.run(scenario())
+    assert [item.identifier for item in window] == [series.occurrence_id(0), series.occurrence_id(1)]
+
+
+def test_unexpected_errors_only_fail_their_own_job(tmp_path: Path, monkeypatch) -> None:
+    path = tmp_path / "appointments.json"
+    CountingStorage.saves = 0
+    create = Scheduler.create_appointment
+
+    def half_applied(self, **details):
+        created = create(self, **details)
+        if details["client"].name == "Broken":
+            raise RuntimeError("disk full")
+        return created
+
+    monkeypatch.setattr(Scheduler, "create_appointment", half_applied)
+
+    async def scenario():
+        async with AsyncScheduler(lambda: CountingStorage(path)) as scheduler:
+            results = await asyncio.gather(
+                *[
+                    scheduler.create_appointment(
+                        client=Client(name=name),
+                        service="Therapy",
+                        start_time=BASE + timedelta(hours=hour),
+                        duration_minutes=30,
+                    )
+                    for hour, name in enumerate(["Ana", "Broken", "Luis", "Ana"])
+                ],
+                scheduler.cancel_appointment("missing"),
+                return_exceptions=True,
+            )
+            listed = await scheduler.list_appointments()
+        return results, listed
+
+    results, listed = asyncio.run(scenario())
+
+    names = [type(result).__name__ for result in results]
+    assert names == ["Appointment", "RuntimeError", "Appointment", "Appointment", "AppointmentNotFoundError"]
+    assert [item.client.name for item in listed] == ["Ana", "Luis", "Ana"]
+    assert CountingStorage.saves == 1
+
+
+def test_each_reader_thread_has_its_own_scheduler(tmp_path: Path, monkeypatch) -> None:
+    seen: dict = {}
+    listing = Scheduler.list_appointments
+
+    def recording(self, **options):
+        seen.setdefault(threading.get_ident(), set()).add(id(self))
+        time.sleep(0.02)
+        return listing(self, **options)
+
+    monkeypatch.setattr(Scheduler, "list_appointments", recording)
+
+    async def scenario():
+        async with AsyncScheduler(lambda: AppointmentStorage(tmp_path / "appointments.json"), readers=3) as scheduler:
+            await asyncio.gather(*[scheduler.list_appointments() for _ in range(12)])
+
+    asyncio.run(scenario())
+
+    assert len(seen) > 1
+    assert all(len(schedulers) == 1 for schedulers in seen.values())
+    assert len(set().union(*seen.values())) == len(seen)
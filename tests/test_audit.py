@@ -0,0 +1,173 @@
+import json
+import random
+import threading
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from itertools import combinations
+from pathlib import Path
+
+import pytest
+
+from gestor_citas_avanzado import audit as audit_module
+from gestor_citas_avanzado.audit import audit
+from gestor_citas_avanzado.models import Appointment, Client
+from gestor_citas_avanzado.recurrence import Recurrence, Series
+from gestor_citas_avanzado.service import Scheduler
+from gestor_citas_avanzado.storage import AppointmentStorage, JournalStorage, PartitionedStorage, SQLiteStorage
+
+MIDNIGHT = datetime(2024, 4, 1)
+
+
+@pytest.fixture(params=["json", "journal", "partitioned", "sqlite"])
+def storage(request: pytest.FixtureRequest, tmp_path: Path):
+    if request.param == "sqlite":
+        storage = SQLiteStorage(tmp_path / "appointments.sqlite3")
+        request.addfinalizer(storage.close)
+        return storage
+    if request.param == "journal":
+        return JournalStorage(tmp_path / "appointments.json")
+    if request.param == "partitioned":
+        return PartitionedStorage(tmp_path / "appointments")
+    return AppointmentStorage(tmp_path / "appointments.json")
+
+
+def booking(minutes: int, duration: int, resource=None, status: str = "scheduled") -> Appointment:
+    return Appointment(
+        client=Client(name="Ana"),
+        service="Cut",
+        start_time=MIDNIGHT + timedelta(minutes=minutes),
+        duration_minutes=duration,
+        resource=resource,
+        status=status,
+    )
+
+
+def overlapping_pairs(appointments) -> set:
+    active = [item for item in appointments if item.status != "cancelled"]
+    return {
+        frozenset((first.identifier, second.identifier))
+        for first, second in combinations(active, 2)
+        if first.resource == second.resource
+        and first.start_time < second.end_time
+        and second.start_time < first.end_time
+    }
+
+
+def test_sweep_matches_pairwise_comparison_across_midnight() -> None:
+    rng = random.Random(7)
+    appointments = [
+        booking(
+            rng.randrange(5 * 1440),
+            rng.choice([15, 30, 60, 300, 2000]),
+            rng.choice([None, "room"]),
+            rng.choice(["scheduled", "scheduled", "cancelled"]),
+        )
+        for _ in range(300)
+    ]
+    expected = overlapping_pairs(appointments)
+
+    for shard_by in ("day", "resource"):
+        report = audit(appointments, workers=1, shard_by=shard_by)
+        assert {frozenset(pair[:2]) for pair in report.conflicts} == expected
+        assert len(report.conflicts) == len(expected)
+    assert report.checked == 300 and not report.invalid and not report.duplicates
+
+
+def test_pool_gives_the_same_report(monkeypatch: pytest.MonkeyPatch) -> None:
+    rng = random.Random(3)
+    rows = [booking(rng.randrange(3 * 1440), 45, rng.choice(["a", "b"])).to_dict() for _ in range(400)]
+    rows[5]["duration_minutes"] = 0
+    rows.append(dict(rows[0]))
+
+    serial = audit(rows, workers=1)
+    monkeypatch.setattr(audit_module, "PARALLEL_THRESHOLD", 10)
+    parallel = audit(rows, workers=2)
+
+    assert parallel == serial and serial.conflicts
+    assert serial.invalid == [(5, rows[5]["identifier"], "duration_minutes must be a positive integer")]
+    assert serial.duplicates == [rows[0]["identifier"]]
+
+
+def test_bookings_sharing_a_minute_only_clash_on_their_exact_times() -> None:
+    def at(start: datetime, duration: int) -> Appointment:
+        return replace(booking(0, duration), start_time=start)
+
+    early = at(MIDNIGHT + timedelta(hours=9, seconds=30), 1)
+    later = at(MIDNIGHT + timedelta(hours=9, minutes=1, seconds=45), 10)
+    touching = at(MIDNIGHT + timedelta(hours=9, minutes=1, seconds=30), 10)
+    inside = at(MIDNIGHT + timedelta(hours=9, minutes=1, seconds=29), 10)
+    late_night = at(MIDNIGHT - timedelta(minutes=2, seconds=30), 5)
+    after_midnight = at(MIDNIGHT + timedelta(minutes=2, seconds=30), 5)
+    cases = [
+        ([early, later, late_night, after_midnight], set()),
+        ([early, touching, later], {frozenset((touching.identifier, later.identifier))}),
+        ([early, inside], {frozenset((early.identifier, inside.identifier))}),
+    ]
+
+    for records, expected in cases:
+        assert overlapping_pairs(records) == expected
+        for rows in (records, [item.to_dict() for item in records]):
+            for shard_by in ("day", "resource"):
+                report = audit(rows, workers=1, shard_by=shard_by)
+                assert {frozenset(pair[:2]) for pair in report.conflicts} == expected
+
+    madrid = at(datetime(2024, 4, 1, 11, 0, 30, tzinfo=timezone(timedelta(hours=2))), 30)
+    utc = at(datetime(2024, 4, 1, 9, 30, 30, tzinfo=timezone.utc), 30)
+    assert audit([madrid, utc], workers=1).ok
+    assert audit([madrid.to_dict(), utc.to_dict()], workers=1).ok
+
+
+def test_audits_from_a_threaded_process_spawn_their_workers(monkeypatch: pytest.MonkeyPatch) -> None:
+    rows = [booking(minutes, 45, "a").to_dict() for minutes in range(0, 600, 30)]
+    monkeypatch.setattr(audit_module, "PARALLEL_THRESHOLD", 10)
+    methods = []
+    executor = audit_module.ProcessPoolExecutor
+
+    def recording(*args, mp_context, **kwargs):
+        methods.append(mp_context.get_start_method())
+        return executor(*args, mp_context=mp_context, **kwargs)
+
+    monkeypatch.setattr(audit_module, "ProcessPoolExecutor", recording)
+    reports = []
+    thread = threading.Thread(target=lambda: reports.append(audit(rows, workers=2)))
+    thread.start()
+    thread.join()
+
+    assert methods == ["spawn"]
+    assert reports == [audit(rows, workers=1)] and len(reports[0].conflicts) == 19
+
+
+def test_scheduler_audit_covers_stored_rows_and_series(storage) -> None:
+    scheduler = Scheduler(storage)
+    clean = [booking(9 * 60, 60), booking(10 * 60, 60), booking(9 * 60, 60, "room")]
+    storage.save(clean)
+    assert scheduler.audit(workers=1).ok
+
+    series = Series(
+        client=Client(name="Luis"),
+        service="Cut",
+        start_time=MIDNIGHT + timedelta(hours=10, minutes=30),
+        duration_minutes=30,
+        recurrence=Recurrence("daily", count=2),
+    )
+    storage.series.put([series])
+    storage.save([*clean, booking(9 * 60 + 30, 15)])
+
+    report = scheduler.audit(workers=1)
+    pairs = {frozenset(pair[:2]) for pair in report.conflicts}
+    assert len(report.conflicts) == 2 and report.checked == 6
+    assert frozenset((clean[1].identifier, series.occurrence_id(0))) in pairs
+
+
+def test_malformed_rows_are_reported_instead_of_aborting(tmp_path: Path) -> None:
+    path = tmp_path / "appointments.json"
+    storage = AppointmentStorage(path)
+    storage.save([booking(0, 30), booking(60, 30)])
+    document = json.loads(path.read_text())
+    document["appointments"][0]["start_time"] = "yesterday"
+    document["appointments"][1]["client"] = "nobody"
+    path.write_text(json.dumps(document))
+
+    report = Scheduler(storage).audit(workers=1)
+
+    assert [reason for _, _, reason in report.invalid] == ["invalid start_time", "unknown client 'nobody'"]
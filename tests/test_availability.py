@@ -0,0 +1,62 @@
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+
+import pytest
+
+from gestor_citas_avanzado.availability import free_slots, parse_working_hours, working_windows
+from gestor_citas_avanzado.cli import main
+from gestor_citas_avanzado.models import Client
+from gestor_citas_avanzado.service import Scheduler
+from gestor_citas_avanzado.storage import AppointmentStorage, SQLiteStorage
+
+MINUTE = timedelta(minutes=1)
+
+
+def at(hour: int, minute: int = 0, day: int = 3) -> datetime:
+    return datetime(2024, 6, day, hour, minute)
+
+
+def test_free_slots_merges_overlapping_busy_intervals() -> None:
+    busy = [(at(9, 30), at(10, 30)), (at(10, 0), at(11, 0)), (at(11, 50), at(12, 0))]
+    slots = free_slots(busy, [(at(9), at(12))], 30 * MINUTE, 15 * MINUTE)
+
+    assert slots == [at(9), at(11), at(11, 15)]
+
+
+def test_busy_interval_spanning_windows_blocks_both() -> None:
+    windows = list(working_windows(at(0), at(0, day=4), parse_working_hours("09:00-10:00,10:30-11:30")))
+    slots = free_slots([(at(9, 30), at(10, 45))], windows, 30 * MINUTE, 15 * MINUTE)
+
+    assert slots == [at(9), at(10, 45), at(11)]
+
+
+def test_parse_working_hours_rejects_inverted_ranges() -> None:
+    assert parse_working_hours("16:00-20:00, 09:00-13:00") == ((time(9), time(13)), (time(16), time(20)))
+    with pytest.raises(ValueError):
+        parse_working_hours("13:00-09:00")
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_scheduler_available_slots_skips_bookings(tmp_path: Path, backend: str) -> None:
+    if backend == "sqlite":
+        storage = SQLiteStorage(tmp_path / "appointments.sqlite3")
+    else:
+        storage = AppointmentStorage(tmp_path / "appointments.json")
+    scheduler = Scheduler(storage)
+    scheduler.create_appointment(client=Client(name="A"), service="Cut", start_time=at(9, 15), duration_minutes=45)
+    cancelled = scheduler.create_appointment(client=Client(name="B"), service="Cut", start_time=at(10), duration_minutes=60)
+    scheduler.cancel_appointment(cancelled.identifier)
+
+    slots = scheduler.available_slots(date(2024, 6, 3), 45, 15, parse_working_hours("09:00-11:00"))
+
+    assert slots == [at(10), at(10, 15)]
+
+
+def test_slots_subcommand(tmp_path: Path, capsys) -> None:
+    database = tmp_path / "appointments.json"
+    main(["--database", str(database), "add", "--name", "A", "--service", "Cut", "--start", "2024-06-03T09:00", "--duration", "30"])
+    capsys.readouterr()
+
+    main(["--database", str(database), "slots", "--date", "2024-06-03", "--duration", "30", "--granularity", "30", "--hours", "09:00-10:30"])
+
+    assert capsys.readouterr().out.splitlines() == ["2024-06-03 09:30", "2024-06-03 10:00"]
@@ -0,0 +1,170 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from gestor_citas_avanzado.changes import ChangeLog
+from gestor_citas_avanzado.models import Appointment, Client
+from gestor_citas_avanzado.recurrence import Recurrence
+from gestor_citas_avanzado.service import Scheduler
+from gestor_citas_avanzado.storage import AppointmentStorage, JournalStorage, PartitionedStorage, SQLiteStorage
+
+START = datetime(2024, 3, 4, 9, 0)
+
+
+@pytest.fixture(params=["json", "journal", "partitioned", "sqlite"])
+def scheduler(request: pytest.FixtureRequest, tmp_path: Path) -> Scheduler:
+    if request.param == "sqlite":
+        storage = SQLiteStorage(tmp_path / "appointments.sqlite3", change_log=True)
+        request.addfinalizer(storage.close)
+    elif request.param == "journal":
+        storage = JournalStorage(tmp_path / "appointments.json", change_log=True)
+    elif request.param == "partitioned":
+        storage = PartitionedStorage(tmp_path / "appointments", change_log=True)
+    else:
+        storage = AppointmentStorage(tmp_path / "appointments.json", change_log=True)
+    return Scheduler(storage)
+
+
+def booking(name: str, hours: int) -> Appointment:
+    return Appointment(
+        client=Client(name=name), service="Cut", start_time=START + timedelta(hours=hours), duration_minutes=30
+    )
+
+
+def summary(events) -> list:
+    return [(event.sequence, event.kind, event.entity, event.identifier) for event in events]
+
+
+def test_mutations_are_numbered_and_published(scheduler: Scheduler) -> None:
+    received = []
+    unsubscribe = scheduler.subscribe(received.append)
+
+    ana = scheduler.create_appointment(client=Client(name="Ana"), service="Cut", start_time=START, duration_minutes=30)
+    scheduler.update_appointment(ana.identifier, notes="Short")
+    scheduler.update_appointment(ana.identifier, notes="Short")
+    scheduler.cancel_appointment(ana.identifier)
+    series = scheduler.create_series(
+        client=Client(name="Luis"),
+        service="Cut",
+        start_time=START + timedelta(hours=2),
+        duration_minutes=30,
+        recurrence=Recurrence("daily", count=3),
+    )
+    scheduler.complete_appointment(series.occurrence_id(1))
+    unsubscribe()
+    scheduler.cancel_series(series.identifier)
+
+    events = scheduler.changes_since(0)
+    assert summary(events) == [
+        (1, "created", "appointment", ana.identifier),
+        (2, "updated", "appointment", ana.identifier),
+        (3, "status_changed", "appointment", ana.identifier),
+        (4, "created", "series", series.identifier),
+        (5, "status_changed", "appointment", series.occurrence_id(1)),
+        (6, "updated", "series", series.identifier),
+        (7, "status_changed", "series", series.identifier),
+    ]
+    assert events[2].previous_status == "scheduled" and events[2].data["status"] == "cancelled"
+    assert events[5].data["detached"] == [1]
+    assert received == events[:6]
+    assert summary(scheduler.changes_since(5, limit=1)) == [(6, "updated", "series", series.identifier)]
+
+
+def test_batches_publish_once_committed(scheduler: Scheduler) -> None:
+    received = []
+    scheduler.subscribe(received.append)
+
+    with pytest.raises(RuntimeError):
+        with scheduler.batch():
+            scheduler.bulk_create([booking("Ana", 0)])
+            raise RuntimeError("abort")
+    assert received == [] and scheduler.changes_since(0) == []
+
+    with scheduler.batch():
+        result = scheduler.bulk_create([booking("Ana", 0), booking("Bea", 0), booking("Eva", 1)])
+        assert received == []
+    assert [event.identifier for event in received] == [item.identifier for item in result.created]
+    assert [event.sequence for event in scheduler.changes_since(0)] == [1, 2]
+
+    client_id = result.created[0].client.identifier
+    scheduler.update_client(client_id, email="ana@example.com")
+    assert received[-1].kind == "updated" and received[-1].data["client"]["email"] == "ana@example.com"
+
+
+def test_subscriber_errors_reach_the_caller_after_every_subscriber_ran(scheduler: Scheduler) -> None:
+    received = []
+
+    def failing(event) -> None:
+        raise ValueError("broken consumer")
+
+    scheduler.subscribe(failing)
+    scheduler.subscribe(received.append)
+
+    with pytest.raises(ValueError):
+        scheduler.create_appointment(client=Client(name="Ana"), service="Cut", start_time=START, duration_minutes=30)
+    assert len(received) == 1 and len(scheduler.list_appointments()) == 1
+
+
+def test_change_log_seeks_to_the_sequence_and_repairs_a_torn_tail(tmp_path: Path) -> None:
+    log = ChangeLog(tmp_path / "appointments.json.changes")
+    assert log.since(0) == [] and log.last_sequence() == 0
+
+    for hours in range(300):
+        log.append([("created", "appointment", booking(f"Client {hours}", hours), None)])
+    assert [event.sequence for event in log.since(0, limit=2)] == [1, 2]
+    assert [event.sequence for event in log.since(137, limit=3)] == [138, 139, 140]
+    assert log.since(300) == [] and log.since(-5, limit=1)[0].sequence == 1
+
+    with log.path.open("ab") as handle:
+        handle.write(b'{"sequence":301,"kind":"crea')
+    assert log.last_sequence() == 300 and log.since(299)[-1].sequence == 300
+
+    appended = log.append([("updated", "appointment", booking("Ana", 0), None)])
+    assert appended[0].sequence == 301
+    assert [event.kind for event in log.since(299)] == ["created", "updated"]
+
+
+def test_trimming_keeps_the_numbering_and_the_newest_event(tmp_path: Path) -> None:
+    log = ChangeLog(tmp_path / "appointments.json.changes")
+    assert log.trim(10) == 0
+    for hours in range(20):
+        log.append([("created", "appointment", booking(f"Client {hours}", hours), None)])
+
+    assert log.trim(0) == 0
+    assert log.trim(12) == 12
+    assert [event.sequence for event in log.since(0, limit=2)] == [13, 14]
+    assert log.trim(50) == 7
+    assert [event.sequence for event in log.since(0)] == [20]
+    assert log.append([("updated", "appointment", booking("Ana", 0), None)])[0].sequence == 21
+
+
+def test_change_log_is_opt_in(tmp_path: Path) -> None:
+    path = tmp_path / "appointments.json"
+    scheduler = Scheduler(AppointmentStorage(path))
+    received = []
+    scheduler.subscribe(received.append)
+    scheduler.create_appointment(client=Client(name="Ana"), service="Cut", start_time=START, duration_minutes=30)
+
+    assert len(received) == 1 and not path.with_name("appointments.json.changes").exists()
+    with pytest.raises(TypeError):
+        scheduler.changes_since(0)
+    with pytest.raises(TypeError):
+        scheduler.trim_changes(1)
+
+
+def test_every_writer_records_once_the_database_does(tmp_path: Path) -> None:
+    path = tmp_path / "appointments.json"
+    resident = Scheduler(AppointmentStorage(path), cache=True)
+    resident.create_appointment(client=Client(name="Ana"), service="Cut", start_time=START, duration_minutes=30)
+
+    Scheduler(AppointmentStorage(path, change_log=True))
+    resident.create_appointment(
+        client=Client(name="Bea"), service="Cut", start_time=START + timedelta(hours=1), duration_minutes=30
+    )
+    Scheduler(AppointmentStorage(path)).create_appointment(
+        client=Client(name="Carla"), service="Cut", start_time=START + timedelta(hours=2), duration_minutes=30
+    )
+
+    events = Scheduler(AppointmentStorage(path)).changes_since(0)
+    assert [(event.sequence, event.data["client"]["name"]) for event in events] == [(1, "Bea"), (2, "Carla")]
@@ -0,0 +1,145 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from gestor_citas_avanzado.cli import main
+from gestor_citas_avanzado.models import Appointment, Client
+from gestor_citas_avanzado.service import Scheduler
+from gestor_citas_avanzado.storage import AppointmentStorage
+
+BASE = datetime(2024, 10, 7, 9, 0)
+
+
+@pytest.fixture
+def database(tmp_path: Path) -> list:
+    path = tmp_path / "appointments.json"
+    appointments = [
+        Appointment(
+            client=Client(name=f"Client {position}"),
+            service="Cut",
+            start_time=BASE + timedelta(hours=position // 2),
+            duration_minutes=30,
+            resource=f"chair {position % 2}",
+        )
+        for position in range(7)
+    ]
+    AppointmentStorage(path).save(appointments)
+    return ["--database", str(path)]
+
+
+def listed(capsys, database: list, *options: str) -> list:
+    main([*database, "list", *options])
+    return capsys.readouterr().out.splitlines()
+
+
+def test_limit_and_offset(database: list, capsys) -> None:
+    everything = listed(capsys, database)
+    assert len(everything) == 7
+    assert listed(capsys, database, "--offset", "2", "--limit", "3") == everything[2:5]
+    assert listed(capsys, database, "--offset", "10") == []
+    assert listed(capsys, database, "--limit", "0") == []
+
+
+@pytest.mark.parametrize(
+    "options", [["list", "--limit", "-1"], ["list", "--offset", "-1"], ["changes", "--limit", "-2"]]
+)
+def test_negative_counts_are_rejected(database: list, capsys, options: list) -> None:
+    with pytest.raises(SystemExit) as raised:
+        main([*database, *options])
+
+    assert raised.value.code == 2
+    assert "must not be negative" in capsys.readouterr().err
+
+
+def test_cursor_pages_cover_the_listing_once(database: list, capsys) -> None:
+    everything = listed(capsys, database)
+    pages, options = [], ["--limit", "2"]
+    while True:
+        main([*database, "list", *options])
+        captured = capsys.readouterr()
+        pages.extend(captured.out.splitlines())
+        if not captured.err:
+            break
+        options = ["--limit", "2", *captured.err.split(": ", 1)[1].split()]
+
+    assert pages == everything
+
+
+def test_machine_readable_formats(database: list, capsys) -> None:
+    rows = [json.loads(line) for line in listed(capsys, database, "--format", "jsonl", "--resource", "chair 1")]
+    assert [row["client"]["name"] for row in rows] == ["Client 1", "Client 3", "Client 5"]
+
+    main([*database, "list", "--format", "csv", "--limit", "2"])
+    captured = capsys.readouterr()
+    records = list(csv.DictReader(io.StringIO(captured.out)))
+    assert [record["name"] for record in records] == ["Client 0", "Client 1"]
+    assert captured.err.startswith("Next page: --cursor 2024-10-07T09:00:00/")
+
+
+def test_changes_feed_resumes_after_a_sequence(database: list, capsys) -> None:
+    with pytest.raises(SystemExit, match="not recording changes"):
+        main([*database, "changes"])
+    recording = [*database, "--change-log"]
+    main([*recording, "add", "--name", "Ana", "--service", "Cut", "--start", "2024-10-08T09:00", "--duration", "30"])
+    created = capsys.readouterr().out.split()[-1]
+    # Recorded too: the database records changes once any writer turned it on.
+    main([*database, "cancel", created])
+    main([*database, "add", "--name", "Bea", "--service", "Cut", "--start", "2024-10-08T10:00", "--duration", "30"])
+    capsys.readouterr()
+
+    main([*database, "changes", "--limit", "1"])
+    captured = capsys.readouterr()
+    assert captured.out.startswith("1 | ") and captured.out.rstrip().endswith(f"created | appointment {created}")
+    assert captured.err.strip() == "More changes: --since 1"
+
+    main([*database, "changes", "--since", "1", "--format", "jsonl"])
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(event["sequence"], event["kind"], event["previous_status"]) for event in events] == [
+        (2, "status_changed", "scheduled"),
+        (3, "created", None),
+    ]
+    assert events[0]["data"]["status"] == "cancelled"
+
+    main([*database, "changes", "--trim", "1"])
+    assert capsys.readouterr().out == "Removed 1 changes\n"
+    main([*database, "changes"])
+    assert [line.split(" | ")[0] for line in capsys.readouterr().out.splitlines()] == ["2", "3"]
+
+
+def test_changes_errors_are_not_mistaken_for_a_missing_log(database: list, monkeypatch) -> None:
+    # Turns recording on for the database.
+    main([*database, "--change-log", "list"])
+
+    def broken(self, sequence, *, limit=None):
+        raise TypeError("unsupported operand")
+
+    monkeypatch.setattr(Scheduler, "changes_since", broken)
+    with pytest.raises(TypeError, match="unsupported operand"):
+        main([*database, "changes"])
+
+
+def test_audit_reports_overlaps_and_sets_the_exit_status(database: list, capsys) -> None:
+    main([*database, "audit", "--workers", "1"])
+    assert capsys.readouterr().out.startswith("Checked 7 appointments: 0 conflicts, 0 invalid records")
+
+    storage = AppointmentStorage(Path(database[1]))
+    stored = storage.load()
+    clash = Appointment(
+        client=Client(name="Eva"),
+        service="Cut",
+        start_time=BASE + timedelta(minutes=15),
+        duration_minutes=15,
+        resource="chair 0",
+    )
+    storage.save([*stored, clash])
+
+    with pytest.raises(SystemExit) as raised:
+        main([*database, "audit", "--workers", "1", "--shard", "resource"])
+    assert raised.value.code == 1
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith("Checked 8 appointments: 1 conflicts")
+    assert lines[1:] == [f"conflict | {stored[0].identifier} | {clash.identifier} | chair 0"]
@@ -0,0 +1,193 @@
+import json
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from gestor_citas_avanzado.cli import main
+from gestor_citas_avanzado.clients import ClientRegistry
+from gestor_citas_avanzado.models import Appointment, Client
+from gestor_citas_avanzado.recurrence import Recurrence
+from gestor_citas_avanzado.service import ClientNotFoundError, Scheduler
+from gestor_citas_avanzado.storage import AppointmentStorage, JournalStorage, PartitionedStorage, SQLiteStorage
+
+BASE = datetime(2024, 7, 1, 9, 0)
+
+
+def make_appointment(client: Client, hours: int = 0) -> Appointment:
+    return Appointment(client=client, service="Therapy", start_time=BASE + timedelta(hours=hours), duration_minutes=30)
+
+
+@pytest.fixture(params=["json", "journal", "partitioned", "sqlite"])
+def scheduler(request: pytest.FixtureRequest, tmp_path: Path) -> Scheduler:
+    if request.param == "sqlite":
+        storage = SQLiteStorage(tmp_path / "appointments.sqlite3")
+        request.addfinalizer(storage.close)
+    elif request.param == "journal":
+        storage = JournalStorage(tmp_path / "appointments.json")
+    elif request.param == "partitioned":
+        storage = PartitionedStorage(tmp_path / "appointments")
+    else:
+        storage = AppointmentStorage(tmp_path / "appointments.json")
+    return Scheduler(storage)
+
+
+def test_client_identifier_is_derived_from_details() -> None:
+    ana = Client(name="Ana", email="ana@example.com")
+    assert ana.identifier == Client(name="Ana", email="ana@example.com").identifier
+    assert Client(name="Ana").identifier != Client(name="Ana", phone="600").identifier
+    assert Client(name="Ana", identifier="c1") == Client(name="Ana")
+
+
+def test_registry_indexes_appointments_per_client() -> None:
+    ana, luis = Client(name="Ana"), Client(name="Luis")
+    first, second, third = make_appointment(ana), make_appointment(ana, 1), make_appointment(luis, 2)
+    registry = ClientRegistry([first, second, third])
+
+    assert len(registry) == 2
+    assert registry.appointments_for(ana.identifier) == {first.identifier, second.identifier}
+
+    registry.add(Appointment(**{**_fields(third), "client": ana}))
+    assert luis.identifier not in registry
+    assert registry.appointments_for(ana.identifier) == {first.identifier, second.identifier, third.identifier}
+
+
+def _fields(appointment: Appointment) -> dict:
+    return dict(
+        client=appointment.client,
+        service=appointment.service,
+        start_time=appointment.start_time,
+        duration_minutes=appointment.duration_minutes,
+        identifier=appointment.identifier,
+    )
+
+
+def test_update_client_keeps_identifier(scheduler: Scheduler) -> None:
+    ana = Client(name="Ana", email="ana@example.com")
+    for hours in range(3):
+        scheduler.create_appointment(
+            client=ana, service="Therapy", start_time=BASE + timedelta(hours=hours), duration_minutes=30
+        )
+    scheduler.create_appointment(
+        client=Client(name="Luis"), service="Therapy", start_time=BASE + timedelta(hours=5), duration_minutes=30
+    )
+
+    renamed = scheduler.update_client(ana.identifier, email="ana@example.org")
+
+    assert renamed.identifier == ana.identifier
+    assert scheduler.get_client(ana.identifier).email == "ana@example.org"
+    booked = scheduler.appointments_for_client(ana.identifier)
+    assert [item.client.email for item in booked] == ["ana@example.org"] * 3
+    assert [client.name for client in scheduler.list_clients()] == ["Ana", "Luis"]
+
+    again = scheduler.create_appointment(
+        client=Client(name="Ana", email="ana@example.org"),
+        service="Therapy",
+        start_time=BASE + timedelta(hours=8),
+        duration_minutes=30,
+    )
+    assert again.client.identifier == ana.identifier
+    with pytest.raises(ClientNotFoundError):
+        scheduler.get_client("missing")
+
+
+def test_booking_under_edited_details_gets_its_own_client(scheduler: Scheduler) -> None:
+    old = Client(name="Ana", email="old@example.com")
+    first = scheduler.create_appointment(client=old, service="Therapy", start_time=BASE, duration_minutes=30)
+    scheduler.update_client(old.identifier, email="new@example.com")
+
+    again = scheduler.create_appointment(
+        client=Client(name="Ana", email="old@example.com"),
+        service="Therapy",
+        start_time=BASE + timedelta(hours=2),
+        duration_minutes=30,
+    )
+    third = scheduler.create_appointment(
+        client=Client(name="Ana", email="old@example.com"),
+        service="Therapy",
+        start_time=BASE + timedelta(hours=4),
+        duration_minutes=30,
+    )
+
+    assert again.client.identifier != old.identifier
+    assert third.client.identifier == again.client.identifier
+    assert scheduler.get_appointment(again.identifier).client.email == "old@example.com"
+    assert scheduler.get_appointment(first.identifier).client.email == "new@example.com"
+    assert sorted(client.email for client in scheduler.list_clients()) == ["new@example.com", "old@example.com"]
+
+
+def test_booking_under_edited_series_client_details_gets_its_own_client(scheduler: Scheduler) -> None:
+    old = Client(name="Eva", phone="600")
+    scheduler.create_series(
+        client=old, service="Therapy", start_time=BASE, duration_minutes=30, recurrence=Recurrence("daily", count=2)
+    )
+    scheduler.update_client(old.identifier, phone="700")
+
+    again = scheduler.create_appointment(
+        client=Client(name="Eva", phone="600"),
+        service="Therapy",
+        start_time=BASE + timedelta(hours=3),
+        duration_minutes=30,
+    )
+
+    assert again.client.identifier != old.identifier
+    assert scheduler.get_series(scheduler.list_series()[0].identifier).client.phone == "700"
+
+
+def test_embedded_files_are_migrated_to_a_client_table(tmp_path: Path) -> None:
+    path = tmp_path / "appointments.json"
+    ana = Client(name="Ana", email="ana@example.com", phone="600 000 000")
+    appointments = [make_appointment(ana, hours) for hours in range(20)]
+    path.write_text(json.dumps([item.to_dict() for item in appointments]), encoding="utf-8")
+    legacy_size = path.stat().st_size
+
+    storage = AppointmentStorage(path, compact=True)
+    assert storage.load() == appointments
+    storage.save(storage.load())
+
+    document = json.loads(path.read_text(encoding="utf-8"))
+    assert document["version"] == 2
+    assert [client["name"] for client in document["clients"]] == ["Ana"]
+    assert {row["client"] for row in document["appointments"]} == {ana.identifier}
+    assert path.stat().st_size < legacy_size
+    assert AppointmentStorage(path).load() == appointments
+
+
+def test_sqlite_databases_gain_client_ids(tmp_path: Path) -> None:
+    path = tmp_path / "appointments.sqlite3"
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE appointments (identifier TEXT PRIMARY KEY, client_name TEXT NOT NULL, client_email TEXT, "
+        "client_phone TEXT, service TEXT NOT NULL, start_time TEXT NOT NULL, end_time TEXT NOT NULL, "
+        "duration_minutes INTEGER NOT NULL, status TEXT NOT NULL, notes TEXT)"
+    )
+    connection.execute(
+        "INSERT INTO appointments VALUES ('a1', 'Ana', NULL, NULL, 'Therapy', "
+        "'2024-07-01T09:00:00.000000', '2024-07-01T09:30:00.000000', 30, 'scheduled', NULL)"
+    )
+    connection.commit()
+    connection.close()
+
+    storage = SQLiteStorage(path)
+    try:
+        [appointment] = Scheduler(storage).appointments_for_client(Client(name="Ana").identifier)
+        assert appointment.identifier == "a1"
+    finally:
+        storage.close()
+
+
+def test_clients_and_migrate_commands(tmp_path: Path, capsys) -> None:
+    database = tmp_path / "appointments.json"
+    client = Client(name="Eva", phone="611")
+    database.write_text(json.dumps([make_appointment(client).to_dict()]), encoding="utf-8")
+
+    main(["--database", str(database), "migrate"])
+    assert capsys.readouterr().out.strip() == "Migrated 1 appointments of 1 clients"
+    assert json.loads(database.read_text(encoding="utf-8"))["version"] == 2
+
+    main(["--database", str(database), "clients"])
+    assert capsys.readouterr().out.strip() == f"{client.identifier} | Eva | - | 611"
+
+    main(["--database", str(database), "list", "--client-id", client.identifier])
+    assert "Eva" in capsys.readouterr().out
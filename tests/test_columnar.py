@@ -0,0 +1,134 @@
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from gestor_citas_avanzado.cli import main
+from gestor_citas_avanzado.columnar import ColumnarSnapshot, encode_columns
+from gestor_citas_avanzado.models import Appointment, Client
+from gestor_citas_avanzado.recurrence import Recurrence
+from gestor_citas_avanzado.service import Scheduler
+from gestor_citas_avanzado.storage import AppointmentStorage, JournalStorage
+
+BASE = datetime(2024, 6, 3, 9, 0)
+
+
+def calendar() -> list:
+    ana = Client(name="Ana Núñez", email="ana@example.com")
+    bruno = Client(name="Bruno", phone="600 111 222")
+    return [
+        Appointment(client=ana, service="Corte", start_time=BASE + timedelta(days=2), duration_minutes=30),
+        Appointment(client=bruno, service="Tinte", start_time=BASE, duration_minutes=90, resource="Marta"),
+        Appointment(
+            client=ana,
+            service="Corte",
+            start_time=BASE + timedelta(hours=1, seconds=20, microseconds=5),
+            duration_minutes=45,
+            status="cancelled",
+            notes="Llamar antes ☎",
+            resource="Luis",
+        ),
+        Appointment(client=bruno, service="Corte", start_time=BASE, duration_minutes=30, resource="Luis"),
+    ]
+
+
+def test_snapshot_round_trips_and_bisects_the_time_column(tmp_path: Path) -> None:
+    aware = Appointment(
+        client=Client(name="Zoe"),
+        service="Corte",
+        start_time=datetime(2024, 6, 3, 11, 30, tzinfo=timezone(timedelta(hours=2))),
+        duration_minutes=30,
+    )
+    utc = replace(aware, identifier="utc", start_time=datetime(2024, 6, 3, 9, 30, tzinfo=timezone.utc))
+    stored = calendar()
+    path = tmp_path / "appointments.json.columns"
+    path.write_bytes(encode_columns(stored, (1, 2, 3)))
+    snapshot = ColumnarSnapshot.open(path, (1, 2, 3))
+
+    expected = sorted(stored, key=lambda item: item.start_time)
+    assert list(snapshot.iter_appointments()) == expected
+    assert list(snapshot.iter_appointments(BASE + timedelta(minutes=1), BASE + timedelta(days=2))) == expected[2:3]
+    same_start = sorted(expected[:2], key=lambda item: item.identifier)
+    assert snapshot.find_between(BASE, BASE + timedelta(days=1)) == same_start
+    assert snapshot.find_between(BASE, BASE + timedelta(days=1), "Luis") == [stored[3]]
+    assert snapshot.upcoming(BASE + timedelta(hours=1)) == expected[2:]
+    assert snapshot.resources() == {None, "Luis", "Marta"}
+    assert ColumnarSnapshot.open(path, (1, 2, 4)) is None
+
+    path.write_bytes(encode_columns([aware, utc], (1, 2, 3)))
+    mixed = ColumnarSnapshot.open(path)
+    assert list(mixed.iter_appointments()) == [aware, utc]
+    assert [item.start_time.utcoffset() for item in mixed.iter_appointments()] == [timedelta(hours=2), timedelta(0)]
+    path.write_bytes(path.read_bytes()[:-3])
+    assert ColumnarSnapshot.open(path) is None
+
+
+def test_columnar_scheduler_answers_reads_without_loading_the_json(tmp_path: Path, monkeypatch) -> None:
+    path = tmp_path / "appointments.json"
+    writer = Scheduler(AppointmentStorage(path, columnar=True))
+    writer.bulk_create(calendar())
+    writer.create_series(
+        client=Client(name="Carla"),
+        service="Manicura",
+        start_time=BASE + timedelta(hours=4),
+        duration_minutes=30,
+        recurrence=Recurrence("daily", count=3),
+    )
+    plain = Scheduler(AppointmentStorage(path))
+    storage = AppointmentStorage(path, columnar=True)
+    monkeypatch.setattr(storage, "load", lambda: pytest.fail("the JSON file was parsed"))
+    columnar = Scheduler(storage, cache=True)
+    window = (BASE, BASE + timedelta(days=1, hours=12))
+
+    assert columnar.list_appointments() == plain.list_appointments()
+    assert columnar.list_appointments(resource="Luis") == plain.list_appointments(resource="Luis")
+    assert list(columnar.iter_appointments(start=window[0], end=window[1])) == list(
+        plain.iter_appointments(start=window[0], end=window[1])
+    )
+    assert columnar.find_between(*window) == plain.find_between(*window)
+    assert columnar.upcoming(after=BASE + timedelta(hours=1)) == plain.upcoming(after=BASE + timedelta(hours=1))
+    assert columnar.resources() == plain.resources() == ["Luis", "Marta"]
+
+
+def test_stale_or_damaged_snapshots_are_rebuilt(tmp_path: Path) -> None:
+    path = tmp_path / "appointments.json"
+    AppointmentStorage(path).save(calendar())
+    storage = AppointmentStorage(path, columnar=True)
+    scheduler = Scheduler(storage)
+
+    assert len(scheduler.find_between(BASE, BASE + timedelta(days=3))) == 3
+    assert storage.columns().signature == storage.signature()
+
+    # Rewritten by a process that does not keep the snapshot.
+    AppointmentStorage(path).save(calendar()[:1])
+    assert len(scheduler.find_between(BASE, BASE + timedelta(days=3))) == 1
+
+    storage.columns_path.write_bytes(b"not a snapshot")
+    fresh = AppointmentStorage(path, columnar=True)
+    assert len(Scheduler(fresh).list_appointments()) == 1
+    assert ColumnarSnapshot.open(fresh.columns_path, fresh.signature()) is not None
+
+
+def test_journal_changes_are_applied_over_the_snapshot(tmp_path: Path, capsys) -> None:
+    path = tmp_path / "appointments.json"
+    JournalStorage(path, columnar=True).save(calendar())
+    scheduler = Scheduler(JournalStorage(path, columnar=True))
+    stored = {item.resource: item for item in scheduler.find_between(BASE, BASE + timedelta(days=1))}
+    scheduler.cancel_appointment(stored["Luis"].identifier)
+    moved = scheduler.update_appointment(
+        stored["Marta"].identifier, start_time=BASE + timedelta(days=1), resource="Ana"
+    )
+    added = scheduler.create_appointment(
+        client=Client(name="Dora"), service="Corte", start_time=BASE + timedelta(hours=3), duration_minutes=30
+    )
+
+    reader = Scheduler(JournalStorage(path, columnar=True))
+    assert reader.find_between(BASE, BASE + timedelta(days=1)) == [added]
+    assert reader.list_appointments() == Scheduler(JournalStorage(path)).list_appointments()
+    assert reader.upcoming(after=BASE + timedelta(hours=12))[0] == moved
+    assert reader.upcoming(after=BASE) == Scheduler(JournalStorage(path)).upcoming(after=BASE)
+    assert reader.resources() == ["Ana", "Luis"]
+
+    main(["--database", str(path), "--backend", "journal", "--columnar", "list", "--resource", "Ana"])
+    assert moved.identifier in capsys.readouterr().out
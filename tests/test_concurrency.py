@@ -0,0 +1,74 @@
+import multiprocessing
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from gestor_citas_avanzado import storage as storage_module
+from gestor_citas_avanzado.models import Client
+from gestor_citas_avanzado.service import ConcurrentModificationError, Scheduler, SchedulingConflictError
+from gestor_citas_avanzado.storage import AppointmentStorage, JournalStorage
+
+pytestmark = pytest.mark.skipif(storage_module.fcntl is None, reason="requires fcntl advisory locks")
+
+BASE = datetime(2024, 7, 1, 9, 0)
+WORKERS = 6
+ATTEMPTS = 25
+
+
+def book(path: str, backend: str, seed: int, queue) -> None:
+    storage_class = JournalStorage if backend == "journal" else AppointmentStorage
+    scheduler = Scheduler(storage_class(Path(path)), cache=seed % 2 == 0)
+    rng = random.Random(seed)
+    created = []
+    for _ in range(ATTEMPTS):
+        try:
+            appointment = scheduler.create_appointment(
+                client=Client(name=f"Worker {seed}"),
+                service="Therapy",
+                start_time=BASE + timedelta(minutes=15 * rng.randrange(40)),
+                duration_minutes=rng.choice([15, 30, 45]),
+            )
+        except SchedulingConflictError:
+            continue
+        created.append(appointment.identifier)
+    queue.put(created)
+
+
+@pytest.mark.parametrize("backend", ["json", "journal"])
+def test_concurrent_processes_never_double_book(tmp_path: Path, backend: str) -> None:
+    path = tmp_path / "appointments.json"
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    workers = [context.Process(target=book, args=(str(path), backend, seed, queue)) for seed in range(WORKERS)]
+    for worker in workers:
+        worker.start()
+    created = [identifier for _ in workers for identifier in queue.get(timeout=60)]
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    storage_class = JournalStorage if backend == "journal" else AppointmentStorage
+    stored = sorted(storage_class(path).load(), key=lambda item: item.start_time)
+    assert sorted(item.identifier for item in stored) == sorted(created)
+    for previous, current in zip(stored, stored[1:]):
+        assert previous.end_time <= current.start_time
+
+
+def test_save_refuses_stale_signature(tmp_path: Path) -> None:
+    storage = AppointmentStorage(tmp_path / "appointments.json")
+    storage.save([])
+    seen = storage.signature()
+    AppointmentStorage(storage.path).save([])
+
+    with pytest.raises(ConcurrentModificationError):
+        storage.save([], expected_signature=seen)
+
+
+def test_save_leaves_no_temporary_files(tmp_path: Path) -> None:
+    storage = AppointmentStorage(tmp_path / "appointments.json")
+    storage.save([])
+    storage.save([])
+
+    assert sorted(item.name for item in tmp_path.iterdir()) == ["appointments.json", "appointments.json.lock"]
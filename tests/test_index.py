@@ -0,0 +1,110 @@
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from gestor_citas_avanzado.index import IntervalIndex
+from gestor_citas_avanzado.models import Appointment, Client
+from gestor_citas_avanzado.service import Scheduler, SchedulingConflictError
+from gestor_citas_avanzado.storage import AppointmentStorage
+
+
+def make_appointment(start: datetime, minutes: int, **kwargs) -> Appointment:
+    return Appointment(
+        client=Client(name="Client"),
+        service="Therapy",
+        start_time=start,
+        duration_minutes=minutes,
+        **kwargs,
+    )
+
+
+def test_overlapping_uses_half_open_intervals() -> None:
+    base = datetime(2024, 3, 1, 9, 0)
+    first = make_appointment(base, 60)
+    second = make_appointment(base + timedelta(hours=1), 30)
+    index = IntervalIndex([first, second])
+
+    assert index.overlapping(base + timedelta(minutes=30), base + timedelta(minutes=45)) == [first.identifier]
+    assert index.overlapping(base + timedelta(minutes=60), base + timedelta(minutes=61)) == [second.identifier]
+    assert index.overlapping(base - timedelta(hours=1), base) == []
+
+
+def test_long_appointments_are_found_from_inside() -> None:
+    base = datetime(2024, 3, 1, 9, 0)
+    long_one = make_appointment(base, 8 * 60)
+    short_one = make_appointment(base + timedelta(days=1), 15)
+    index = IntervalIndex([short_one, long_one])
+
+    assert index.overlapping(base + timedelta(hours=7), base + timedelta(hours=7, minutes=5)) == [long_one.identifier]
+
+
+def test_removing_a_long_booking_shrinks_the_look_back() -> None:
+    base = datetime(2024, 3, 1, 9, 0)
+    short = [make_appointment(base + timedelta(minutes=30 * slot), 30) for slot in range(2000)]
+    retreat = make_appointment(base - timedelta(days=1), 60 * 24 * 60)
+    index = IntervalIndex([*short, retreat])
+
+    class Lookups(dict):
+        count = 0
+
+        def __getitem__(self, key):
+            Lookups.count += 1
+            return super().__getitem__(key)
+
+    index._spans = Lookups(index._spans)
+    window = (base + timedelta(days=30), base + timedelta(days=30, minutes=30))
+    assert index.overlapping(*window) == [retreat.identifier, short[1440].identifier]
+
+    index.discard(retreat.identifier)
+    Lookups.count = 0
+    assert index.overlapping(*window) == [short[1440].identifier]
+    assert Lookups.count <= 4
+
+
+def test_overlaps_match_a_pairwise_check_across_lengths() -> None:
+    rng = random.Random(11)
+    base = datetime(2024, 3, 1)
+    appointments = [
+        make_appointment(base + timedelta(minutes=rng.randrange(10 * 1440)), rng.choice([5, 30, 90, 600, 5000]))
+        for _ in range(400)
+    ]
+    index = IntervalIndex(appointments)
+    for appointment in appointments[::3]:
+        index.discard(appointment.identifier)
+    remaining = sorted(appointments[1::3] + appointments[2::3], key=lambda item: (item.start_time, item.identifier))
+
+    for _ in range(200):
+        start = base + timedelta(minutes=rng.randrange(-2000, 12 * 1440))
+        end = start + timedelta(minutes=rng.randrange(1, 300))
+        expected = [item.identifier for item in remaining if item.start_time < end and item.end_time > start]
+        assert index.overlapping(start, end) == expected
+
+
+def test_cancelled_appointments_are_not_indexed() -> None:
+    base = datetime(2024, 3, 1, 9, 0)
+    appointment = make_appointment(base, 30)
+    index = IntervalIndex([appointment])
+    assert appointment.identifier in index
+
+    index.add(make_appointment(base, 30, status="cancelled", identifier=appointment.identifier))
+    assert appointment.identifier not in index
+    assert index.starting_between(base, base + timedelta(hours=1)) == []
+
+
+def test_index_notices_changes_made_by_another_scheduler(tmp_path: Path) -> None:
+    path = tmp_path / "appointments.json"
+    first = Scheduler(AppointmentStorage(path))
+    second = Scheduler(AppointmentStorage(path))
+    base = datetime(2024, 3, 1, 9, 0)
+
+    first.create_appointment(client=Client(name="A"), service="Therapy", start_time=base, duration_minutes=60)
+    second.create_appointment(
+        client=Client(name="B"), service="Therapy", start_time=base + timedelta(hours=2), duration_minutes=60
+    )
+
+    with pytest.raises(SchedulingConflictError):
+        first.create_appointment(
+            client=Client(name="C"), service="Therapy", start_time=base + timedelta(hours=2), duration_minutes=15
+        )
@@ -0,0 +1,80 @@
+import json
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from gestor_citas_avanzado.cli import main
+from gestor_citas_avanzado.metrics import METRICS, Metrics, timed
+from gestor_citas_avanzado.models import Client
+from gestor_citas_avanzado.service import Scheduler
+from gestor_citas_avanzado.storage import AppointmentStorage, JournalStorage
+
+
+@pytest.fixture
+def metrics():
+    METRICS.reset()
+    METRICS.enable()
+    yield METRICS
+    METRICS.disable()
+    METRICS.reset()
+
+
+def book(scheduler: Scheduler, hour: int) -> None:
+    scheduler.create_appointment(
+        client=Client(name="Ana"), service="Cut", start_time=datetime(2024, 5, 6, hour), duration_minutes=30
+    )
+
+
+def test_disabled_metrics_record_nothing(tmp_path: Path) -> None:
+    METRICS.reset()
+    book(Scheduler(AppointmentStorage(tmp_path / "appointments.json")), 9)
+
+    assert METRICS.snapshot() == {"spans": {}, "counters": {}}
+
+
+def test_scheduler_and_storage_spans(metrics: Metrics, tmp_path: Path) -> None:
+    scheduler = Scheduler(JournalStorage(tmp_path / "appointments.json"), cache=True)
+    book(scheduler, 9)
+    book(scheduler, 10)
+    scheduler.list_appointments()
+
+    snapshot = metrics.snapshot()
+    spans = snapshot["spans"]
+    assert spans["scheduler.create_appointment"]["calls"] == 2
+    assert spans["scheduler.conflict_check"]["calls"] == 2
+    assert spans["storage.extend"]["calls"] == 2
+    assert spans["storage.load"]["calls"] == 1  # the journal load wrapping its parent is timed once
+    assert spans["scheduler.sort"]["calls"] == 1
+    assert spans["scheduler.create_appointment"]["total_seconds"] >= spans["scheduler.conflict_check"]["total_seconds"]
+    assert snapshot["counters"]["scheduler.reloads"] == 1
+
+
+def test_report_and_prometheus_export(metrics: Metrics, tmp_path: Path) -> None:
+    work = timed("work")(lambda: None)
+    work()
+    work()
+    metrics.count("events", 3)
+
+    report = metrics.report(elapsed=1.0).splitlines()
+    assert report[1].split()[:2] == ["work", "2"]
+    assert report[2].split() == ["events", "3"]
+    prometheus = metrics.to_prometheus()
+    assert 'gestor_citas_span_seconds_count{span="work"} 2' in prometheus
+    assert 'gestor_citas_events_total{counter="events"} 3' in prometheus
+    with pytest.raises(ValueError):
+        metrics.write(tmp_path / "stats", "xml")
+
+
+def test_cli_profile_and_metrics_file(tmp_path: Path, capsys) -> None:
+    stats = tmp_path / "stats.json"
+    database = ["--database", str(tmp_path / "appointments.json")]
+    add = ["add", "--name", "Ana", "--service", "Cut", "--start", "2024-05-06T09:00", "--duration", "30"]
+
+    main([*database, "--profile", "--metrics-file", str(stats), *add])
+
+    captured = capsys.readouterr()
+    assert captured.out.startswith("Created appointment")
+    assert "scheduler.create_appointment" in captured.err and "wall time" in captured.err
+    assert json.loads(stats.read_text())["spans"]["cli.add"]["calls"] == 1
+    assert not METRICS.enabled
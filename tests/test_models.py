@@ -0,0 +1,37 @@
+import dataclasses
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from gestor_citas_avanzado.models import Appointment, Client, epoch_microseconds
+
+
+def test_appointments_are_immutable_and_recompute_end_on_replace() -> None:
+    appointment = Appointment(
+        client=Client(name="Client"), service="Therapy", start_time=datetime(2024, 6, 1, 9, 0), duration_minutes=45
+    )
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        appointment.status = "cancelled"  # type: ignore[misc]
+
+    moved = dataclasses.replace(appointment, start_time=datetime(2024, 6, 1, 10, 0))
+    assert moved.end_time == datetime(2024, 6, 1, 10, 45)
+
+
+def test_epoch_microseconds_handles_naive_and_aware_values() -> None:
+    assert epoch_microseconds(datetime(1970, 1, 2, 0, 1, 59, 5)) == (1441 * 60 + 59) * 1_000_000 + 5
+    assert epoch_microseconds(datetime(1970, 1, 1, 2, 0, tzinfo=timezone(timedelta(hours=2)))) == 0
+
+
+def test_from_dict_shares_identical_clients() -> None:
+    record = Appointment(
+        client=Client(name="Client", email="c@example.com"),
+        service="Therapy",
+        start_time=datetime(2024, 6, 1, 9, 0),
+        duration_minutes=30,
+    ).to_dict()
+    clients: dict = {}
+    first = Appointment.from_dict(dict(record), clients)
+    second = Appointment.from_dict(dict(record, identifier="other"), clients)
+
+    assert first.client is second.client
+    assert first.service is second.service
@@ -0,0 +1,181 @@
+import json
+from dataclasses import replace
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from gestor_citas_avanzado.cli import main
+from gestor_citas_avanzado.models import Appointment, Client
+from gestor_citas_avanzado.service import Scheduler
+from gestor_citas_avanzado.storage import AppointmentStorage, PartitionedStorage, partition_key
+
+
+def make_appointment(start: datetime, client: Client = Client(name="Client"), **kwargs) -> Appointment:
+    return Appointment(client=client, service="Therapy", start_time=start, duration_minutes=30, **kwargs)
+
+
+@pytest.fixture
+def reads(monkeypatch) -> list:
+    opened = []
+    original = AppointmentStorage.load
+
+    def load(self):
+        opened.append(self.path.name)
+        return original(self)
+
+    monkeypatch.setattr(AppointmentStorage, "load", load)
+    return opened
+
+
+def test_partition_keys_sort_chronologically() -> None:
+    moment = datetime(2024, 3, 7, 10, 0)
+    assert partition_key(moment, "day") == "2024-03-07"
+    assert partition_key(moment, "month") == "2024-03"
+    assert partition_key(moment, "year") == "2024"
+    with pytest.raises(ValueError):
+        partition_key(moment, "week")
+
+
+def test_appointments_are_written_to_their_period(tmp_path: Path) -> None:
+    storage = PartitionedStorage(tmp_path / "db")
+    january, march = make_appointment(datetime(2024, 1, 10, 9)), make_appointment(datetime(2024, 3, 5, 9))
+    storage.extend([march, january])
+
+    assert sorted(path.name for path in (tmp_path / "db").glob("*.json")) == [
+        "2024-01.json",
+        "2024-03.json",
+        "clients.json",
+        "manifest.json",
+    ]
+    assert storage.load() == [january, march]
+    assert PartitionedStorage(tmp_path / "db", period="day").period == "month"
+
+
+def test_queries_only_open_overlapping_partitions(tmp_path: Path, reads: list) -> None:
+    storage = PartitionedStorage(tmp_path / "db")
+    ana = Client(name="Ana")
+    storage.extend(make_appointment(datetime(2024, month, 10, 9)) for month in range(1, 13))
+    storage.append(make_appointment(datetime(2024, 6, 20, 9), ana))
+
+    scheduler = Scheduler(storage)
+    reads.clear()
+    found = scheduler.find_between(datetime(2024, 6, 1), datetime(2024, 6, 30))
+    assert len(found) == 2
+    assert reads == ["2024-06.json"]
+
+    reads.clear()
+    assert [item.client.name for item in scheduler.find_for_client("ana")] == ["Ana"]
+    assert reads == ["2024-06.json"]
+
+    reads.clear()
+    streamed = list(scheduler.iter_appointments(start=datetime(2024, 11, 1)))
+    assert [item.start_time.month for item in streamed] == [11, 12]
+    assert reads == ["2024-11.json", "2024-12.json"]
+
+
+def test_conflicts_span_partition_boundaries(tmp_path: Path) -> None:
+    storage = PartitionedStorage(tmp_path / "db")
+    late = Appointment(
+        client=Client(name="Ana"), service="Night", start_time=datetime(2024, 1, 31, 23, 0), duration_minutes=120
+    )
+    storage.append(late)
+
+    assert storage.overlapping(datetime(2024, 2, 1, 0, 30), datetime(2024, 2, 1, 1, 30)) == [late.identifier]
+    assert storage.overlapping(datetime(2024, 2, 1, 1, 0), datetime(2024, 2, 1, 2, 0)) == []
+
+
+def test_conflicts_skip_partitions_that_end_before_the_window(tmp_path: Path, reads: list) -> None:
+    storage = PartitionedStorage(tmp_path / "db")
+    retreat = Appointment(
+        client=Client(name="Ana"), service="Retreat", start_time=datetime(2024, 1, 2, 9), duration_minutes=60 * 24 * 90
+    )
+    storage.extend([retreat, *(make_appointment(datetime(2024, month, 10, 9)) for month in range(2, 7))])
+    window = (datetime(2024, 6, 10, 9), datetime(2024, 6, 10, 10))
+
+    reads.clear()
+    assert len(storage.overlapping(*window)) == 1
+    assert reads == ["2024-06.json"]
+
+    reads.clear()
+    assert storage.overlapping(datetime(2024, 3, 20, 9), datetime(2024, 3, 20, 10)) == [retreat.identifier]
+    assert reads == ["2024-01.json"]
+
+    storage.append(replace(retreat, status="cancelled"))
+    reads.clear()
+    assert storage.overlapping(datetime(2024, 3, 20, 9), datetime(2024, 3, 20, 10)) == []
+    assert reads == []
+
+    # Manifests that predate the per-partition bound are measured once and rewritten on the next write.
+    manifest_path = tmp_path / "db" / "manifest.json"
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    legacy = {key: value for key, value in manifest.items() if key != "reach"}
+    manifest_path.write_text(json.dumps({**legacy, "version": 1, "longest": 60 * 24 * 90}), encoding="utf-8")
+    legacy_storage = PartitionedStorage(tmp_path / "db")
+    assert len(legacy_storage.overlapping(*window)) == 1
+    legacy_storage.append(make_appointment(datetime(2024, 7, 10, 9)))
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    assert "longest" not in manifest
+    assert sorted(manifest["reach"]) == [f"2024-{month:02d}" for month in range(2, 8)]
+
+
+def test_rescheduling_moves_appointment_between_partitions(tmp_path: Path) -> None:
+    storage = PartitionedStorage(tmp_path / "db")
+    scheduler = Scheduler(storage)
+    appointment = scheduler.create_appointment(
+        client=Client(name="Ana"), service="Therapy", start_time=datetime(2024, 1, 10, 9), duration_minutes=30
+    )
+
+    scheduler.update_appointment(appointment.identifier, start_time=datetime(2024, 2, 10, 9))
+
+    fresh = PartitionedStorage(tmp_path / "db")
+    assert [item.start_time for item in fresh.load()] == [datetime(2024, 2, 10, 9)]
+    assert not (tmp_path / "db" / "2024-01.json").exists()
+
+
+def test_archive_moves_old_partitions(tmp_path: Path, reads: list) -> None:
+    storage = PartitionedStorage(tmp_path / "db")
+    old, recent = make_appointment(datetime(2023, 5, 1, 9)), make_appointment(datetime(2024, 5, 1, 9))
+    storage.extend([old, recent])
+
+    assert storage.archive(datetime(2024, 1, 1)) == 1
+    assert (tmp_path / "db" / "archive" / "2023-05.json").exists()
+    manifest = json.loads((tmp_path / "db" / "manifest.json").read_text(encoding="utf-8"))
+    assert manifest["partitions"] == {"2023-05": "archive", "2024-05": "active"}
+
+    reads.clear()
+    assert storage.get(recent.identifier) == recent
+    assert PartitionedStorage(tmp_path / "db").get(old.identifier) == old
+    assert reads[0] == "2024-05.json"
+
+    storage.append(replace(old, status="completed"))
+    assert storage.get(old.identifier).status == "completed"
+    assert not (tmp_path / "db" / "2023-05.json").exists()
+
+
+def test_failed_transaction_restores_files(tmp_path: Path) -> None:
+    storage = PartitionedStorage(tmp_path / "db")
+    kept = make_appointment(datetime(2024, 1, 10, 9))
+    storage.append(kept)
+
+    with pytest.raises(RuntimeError):
+        with storage.transaction():
+            storage.append(make_appointment(datetime(2024, 2, 10, 9)))
+            storage.append(replace(kept, status="cancelled"))
+            raise RuntimeError("abort")
+
+    assert PartitionedStorage(tmp_path / "db").load() == [kept]
+
+
+def test_partitioned_cli(tmp_path: Path, capsys) -> None:
+    database = ["--backend", "partitioned", "--database", str(tmp_path / "db")]
+    for start in ("2023-12-01T09:00", "2024-02-01T09:00"):
+        main([*database, "add", "--name", "Ana", "--service", "Cut", "--start", start, "--duration", "30"])
+    capsys.readouterr()
+
+    main([*database, "archive", "--before", date(2024, 1, 1).isoformat()])
+    assert capsys.readouterr().out.strip() == "Archived 1 partitions"
+
+    main([*database, "list", "--from", "2024-01-01T00:00"])
+    [line] = capsys.readouterr().out.splitlines()
+    assert "2024-02-01 09:00" in line
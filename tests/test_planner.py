@@ -0,0 +1,114 @@
+from datetime import datetime, time, timedelta
+from pathlib import Path
+
+import pytest
+
+from gestor_citas_avanzado.models import Client
+from gestor_citas_avanzado.planner import BookingRequest, Constraints, FreeTimeline
+from gestor_citas_avanzado.recurrence import Recurrence
+from gestor_citas_avanzado.service import Scheduler
+from gestor_citas_avanzado.storage import AppointmentStorage, JournalStorage, PartitionedStorage, SQLiteStorage
+
+MONDAY = datetime(2024, 9, 2)
+HOURS = ((time(9, 0), time(13, 0)),)
+
+
+@pytest.fixture(params=["json", "journal", "partitioned", "sqlite"])
+def scheduler(request: pytest.FixtureRequest, tmp_path: Path) -> Scheduler:
+    if request.param == "sqlite":
+        storage = SQLiteStorage(tmp_path / "appointments.sqlite3")
+        request.addfinalizer(storage.close)
+    elif request.param == "journal":
+        storage = JournalStorage(tmp_path / "appointments.json")
+    elif request.param == "partitioned":
+        storage = PartitionedStorage(tmp_path / "appointments")
+    else:
+        storage = AppointmentStorage(tmp_path / "appointments.json")
+    return Scheduler(storage)
+
+
+def at(day: int, hour: int, minute: int = 0) -> datetime:
+    return MONDAY + timedelta(days=day, hours=hour, minutes=minute)
+
+
+def asking(name: str, minutes: int, *windows, **options) -> BookingRequest:
+    return BookingRequest(
+        client=Client(name=name), service="Therapy", duration_minutes=minutes, windows=windows, **options
+    )
+
+
+def test_free_timeline_subtracts_busy_spans() -> None:
+    windows = [(at(0, 9), at(0, 13)), (at(1, 9), at(1, 13))]
+    busy = [(at(0, 8), at(0, 9, 30)), (at(0, 10), at(0, 11)), (at(0, 12, 30), at(1, 10))]
+    timeline = FreeTimeline(busy, windows)
+
+    assert list(timeline) == [(at(0, 9, 30), at(0, 10)), (at(0, 11), at(0, 12, 30)), (at(1, 10), at(1, 13))]
+    quarter = timedelta(minutes=15)
+    assert timeline.earliest(at(0, 9), at(1, 13), timedelta(minutes=45), quarter) == at(0, 11)
+    assert timeline.earliest(at(0, 11, 5), at(0, 13), timedelta(minutes=60), quarter) == at(0, 11, 15)
+    assert timeline.earliest(at(0, 9), at(0, 13), timedelta(minutes=120), quarter) is None
+
+    timeline.reserve(at(0, 11, 15), at(0, 12, 15))
+    assert list(timeline)[1:3] == [(at(0, 11), at(0, 11, 15)), (at(0, 12, 15), at(0, 12, 30))]
+    with pytest.raises(ValueError):
+        timeline.reserve(at(0, 9), at(0, 10))
+
+
+def test_auto_schedule_places_around_existing_bookings(scheduler: Scheduler) -> None:
+    scheduler.create_appointment(client=Client(name="Eva"), service="Cut", start_time=at(0, 9), duration_minutes=60)
+    scheduler.create_series(
+        client=Client(name="Luis"),
+        service="Cut",
+        start_time=at(0, 10),
+        duration_minutes=30,
+        recurrence=Recurrence("daily", count=5),
+    )
+    requests = [
+        asking("Ana", 60, (at(0, 9), at(0, 13)), (at(1, 9), at(1, 13))),
+        asking("Bea", 120, (at(0, 9), at(0, 13))),
+        asking("Carmen", 180, (at(0, 9), at(0, 13))),
+        asking("Dani", 30),
+    ]
+    constraints = Constraints(start=at(0, 0), end=at(5, 0), working_hours=HOURS)
+
+    result = scheduler.auto_schedule(requests, constraints)
+
+    assert [(position, item.client.name, item.start_time) for position, item in result.placed] == [
+        (0, "Ana", at(1, 9)),
+        (1, "Bea", at(0, 10, 30)),
+        (3, "Dani", at(0, 12, 30)),
+    ]
+    assert [(position, reason) for position, _, reason in result.unplaced] == [
+        (2, "no free slot in the requested windows")
+    ]
+    stored = {item.client.name: item.start_time for item in scheduler.list_appointments()}
+    assert stored["Ana"] == at(1, 9) and stored["Dani"] == at(0, 12, 30)
+
+
+def test_auto_schedule_spreads_over_resources_and_supports_dry_run(scheduler: Scheduler) -> None:
+    window = (at(0, 9), at(0, 10))
+    requests = [asking(name, 60, window) for name in ("Ana", "Bea", "Carmen")]
+    constraints = Constraints(resources=("room 1", "room 2"), working_hours=HOURS)
+
+    preview = scheduler.auto_schedule(requests, constraints, dry_run=True)
+
+    assert preview.dry_run and scheduler.list_appointments() == []
+    assert [item.resource for _, item in preview.placed] == ["room 1", "room 2"]
+    assert [position for position, _, _ in preview.unplaced] == [2]
+
+    result = scheduler.auto_schedule(requests, constraints)
+    assert [item.identifier for _, item in result.placed] == [item.identifier for item in scheduler.list_appointments()]
+    again = scheduler.auto_schedule(requests, constraints)
+    assert again.placed == [] and len(again.unplaced) == 3
+
+
+def test_auto_schedule_reports_requests_it_cannot_consider(scheduler: Scheduler) -> None:
+    requests = [asking("Ana", 30), asking("Bea", 30, (at(0, 9), at(0, 10)))]
+
+    result = scheduler.auto_schedule(requests, Constraints(time_budget=-1))
+
+    assert [reason for _, _, reason in result.unplaced] == ["time budget exhausted"] * 2
+    result = scheduler.auto_schedule(requests, Constraints(working_hours=HOURS))
+    assert [reason for _, _, reason in result.unplaced] == ["no window to place it in"]
+    with pytest.raises(ValueError):
+        asking("Ana", 30, (at(0, 10), at(0, 9)))
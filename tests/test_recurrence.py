@@ -0,0 +1,209 @@
+import random
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from gestor_citas_avanzado.availability import parse_working_hours
+from gestor_citas_avanzado.cli import main
+from gestor_citas_avanzado.models import Client
+from gestor_citas_avanzado.recurrence import Recurrence, Series, series_conflict, split_occurrence
+from gestor_citas_avanzado.service import (
+    AppointmentNotFoundError,
+    Scheduler,
+    SchedulingConflictError,
+    SeriesNotFoundError,
+)
+from gestor_citas_avanzado.storage import AppointmentStorage, JournalStorage, PartitionedStorage, SQLiteStorage
+
+BASE = datetime(2024, 9, 2, 10, 0)
+
+
+@pytest.fixture(params=["json", "journal", "partitioned", "sqlite"])
+def scheduler(request: pytest.FixtureRequest, tmp_path: Path) -> Scheduler:
+    if request.param == "sqlite":
+        storage = SQLiteStorage(tmp_path / "appointments.sqlite3")
+        request.addfinalizer(storage.close)
+    elif request.param == "journal":
+        storage = JournalStorage(tmp_path / "appointments.json")
+    elif request.param == "partitioned":
+        storage = PartitionedStorage(tmp_path / "appointments")
+    else:
+        storage = AppointmentStorage(tmp_path / "appointments.json")
+    return Scheduler(storage)
+
+
+def weekly(scheduler: Scheduler, count: int = 10, start: datetime = BASE, **options) -> Series:
+    return scheduler.create_series(
+        client=Client(name="Ana"),
+        service="Therapy",
+        start_time=start,
+        duration_minutes=50,
+        recurrence=Recurrence("weekly", count=count),
+        **options,
+    )
+
+
+def test_recurrence_needs_an_end() -> None:
+    with pytest.raises(ValueError):
+        Recurrence("weekly")
+    with pytest.raises(ValueError):
+        Recurrence("monthly", count=3)
+    series = Series(
+        client=Client(name="Ana"),
+        service="Therapy",
+        start_time=BASE,
+        duration_minutes=30,
+        recurrence=Recurrence("daily", interval=3, until=BASE + timedelta(days=10)),
+    )
+    assert len(series) == 4
+    assert series.end_time == BASE + timedelta(days=9, minutes=30)
+    assert split_occurrence(series.occurrence_id(3)) == (series.identifier, 3)
+    assert split_occurrence("plain") is None
+
+
+def test_windows_match_brute_force_expansion() -> None:
+    series = Series(
+        client=Client(name="Ana"),
+        service="Therapy",
+        start_time=BASE,
+        duration_minutes=90,
+        recurrence=Recurrence("daily", interval=2, count=20),
+    )
+    starts = [series.occurrence(index).start_time for index in range(len(series))]
+    for offset in range(-3 * 24, 45 * 24, 7):
+        start = BASE + timedelta(hours=offset)
+        end = start + timedelta(hours=5)
+        expected = [index for index, begin in enumerate(starts) if begin < end and begin + series.length > start]
+        assert list(series.overlapping(start, end)) == expected
+        assert list(series.starting(start, end)) == [index for index in expected if starts[index] >= start]
+
+
+def test_series_conflicts_match_brute_force_expansion() -> None:
+    generator = random.Random(7)
+    for _ in range(300):
+        pair = []
+        for _ in range(2):
+            rule = Recurrence(
+                generator.choice(["daily", "weekly"]), interval=generator.randint(1, 4), count=generator.randint(1, 12)
+            )
+            start = BASE + timedelta(hours=generator.randint(0, 24 * 30))
+            detached = frozenset(generator.sample(range(rule.count), generator.randint(0, rule.count // 2)))
+            pair.append(
+                Series(
+                    client=Client(name="Ana"),
+                    service="Therapy",
+                    start_time=start,
+                    duration_minutes=generator.choice([30, 120, 60 * 30]),
+                    recurrence=rule,
+                    detached=detached,
+                )
+            )
+        first, second = pair
+        clash = any(
+            a.start_time < b.end_time and b.start_time < a.end_time
+            for a in first.occurrences()
+            for b in second.occurrences()
+        )
+        assert bool(series_conflict(first, second)) == clash
+
+
+def test_occurrences_are_expanded_for_queried_windows(scheduler: Scheduler) -> None:
+    series = weekly(scheduler, count=10)
+
+    window = scheduler.find_between(BASE + timedelta(days=14), BASE + timedelta(days=28))
+    assert [item.identifier for item in window] == [series.occurrence_id(2), series.occurrence_id(3)]
+    assert len(scheduler.list_appointments()) == 10
+    assert scheduler.get_appointment(series.occurrence_id(4)).start_time == BASE + timedelta(weeks=4)
+    assert [item.identifier for item in scheduler.find_for_client("ana")][:2] == [
+        series.occurrence_id(0),
+        series.occurrence_id(1),
+    ]
+    hours = parse_working_hours("10:00-12:00")
+    assert scheduler.available_slots(date(2024, 9, 9), 60, 60, hours) == [BASE + timedelta(days=7, hours=1)]
+    assert scheduler.get_series(series.identifier) == series
+    with pytest.raises(SeriesNotFoundError):
+        scheduler.get_series("missing")
+
+
+def test_series_conflicts_with_appointments_and_series(scheduler: Scheduler) -> None:
+    single = scheduler.create_appointment(
+        client=Client(name="Luis"), service="Cut", start_time=BASE + timedelta(weeks=3, minutes=30), duration_minutes=30
+    )
+    with pytest.raises(SchedulingConflictError, match=single.identifier):
+        weekly(scheduler)
+
+    series = weekly(scheduler, start=BASE + timedelta(hours=2))
+    with pytest.raises(SchedulingConflictError, match=series.occurrence_id(5)):
+        scheduler.create_appointment(
+            client=Client(name="Eva"), service="Cut", start_time=BASE + timedelta(weeks=5, hours=2), duration_minutes=15
+        )
+    with pytest.raises(SchedulingConflictError):
+        scheduler.create_series(
+            client=Client(name="Eva"),
+            service="Cut",
+            start_time=BASE + timedelta(days=1, hours=2),
+            duration_minutes=30,
+            recurrence=Recurrence("daily", count=30),
+        )
+    weekly(scheduler, start=BASE + timedelta(hours=2), resource="room")
+
+
+def test_occurrences_can_be_edited_and_cancelled(scheduler: Scheduler) -> None:
+    series = weekly(scheduler, count=4)
+    moved_id, cancelled_id = series.occurrence_id(1), series.occurrence_id(2)
+
+    moved = scheduler.update_appointment(moved_id, start_time=BASE + timedelta(days=8))
+    cancelled = scheduler.cancel_appointment(cancelled_id)
+
+    assert moved.identifier == moved_id and cancelled.status == "cancelled"
+    assert scheduler.get_series(series.identifier).detached == {1, 2}
+    listed = [(item.identifier, item.start_time, item.status) for item in scheduler.list_appointments()]
+    assert listed == [
+        (series.occurrence_id(0), BASE, "scheduled"),
+        (moved_id, BASE + timedelta(days=8), "scheduled"),
+        (cancelled_id, BASE + timedelta(weeks=2), "cancelled"),
+        (series.occurrence_id(3), BASE + timedelta(weeks=3), "scheduled"),
+    ]
+    luis = scheduler.create_appointment(
+        client=Client(name="Luis"), service="Cut", start_time=BASE + timedelta(weeks=1), duration_minutes=30
+    )
+    with pytest.raises(SchedulingConflictError):
+        scheduler.create_appointment(
+            client=Client(name="Luis"), service="Cut", start_time=BASE + timedelta(days=8), duration_minutes=30
+        )
+
+    scheduler.cancel_series(series.identifier)
+    assert [item.identifier for item in scheduler.list_appointments()] == [luis.identifier, moved_id, cancelled_id]
+    with pytest.raises(AppointmentNotFoundError):
+        scheduler.get_appointment(series.occurrence_id(3))
+
+
+def test_failed_batch_discards_series(scheduler: Scheduler) -> None:
+    with pytest.raises(RuntimeError):
+        with scheduler.batch():
+            weekly(scheduler)
+            raise RuntimeError("abort")
+
+    assert scheduler.list_series() == []
+
+
+def test_series_cli(tmp_path: Path, capsys) -> None:
+    database = ["--database", str(tmp_path / "appointments.json")]
+    add = ["add", "--name", "Ana", "--service", "Therapy", "--start", "2024-09-02T10:00", "--duration", "50"]
+    main([*database, *add, "--repeat", "weekly", "--until", "2024-09-30"])
+    output = capsys.readouterr().out
+    assert output.startswith("Created series") and output.strip().endswith("with 5 appointments")
+
+    main([*database, "list", "--from", "2024-09-09T00:00", "--to", "2024-09-17T00:00"])
+    assert len(capsys.readouterr().out.splitlines()) == 2
+
+    main([*database, "series"])
+    [line] = capsys.readouterr().out.splitlines()
+    identifier = line.split(" | ")[0]
+    assert "weekly x1 until 2024-09-30" in line
+
+    main([*database, "cancel-series", identifier])
+    assert capsys.readouterr().out.strip() == f"Cancelled series {identifier}"
+    main([*database, "list"])
+    assert capsys.readouterr().out.strip() == ""
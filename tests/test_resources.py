@@ -0,0 +1,129 @@
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from gestor_citas_avanzado.availability import parse_working_hours
+from gestor_citas_avanzado.cli import main
+from gestor_citas_avanzado.index import PartitionedIndex
+from gestor_citas_avanzado.models import Appointment, Client
+from gestor_citas_avanzado.service import Scheduler, SchedulingConflictError
+from gestor_citas_avanzado.storage import AppointmentStorage, JournalStorage, PartitionedStorage, SQLiteStorage
+
+BASE = datetime(2024, 6, 3, 9, 0)
+
+
+@pytest.fixture(params=["json", "journal", "partitioned", "sqlite"])
+def scheduler(request: pytest.FixtureRequest, tmp_path: Path) -> Scheduler:
+    if request.param == "sqlite":
+        storage = SQLiteStorage(tmp_path / "appointments.sqlite3")
+        request.addfinalizer(storage.close)
+    elif request.param == "journal":
+        storage = JournalStorage(tmp_path / "appointments.json")
+    elif request.param == "partitioned":
+        storage = PartitionedStorage(tmp_path / "appointments")
+    else:
+        storage = AppointmentStorage(tmp_path / "appointments.json")
+    return Scheduler(storage)
+
+
+def book(scheduler: Scheduler, resource, start: datetime = BASE, minutes: int = 60) -> Appointment:
+    return scheduler.create_appointment(
+        client=Client(name="Client"), service="Cut", start_time=start, duration_minutes=minutes, resource=resource
+    )
+
+
+def test_conflicts_are_checked_per_resource(scheduler: Scheduler) -> None:
+    ana = book(scheduler, "ana")
+    luis = book(scheduler, "luis")
+    book(scheduler, None)
+
+    with pytest.raises(SchedulingConflictError):
+        book(scheduler, "ana", BASE + timedelta(minutes=30))
+    with pytest.raises(SchedulingConflictError):
+        book(scheduler, None, BASE + timedelta(minutes=30))
+
+    assert scheduler.resources() == ["ana", "luis"]
+    assert [item.identifier for item in scheduler.list_appointments(resource="luis")] == [luis.identifier]
+    window = scheduler.find_between(BASE, BASE + timedelta(hours=1), resource="ana")
+    assert [item.identifier for item in window] == [ana.identifier]
+    assert len(scheduler.find_between(BASE, BASE + timedelta(hours=1))) == 3
+
+
+def test_moving_an_appointment_checks_the_target_resource(scheduler: Scheduler) -> None:
+    book(scheduler, "ana")
+    moving = book(scheduler, "luis")
+
+    with pytest.raises(SchedulingConflictError):
+        scheduler.update_appointment(moving.identifier, resource="ana")
+
+    book(scheduler, "ana", BASE + timedelta(hours=2))
+    moved = scheduler.update_appointment(moving.identifier, resource="eva")
+    assert moved.resource == "eva"
+    book(scheduler, "luis")
+
+
+def test_available_slots_follow_the_resource(scheduler: Scheduler) -> None:
+    book(scheduler, "ana", BASE, 60)
+    hours = parse_working_hours("09:00-11:00")
+
+    assert scheduler.available_slots(date(2024, 6, 3), 60, 60, hours, resource="ana") == [BASE + timedelta(hours=1)]
+    assert scheduler.available_slots(date(2024, 6, 3), 60, 60, hours, resource="luis") == [
+        BASE,
+        BASE + timedelta(hours=1),
+    ]
+
+
+def test_bulk_create_sweeps_each_resource_separately(scheduler: Scheduler) -> None:
+    book(scheduler, "ana")
+    entries = [
+        Appointment(client=Client(name="A"), service="Cut", start_time=BASE, duration_minutes=30, resource="luis"),
+        Appointment(client=Client(name="B"), service="Cut", start_time=BASE, duration_minutes=30, resource="ana"),
+        Appointment(
+            client=Client(name="C"),
+            service="Cut",
+            start_time=BASE + timedelta(minutes=15),
+            duration_minutes=30,
+            resource="luis",
+        ),
+    ]
+
+    result = scheduler.bulk_create(entries)
+
+    assert [item.identifier for item in result.created] == [entries[0].identifier]
+    assert [position for position, _, _ in result.rejected] == [1, 2]
+
+
+def test_partitioned_index_moves_appointments_between_partitions() -> None:
+    first = Appointment(client=Client(name="A"), service="Cut", start_time=BASE, duration_minutes=60, resource="ana")
+    index = PartitionedIndex([first])
+    moved = Appointment(
+        client=first.client,
+        service=first.service,
+        start_time=first.start_time,
+        duration_minutes=first.duration_minutes,
+        identifier=first.identifier,
+        resource="luis",
+    )
+
+    index.add(moved)
+
+    assert index.overlapping(BASE, BASE + timedelta(minutes=1), "ana") == []
+    assert index.overlapping(BASE, BASE + timedelta(minutes=1), "luis") == [first.identifier]
+    assert index.resources() == ["luis"]
+
+
+def test_resource_options(tmp_path: Path, capsys) -> None:
+    database = tmp_path / "appointments.json"
+    for resource in ("ana", "luis"):
+        add = ["add", "--name", "A", "--service", "Cut", "--start", "2024-06-03T09:00", "--duration", "30"]
+        main(["--database", str(database), *add, "--resource", resource])
+    capsys.readouterr()
+
+    main(["--database", str(database), "list", "--resource", "luis"])
+    [line] = capsys.readouterr().out.splitlines()
+    assert "Cut @ luis" in line
+
+    slots = ["slots", "--date", "2024-06-03", "--duration", "30", "--granularity", "30", "--hours", "09:00-10:00"]
+    main(["--database", str(database), *slots, "--resource", "ana"])
+    assert capsys.readouterr().out.splitlines() == ["2024-06-03 09:30"]
@@ -9,12 +9,24 @@ from gestor_citas_avanzado.service import (
     Scheduler,
     SchedulingConflictError,
 )
-from gestor_citas_avanzado.storage import AppointmentStorage
-
-
-@pytest.fixture
-def scheduler(tmp_path: Path) -> Scheduler:
-    storage = AppointmentStorage(tmp_path / "appointments.json")
+from gestor_citas_avanzado.storage import AppointmentStorage, JournalStorage, PartitionedStorage, SQLiteStorage
+
+
+@pytest.fixture(params=["json", "journal", "partitioned", "sqlite", "columnar", "journal-columnar"])
+def scheduler(request: pytest.FixtureRequest, tmp_path: Path) -> Scheduler:
+    if request.param == "sqlite":
+        storage = SQLiteStorage(tmp_path / "appointments.sqlite3")
+        request.addfinalizer(storage.close)
+    elif request.param == "journal":
+        storage = JournalStorage(tmp_path / "appointments.json")
+    elif request.param == "journal-columnar":
+        storage = JournalStorage(tmp_path / "appointments.json", columnar=True)
+    elif request.param == "columnar":
+        storage = AppointmentStorage(tmp_path / "appointments.json", columnar=True)
+    elif request.param == "partitioned":
+        storage = PartitionedStorage(tmp_path / "appointments")
+    else:
+        storage = AppointmentStorage(tmp_path / "appointments.json")
     return Scheduler(storage)
 
 
@@ -152,3 +164,69 @@ def test_query_helpers(scheduler: Scheduler) -> None:
 def test_get_unknown_appointment_raises(scheduler: Scheduler) -> None:
     with pytest.raises(AppointmentNotFoundError):
         scheduler.get_appointment("missing")
+
+
+class CountingStorage(AppointmentStorage):
+    def __init__(self, path: Path) -> None:
+        super().__init__(path)
+        self.loads = 0
+        self.saves = 0
+
+    def load(self):
+        self.loads += 1
+        return super().load()
+
+    def save(self, appointments) -> None:
+        self.saves += 1
+        super().save(appointments)
+
+
+def test_cached_scheduler_reloads_only_after_external_writes(tmp_path: Path) -> None:
+    storage = CountingStorage(tmp_path / "appointments.json")
+    scheduler = Scheduler(storage, cache=True)
+    base = datetime(2024, 1, 19, 9, 0)
+    appointment = scheduler.create_appointment(
+        client=make_client("A"), service="Therapy", start_time=base, duration_minutes=30
+    )
+    scheduler.get_appointment(appointment.identifier)
+    scheduler.list_appointments()
+    assert storage.loads == 1
+
+    Scheduler(AppointmentStorage(storage.path)).create_appointment(
+        client=make_client("B"), service="Therapy", start_time=base + timedelta(hours=1), duration_minutes=30
+    )
+    assert len(scheduler.list_appointments()) == 2
+    assert storage.loads == 2
+
+
+def test_batch_shares_one_load_and_one_save(tmp_path: Path) -> None:
+    storage = CountingStorage(tmp_path / "appointments.json")
+    scheduler = Scheduler(storage)
+    base = datetime(2024, 1, 19, 9, 0)
+
+    with scheduler.batch():
+        first = scheduler.create_appointment(
+            client=make_client("A"), service="Therapy", start_time=base, duration_minutes=30
+        )
+        scheduler.create_appointment(
+            client=make_client("B"), service="Therapy", start_time=base + timedelta(hours=1), duration_minutes=30
+        )
+        scheduler.cancel_appointment(first.identifier)
+        with pytest.raises(SchedulingConflictError):
+            scheduler.create_appointment(
+                client=make_client("C"), service="Therapy", start_time=base + timedelta(hours=1), duration_minutes=30
+            )
+
+    assert (storage.loads, storage.saves) == (1, 1)
+    assert [item.status for item in AppointmentStorage(storage.path).load()] == ["cancelled", "scheduled"]
+
+
+def test_failed_batch_discards_changes(scheduler: Scheduler) -> None:
+    with pytest.raises(RuntimeError):
+        with scheduler.batch():
+            scheduler.create_appointment(
+                client=make_client("A"), service="Therapy", start_time=datetime(2024, 1, 19, 9, 0), duration_minutes=30
+            )
+            raise RuntimeError("abort")
+
+    assert scheduler.list_appointments() == []
@@ -0,0 +1,164 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from gestor_citas_avanzado.cli import main
+from gestor_citas_avanzado.models import Appointment, Client
+from gestor_citas_avanzado.search import ClientSearchIndex, normalize_text
+from gestor_citas_avanzado.service import Scheduler
+from gestor_citas_avanzado.storage import AppointmentStorage, JournalStorage, SQLiteStorage
+
+BASE = datetime(2024, 5, 6, 9, 0)
+
+
+def make_appointment(client: Client, hours: int = 0) -> Appointment:
+    return Appointment(client=client, service="Therapy", start_time=BASE + timedelta(hours=hours), duration_minutes=30)
+
+
+def test_normalize_text_strips_accents_and_case() -> None:
+    assert normalize_text("Ángela Muñoz") == "angela munoz"
+
+
+def test_find_ignores_accents_and_phone_formatting() -> None:
+    angela = make_appointment(Client(name="Ángela Muñoz", phone="+34 600 12 34 56"))
+    other = make_appointment(Client(name="Pedro Ruiz", email="pedro@example.com"), 1)
+    index = ClientSearchIndex([angela, other])
+
+    assert index.find("angela") == {angela.identifier}
+    assert index.find("MUNOZ") == {angela.identifier}
+    assert index.find("600-123-456") == {angela.identifier}
+    assert index.find("example.com") == {other.identifier}
+    assert index.find("nobody") == set()
+
+
+def test_index_follows_updates_and_removals() -> None:
+    original = make_appointment(Client(name="Lucía"))
+    index = ClientSearchIndex([original])
+    renamed = Appointment(
+        client=Client(name="Marta"),
+        service=original.service,
+        start_time=original.start_time,
+        duration_minutes=original.duration_minutes,
+        identifier=original.identifier,
+    )
+
+    index.add(renamed)
+    assert index.find("lucia") == set()
+    assert index.find("marta") == {original.identifier}
+
+    index.discard(original.identifier)
+    assert index.find("marta") == set()
+    assert len(index) == 0
+
+
+def test_search_ranks_prefix_then_substring_then_partial() -> None:
+    prefix = make_appointment(Client(name="Gonzalo Pérez"))
+    inner = make_appointment(Client(name="Ana Gonzalo"), 1)
+    typo = make_appointment(Client(name="Gonsalo Martín"), 2)
+    unrelated = make_appointment(Client(name="Beatriz"), 3)
+    index = ClientSearchIndex([unrelated, typo, inner, prefix])
+
+    ranked = [identifier for identifier, _ in index.search("gonzalo")]
+
+    assert ranked == [prefix.identifier, inner.identifier, typo.identifier]
+    assert index.search("gonzalo", limit=1)[0][0] == prefix.identifier
+
+
+def test_saved_index_is_ignored_once_stale(tmp_path: Path) -> None:
+    appointment = make_appointment(Client(name="Irene"))
+    path = tmp_path / "appointments.json.clients"
+    ClientSearchIndex([appointment]).save(path, (1, 2, 3))
+
+    restored = ClientSearchIndex.load(path, (1, 2, 3))
+    assert restored is not None and restored.find("irene") == {appointment.identifier}
+    assert ClientSearchIndex.load(path, (1, 2, 4)) is None
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_scheduler_client_queries(tmp_path: Path, backend: str) -> None:
+    if backend == "sqlite":
+        storage = SQLiteStorage(tmp_path / "appointments.sqlite3")
+    else:
+        storage = AppointmentStorage(tmp_path / "appointments.json")
+    scheduler = Scheduler(storage)
+    booked = scheduler.create_appointment(
+        client=Client(name="José Núñez", phone="958 11 22 33"),
+        service="Therapy",
+        start_time=BASE,
+        duration_minutes=30,
+    )
+    scheduler.create_appointment(
+        client=Client(name="Jose Antonio"), service="Therapy", start_time=BASE + timedelta(hours=1), duration_minutes=30
+    )
+
+    assert [item.identifier for item in scheduler.find_for_client("nunez")] == [booked.identifier]
+    assert [item.identifier for item in scheduler.find_for_client("958112233")] == [booked.identifier]
+    assert len(scheduler.find_for_client("jose")) == 2
+
+    scheduler.update_appointment(booked.identifier, client=Client(name="Pilar Soto"))
+    assert scheduler.find_for_client("nunez") == []
+    assert [item.client.name for item in scheduler.search_clients("soto")] == ["Pilar Soto"]
+    if backend == "sqlite":
+        storage.close()
+
+
+def test_scheduler_persists_index_next_to_database(tmp_path: Path) -> None:
+    database = tmp_path / "appointments.json"
+    scheduler = Scheduler(AppointmentStorage(database))
+    scheduler.create_appointment(
+        client=Client(name="Elena"), service="Therapy", start_time=BASE, duration_minutes=30
+    )
+
+    assert len(scheduler.find_for_client("elena")) == 1
+    sidecar = tmp_path / "appointments.json.clients"
+    assert sidecar.exists()
+
+    storage = AppointmentStorage(database)
+    assert ClientSearchIndex.load(sidecar, storage.signature()) is not None
+    Scheduler(storage).create_appointment(
+        client=Client(name="Elena"), service="Therapy", start_time=BASE + timedelta(hours=1), duration_minutes=30
+    )
+    # Kept current by the write itself, so the next search does not rebuild it.
+    assert len(ClientSearchIndex.load(sidecar, storage.signature())) == 2
+    assert len(Scheduler(AppointmentStorage(database)).find_for_client("elena")) == 2
+
+    storage.save(storage.load()[:1])
+    assert ClientSearchIndex.load(sidecar, storage.signature()) is None
+    assert len(Scheduler(AppointmentStorage(database)).find_for_client("elena")) == 1
+    assert len(ClientSearchIndex.load(sidecar, storage.signature())) == 1
+    assert sorted(path.name for path in tmp_path.glob("*.tmp")) == []
+
+
+def test_writes_keep_a_journal_sidecar_current(tmp_path: Path) -> None:
+    database = tmp_path / "appointments.json"
+    writer = Scheduler(JournalStorage(database))
+    writer.create_appointment(client=Client(name="Elena"), service="Therapy", start_time=BASE, duration_minutes=30)
+    assert not (tmp_path / "appointments.json.clients").exists()
+    assert len(Scheduler(JournalStorage(database)).find_for_client("elena")) == 1
+
+    with Scheduler(JournalStorage(database)).batch() as batch:
+        for hour in (1, 2):
+            batch.create_appointment(
+                client=Client(name="Íñigo"),
+                service="Therapy",
+                start_time=BASE + timedelta(hours=hour),
+                duration_minutes=30,
+            )
+
+    storage = JournalStorage(database)
+    index = ClientSearchIndex.load(tmp_path / "appointments.json.clients", storage.signature())
+    assert sorted(len(index.find(name)) for name in ("elena", "inigo")) == [1, 2]
+
+
+def test_list_client_filter(tmp_path: Path, capsys) -> None:
+    database = tmp_path / "appointments.json"
+    main(["--database", str(database), "add", "--name", "Raúl", "--service", "Cut", "--start", "2024-06-03T09:00", "--duration", "30"])
+    main(["--database", str(database), "add", "--name", "Rosa", "--service", "Cut", "--start", "2024-06-03T10:00", "--duration", "30"])
+    capsys.readouterr()
+
+    main(["--database", str(database), "list", "--client", "raul"])
+    assert [line.split(" | ")[2] for line in capsys.readouterr().out.splitlines()] == ["Raúl"]
+
+    main(["--database", str(database), "list", "--client", "rausl", "--fuzzy"])
+    assert capsys.readouterr().out.splitlines()[0].split(" | ")[2] == "Raúl"
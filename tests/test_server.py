@@ -0,0 +1,129 @@
+import json
+import socket
+import threading
+from pathlib import Path
+
+import pytest
+
+from gestor_citas_avanzado.cli import daemon_handler, main
+from gestor_citas_avanzado.server import CommandServer, forward, socket_path
+from gestor_citas_avanzado.service import Scheduler
+from gestor_citas_avanzado.storage import AppointmentStorage
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+
+ADD = ["add", "--name", "Ana", "--service", "Cut", "--start", "2024-05-06T09:00", "--duration", "30"]
+
+
+@pytest.fixture
+def daemon(tmp_path: Path):
+    database = tmp_path / "appointments.json"
+    storage = AppointmentStorage(database)
+    scheduler = Scheduler(storage, cache=True)
+    server = CommandServer(socket_path(database), daemon_handler(storage, scheduler))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield database, scheduler
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def test_commands_are_forwarded_to_the_daemon(daemon, capsys) -> None:
+    database, scheduler = daemon
+
+    main(["--database", str(database), *ADD])
+    created = capsys.readouterr().out.split()[-1]
+    assert [item.identifier for item in scheduler.list_appointments()] == [created]
+
+    with pytest.raises(SystemExit) as raised:
+        main(["--database", str(database), *ADD])
+    assert raised.value.code == 1
+    assert f"overlaps with {created}" in capsys.readouterr().err
+
+    main(["--database", str(database), "--no-daemon", "list"])
+    assert created in capsys.readouterr().out
+
+
+def test_protocol_keeps_the_connection_open(daemon, tmp_path: Path) -> None:
+    database, _ = daemon
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(str(socket_path(database)))
+        stream = connection.makefile("rwb")
+        for argv in (ADD, ["export", "copy.jsonl"], ["serve"]):
+            stream.write(json.dumps({"argv": argv, "cwd": str(tmp_path)}).encode() + b"\n")
+            stream.flush()
+            reply = json.loads(stream.readline())
+        stream.close()
+
+    assert reply["status"] == 1 and "already running" in reply["stderr"]
+    assert len((tmp_path / "copy.jsonl").read_text().splitlines()) == 1
+
+
+def test_stale_socket_is_ignored_and_replaced(tmp_path: Path) -> None:
+    path = tmp_path / "appointments.json.sock"
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(path))
+    stale.close()
+
+    assert forward(path, ["list"], str(tmp_path)) is None
+    server = CommandServer(path, lambda argv, cwd: (0, "pong\n", ""))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        assert forward(path, ["list"], str(tmp_path)) == (0, "pong\n", "")
+        with pytest.raises(OSError):
+            CommandServer(path, lambda argv, cwd: (0, "", ""))
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+    assert not path.exists()
+
+
+@pytest.mark.parametrize("reply", [None, b"", b'{"status": 0, "std', b"not json\n", b'{"status": "0"}\n'])
+def test_unanswered_or_malformed_replies_count_as_no_daemon(tmp_path: Path, reply) -> None:
+    path = tmp_path / "appointments.json.sock"
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(str(path))
+    listener.listen()
+
+    def answer() -> None:
+        connection, _ = listener.accept()
+        with connection:
+            connection.recv(4096)
+            if reply is None:
+                connection.recv(4096)  # hang until the client gives up
+            else:
+                connection.sendall(reply)
+
+    thread = threading.Thread(target=answer, daemon=True)
+    thread.start()
+    try:
+        assert forward(path, ["list"], str(tmp_path), timeout=0.2) is None
+    finally:
+        thread.join()
+        listener.close()
+
+
+def test_cli_runs_locally_when_the_daemon_drops_the_request(tmp_path: Path, capsys) -> None:
+    database = tmp_path / "appointments.json"
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(str(socket_path(database)))
+    listener.listen()
+
+    def drop() -> None:
+        connection, _ = listener.accept()
+        with connection:
+            connection.recv(4096)
+
+    thread = threading.Thread(target=drop, daemon=True)
+    thread.start()
+    try:
+        main(["--database", str(database), *ADD])
+    finally:
+        thread.join()
+        listener.close()
+
+    created = capsys.readouterr().out.split()[-1]
+    assert [item.identifier for item in AppointmentStorage(database).load()] == [created]
@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from gestor_citas_avanzado import audit, cli, metrics, recurrence, storage, transfer
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+DEFERRED = (
+    "asyncio",
+    "concurrent.futures",
+    "csv",
+    "mmap",
+    "multiprocessing",
+    "orjson",
+    "socket",
+    "socketserver",
+    "sqlite3",
+    "tempfile",
+    "uuid",
+    "gestor_citas_avanzado.server",
+    "gestor_citas_avanzado.service",
+    "gestor_citas_avanzado.storage",
+)
+
+
+def loaded_modules(code: str) -> set:
+    environment = dict(os.environ, PYTHONPATH=str(SRC))
+    completed = subprocess.run(
+        [sys.executable, "-c", f"{code}\nimport sys\nprint('\\n'.join(sys.modules))"],
+        env=environment,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(completed.stdout.splitlines())
+
+
+def test_importing_the_cli_defers_storage_and_network_modules() -> None:
+    loaded = loaded_modules("import gestor_citas_avanzado.cli")
+
+    assert "gestor_citas_avanzado.cli" in loaded
+    assert [name for name in DEFERRED if name in loaded] == []
+
+
+def test_option_choices_match_the_modules_they_mirror() -> None:
+    assert cli.PARTITION_PERIODS == storage.PARTITION_PERIODS
+    assert set(cli.REPEAT_FREQUENCIES) == set(recurrence.FREQUENCIES)
+    assert cli.TRANSFER_FORMATS == transfer.FORMATS
+    assert cli.METRIC_FORMATS == metrics.METRIC_FORMATS
+    assert cli.AUDIT_SHARDS == audit.SHARD_MODES
+    assert all(hasattr(storage, name) for name in cli.STORAGE_BACKENDS.values())
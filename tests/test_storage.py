@@ -0,0 +1,155 @@
+import json
+from dataclasses import replace
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from gestor_citas_avanzado import serialization
+from gestor_citas_avanzado.models import Appointment, Client
+from gestor_citas_avanzado.service import Scheduler
+from gestor_citas_avanzado.storage import AppointmentStorage, JournalStorage, SQLiteStorage
+
+
+def make_appointment(start: datetime, **kwargs) -> Appointment:
+    return Appointment(client=Client(name="Client"), service="Therapy", start_time=start, duration_minutes=30, **kwargs)
+
+
+def test_journal_replays_on_top_of_existing_snapshot(tmp_path: Path) -> None:
+    path = tmp_path / "appointments.json"
+    base = datetime(2024, 4, 1, 9, 0)
+    original = make_appointment(base)
+    AppointmentStorage(path).save([original])
+
+    storage = JournalStorage(path)
+    scheduler = Scheduler(storage)
+    scheduler.create_appointment(
+        client=Client(name="Other"), service="Therapy", start_time=base + timedelta(hours=1), duration_minutes=30
+    )
+    scheduler.cancel_appointment(original.identifier)
+
+    assert len(json.loads(path.read_text(encoding="utf-8"))["appointments"]) == 1
+    assert len(storage.journal_path.read_text(encoding="utf-8").splitlines()) == 2
+    reloaded = {item.identifier: item for item in JournalStorage(path).load()}
+    assert len(reloaded) == 2
+    assert reloaded[original.identifier].status == "cancelled"
+
+
+def test_journal_ignores_torn_final_record(tmp_path: Path) -> None:
+    storage = JournalStorage(tmp_path / "appointments.json")
+    appointment = make_appointment(datetime(2024, 4, 1, 9, 0))
+    storage.append(appointment)
+    with storage.journal_path.open("a", encoding="utf-8") as handle:
+        handle.write('{"op": "upsert", "appoint')
+
+    assert [item.identifier for item in storage.load()] == [appointment.identifier]
+
+
+def test_journal_append_after_a_torn_record_is_kept(tmp_path: Path) -> None:
+    path = tmp_path / "appointments.json"
+    first = make_appointment(datetime(2024, 4, 1, 9, 0))
+    JournalStorage(path).append(first)
+    with JournalStorage(path).journal_path.open("ab") as handle:
+        handle.write(b'{"op": "ups')
+
+    second = make_appointment(datetime(2024, 4, 1, 10, 0))
+    JournalStorage(path).append(second)
+
+    assert [item.identifier for item in JournalStorage(path).load()] == [first.identifier, second.identifier]
+    assert len(JournalStorage(path).journal_path.read_bytes().splitlines()) == 2
+
+
+def test_journal_compacts_past_threshold(tmp_path: Path) -> None:
+    path = tmp_path / "appointments.json"
+    storage = JournalStorage(path, compact_after=3)
+    base = datetime(2024, 4, 1, 9, 0)
+    for offset in range(3):
+        storage.append(make_appointment(base + timedelta(hours=offset)))
+
+    assert not storage.journal_path.exists()
+    assert len(AppointmentStorage(path).load()) == 3
+    assert len(storage.load()) == 3
+
+
+def test_sqlite_pushes_queries_down(tmp_path: Path) -> None:
+    storage = SQLiteStorage(tmp_path / "appointments.sqlite3")
+    base = datetime(2024, 4, 1, 9, 0)
+    first = make_appointment(base)
+    second = make_appointment(base + timedelta(hours=2), status="cancelled")
+    storage.save([first, second])
+
+    assert storage.get(first.identifier) == first
+    assert storage.get("missing") is None
+    assert storage.find_between(base, base + timedelta(days=1)) == [first]
+    assert storage.overlapping(base + timedelta(minutes=15), base + timedelta(hours=3)) == [first.identifier]
+    assert [item.identifier for item in storage.upcoming(base + timedelta(hours=1))] == [second.identifier]
+    storage.close()
+
+
+def test_sqlite_overlap_look_back_ignores_cancelled_bookings(tmp_path: Path) -> None:
+    storage = SQLiteStorage(tmp_path / "appointments.sqlite3")
+    base = datetime(2024, 4, 1, 9, 0)
+    short = [make_appointment(base + timedelta(hours=hours)) for hours in range(48)]
+    retreat = replace(make_appointment(base - timedelta(days=1)), duration_minutes=60 * 24 * 30)
+    storage.save([*short, retreat])
+    window = (base + timedelta(days=1), base + timedelta(days=1, minutes=10))
+    assert storage.overlapping(*window) == [retreat.identifier, short[24].identifier]
+
+    storage.append(replace(retreat, status="cancelled"))
+    statements = []
+    storage._connect().set_trace_callback(statements.append)
+    assert storage.overlapping(*window) == [short[24].identifier]
+    searched = [statement for statement in statements if "start_time >= " in statement]
+    assert f"start_time >= '{(window[0] - timedelta(minutes=30)).isoformat(timespec='microseconds')}'" in searched[0]
+    storage.close()
+
+
+def test_sqlite_rolls_back_failed_transaction(tmp_path: Path) -> None:
+    storage = SQLiteStorage(tmp_path / "appointments.sqlite3")
+    appointment = make_appointment(datetime(2024, 4, 1, 9, 0))
+    try:
+        with storage.transaction():
+            storage.append(appointment)
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+
+    assert storage.load() == []
+    storage.close()
+
+
+def test_compact_storage_reads_legacy_files_and_writes_epoch_timestamps(tmp_path: Path) -> None:
+    path = tmp_path / "appointments.json"
+    appointment = make_appointment(datetime(2024, 4, 1, 9, 0))
+    precise = make_appointment(datetime(2024, 4, 1, 10, 0, 0, 250000))
+    AppointmentStorage(path).save([appointment, precise])
+
+    compact = AppointmentStorage(path, compact=True, epoch_timestamps=True)
+    assert compact.load() == [appointment, precise]
+
+    compact.save([appointment, precise])
+    text = path.read_text(encoding="utf-8")
+    assert "\n" not in text
+    raw = json.loads(text)["appointments"]
+    assert raw[0]["start_time"] == 1711962000
+    assert raw[1]["start_time"] == "2024-04-01T10:00:00.250000"
+    assert AppointmentStorage(path).load() == [appointment, precise]
+
+
+def test_find_hydrates_latest_version(tmp_path: Path) -> None:
+    storage = JournalStorage(tmp_path / "appointments.json")
+    appointment = make_appointment(datetime(2024, 4, 1, 9, 0))
+    storage.save([appointment, make_appointment(datetime(2024, 4, 1, 10, 0))])
+    storage.append(replace(appointment, status="completed"))
+
+    assert storage.find(appointment.identifier).status == "completed"
+    assert storage.find("missing") is None
+
+
+def test_stdlib_fallback_reads_fast_backend_output(tmp_path: Path, monkeypatch) -> None:
+    path = tmp_path / "appointments.json"
+    appointment = replace(make_appointment(datetime(2024, 4, 1, 9, 0)), notes="Sesión de prueba")
+    AppointmentStorage(path).save([appointment])
+
+    monkeypatch.setattr(serialization, "orjson", None)
+    monkeypatch.setattr(serialization, "msgspec", None)
+    assert serialization.backend_name() == "json"
+    assert AppointmentStorage(path).load() == [appointment]
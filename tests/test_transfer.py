@@ -0,0 +1,70 @@
+import io
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from gestor_citas_avanzado.cli import main
+from gestor_citas_avanzado.models import Appointment, Client
+from gestor_citas_avanzado.service import Scheduler
+from gestor_citas_avanzado.storage import AppointmentStorage
+from gestor_citas_avanzado.transfer import appointment_from_record, read_records, write_appointments
+
+
+def make_appointment(start: datetime, minutes: int = 30, **kwargs) -> Appointment:
+    return Appointment(client=Client(name="Client"), service="Therapy", start_time=start, duration_minutes=minutes, **kwargs)
+
+
+def test_bulk_create_reports_conflicts_without_aborting(tmp_path: Path) -> None:
+    scheduler = Scheduler(AppointmentStorage(tmp_path / "appointments.json"))
+    base = datetime(2024, 5, 1, 9, 0)
+    existing = scheduler.create_appointment(
+        client=Client(name="Existing"), service="Therapy", start_time=base + timedelta(hours=2), duration_minutes=60
+    )
+
+    entries = [
+        make_appointment(base + timedelta(hours=4)),
+        make_appointment(base + timedelta(hours=1, minutes=45)),  # runs into the existing booking
+        make_appointment(base),
+        make_appointment(base + timedelta(minutes=15)),  # overlaps the entry above
+        make_appointment(base + timedelta(minutes=15), status="cancelled"),
+        make_appointment(base + timedelta(hours=2, minutes=30)),  # starts inside the existing booking
+    ]
+    result = scheduler.bulk_create(entries)
+
+    assert [position for position, _, _ in result.rejected] == [1, 3, 5]
+    assert existing.identifier in result.rejected[0][2]
+    assert entries[2].identifier in result.rejected[1][2]
+    assert len(result.created) == 3
+    assert len(scheduler.list_appointments()) == 4
+
+
+def test_csv_round_trip(tmp_path: Path) -> None:
+    appointments = [
+        make_appointment(datetime(2024, 5, 1, 9, 0), notes="Primera, visita"),
+        make_appointment(datetime(2024, 5, 1, 10, 0), status="completed"),
+    ]
+    buffer = io.StringIO()
+    assert write_appointments(buffer, appointments, "csv") == 2
+
+    buffer.seek(0)
+    restored = [appointment_from_record(record) for _, record in read_records(buffer, "csv")]
+    assert restored == appointments
+
+
+def test_import_and_export_subcommands(tmp_path: Path, capsys) -> None:
+    database = tmp_path / "appointments.json"
+    source = tmp_path / "history.jsonl"
+    lines = [make_appointment(datetime(2024, 5, 1, 9, 0)).to_dict(), make_appointment(datetime(2024, 5, 1, 9, 15)).to_dict()]
+    buffer = io.StringIO()
+    write_appointments(buffer, [Appointment.from_dict(line) for line in lines], "jsonl")
+    source.write_text(buffer.getvalue() + "not json\n", encoding="utf-8")
+
+    main(["--database", str(database), "import", str(source)])
+    report = capsys.readouterr().out.splitlines()
+    assert report[0] == "Imported 1 appointments, rejected 2"
+    assert report[1].startswith("Line 2: The appointment overlaps with")
+    assert report[2].startswith("Line 3: invalid record")
+
+    main(["--database", str(database), "export", "--format", "csv"])
+    exported = capsys.readouterr().out.splitlines()
+    assert exported[0].startswith("identifier,name,")
+    assert len(exported) == 2